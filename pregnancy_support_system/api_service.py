@@ -1,21 +1,107 @@
-from fastapi import FastAPI, UploadFile, File, HTTPException,Body,Form
+import asyncio
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, UploadFile, File, HTTPException,Body,Form,Request,Query
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
 import os
+import sys
 import json
-import requests
-from typing import Dict, Any
-import pdfplumber
-import fitz
-from ml_model import predict_risk_level
-import torch
-from transformers import pipeline, AutoTokenizer
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_community.vectorstores import FAISS
-from langchain_huggingface import HuggingFaceEmbeddings, HuggingFacePipeline
-from langchain.chains import ConversationalRetrievalChain
-
-app = FastAPI(title="Pregnancy Support API")
+import time
+from typing import Dict, Any, List, Optional
+from ml_model import RiskPredictor, ShadowScorer, default_risk_predictor as risk_predictor
+from model_registry import ModelRegistryError
+from components import ComponentWarmingUp, LazyComponent
+from llm_client import CompletionClient, load_llm_backend
+from local_llm import LocalCompletionClient
+from plan_cache import NutritionPlanCache, plan_cache_key
+from pdf_extraction import PdfExtractor
+from vitals_state import VitalsTracker
+from risk_batching import MicroBatcher
+from pregnancy_detection import DETECTION_VARIANTS, PregnancyDetector
+from research_retrieval import ResearchRetriever, build_context, estimate_tokens, truncate_to_tokens
+from report_vitals import extract_vitals, merge_patient_data
+from metrics import MODEL_LOAD_SECONDS, STAGE_SECONDS, MetricsMiddleware, SlowRequestProfiler, render_metrics, stage_timer
+
+
+# The retrieval/LLM stack takes tens of seconds to load and none of the risk or
+# extraction endpoints need it, so it is built in background threads after startup.
+def _load_embeddings():
+    from research_index import make_embeddings
+    return make_embeddings()
+
+def _load_vectorstore(embeddings):
+    from research_index import load_or_build_vectorstore
+    return load_or_build_vectorstore(embeddings)
+
+def _load_local_llm():
+    from local_llm import LocalLLM
+    return LocalLLM.from_env()
+
+# The local model is only loaded when it serves the plans (LLM_BACKEND=local).
+llm_backend = load_llm_backend()
+embeddings = LazyComponent("embeddings", _load_embeddings)
+vectorstore = LazyComponent("vectorstore", _load_vectorstore, depends_on=[embeddings])
+local_llm = LazyComponent("local_llm", _load_local_llm)
+background_components = [embeddings, vectorstore] + ([local_llm] if llm_backend == "local" else [])
+
+completion_client = LocalCompletionClient(local_llm) if llm_backend == "local" else CompletionClient.from_env()
+plan_cache = NutritionPlanCache.from_env()
+pdf_extractor = PdfExtractor.from_env()
+vitals_tracker = VitalsTracker.from_env(risk_predictor)
+risk_batcher = MicroBatcher.from_env(risk_predictor)
+pregnancy_detector = PregnancyDetector()
+research_retriever = ResearchRetriever.from_env(vectorstore)
+profiler = SlowRequestProfiler.from_env()
+model_registry = risk_predictor.registry
+# Exact TreeSHAP costs ~3 ms per row, so explained batches are capped.
+explain_max_batch = int(os.environ.get("RISK_EXPLAIN_MAX_BATCH", "256"))
+shadow_scorer = None
+
+
+def _set_shadow_candidate(version: Optional[str]):
+    global shadow_scorer
+    if shadow_scorer is not None:
+        shadow_scorer.shutdown()
+        shadow_scorer = None
+    if version:
+        candidate = RiskPredictor(registry=model_registry, version=version)
+        candidate.load()
+        shadow_scorer = ShadowScorer(candidate)
+
+
+def _shadow_score(records: List[Dict[str, Any]], labels: List[str]):
+    if shadow_scorer is not None:
+        shadow_scorer.submit(records, labels)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    print("🔄 Initializing components...")
+    risk_predictor.required_inputs = list(PatientData.__fields__)
+    risk_predictor.load()
+    pregnancy_detector.required_inputs = list(SmartwatchVitals.__fields__)
+    try:
+        pregnancy_detector.load()
+    except FileNotFoundError:
+        print("⚠️ Pregnancy detection model not trained yet; run python pregnancy_detection.py")
+    _set_shadow_candidate(os.environ.get("RISK_MODEL_CANDIDATE"))
+    pdf_extractor.start()
+    risk_batcher.start()
+    research_retriever.start()
+    for component in background_components:
+        component.start()
+    print("✅ Risk model ready, retrieval and LLM components loading in the background")
+    yield
+    await completion_client.aclose()
+    await risk_batcher.stop()
+    await research_retriever.stop()
+    pdf_extractor.shutdown()
+    _set_shadow_candidate(None)
+
+
+app = FastAPI(title="Pregnancy Support API", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -23,42 +109,20 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# Outermost, so latency covers CORS handling and streamed bodies up to their last chunk.
+app.add_middleware(MetricsMiddleware, routes=app.routes, profiler=profiler)
 
-print("🔄 Initializing components...")
-pdf_files = [
-    "1-s2.0-S0002937821027289-main.pdf",
-    "s40748-022-00139-9.pdf",
-    "nutrients-12-01325.pdf"
-]
-
-#Research paper processing
-research_text = ""
-for file_path in pdf_files:
-    with fitz.open(file_path) as doc:
-        research_text += "".join(page.get_text("text") + "\n" for page in doc)
-
-splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200)
-text_chunks = splitter.split_text(research_text)
-embeddings = HuggingFaceEmbeddings(model_name="sentence-transformers/paraphrase-MiniLM-L3-v2")
-vectorstore = FAISS.from_texts(texts=text_chunks, embedding=embeddings)
-
-# Initialize LLM
-tokenizer = AutoTokenizer.from_pretrained("facebook/blenderbot-400M-distill")
-llm_pipeline = pipeline(
-    "text-generation",
-    model="facebook/blenderbot-400M-distill",
-    tokenizer=tokenizer,
-    max_length=1024,
-    max_new_tokens=500,
-    truncation=True,
-    device=0 if torch.cuda.is_available() else -1
-)
-qa_chain = ConversationalRetrievalChain.from_llm(
-    llm=HuggingFacePipeline(pipeline=llm_pipeline),
-    retriever=vectorstore.as_retriever(),
-    max_tokens_limit=500
-)
-print("✅ All components initialized")
+@app.exception_handler(ComponentWarmingUp)
+async def component_warming_up_handler(request: Request, exc: ComponentWarmingUp):
+    return JSONResponse(
+        status_code=503,
+        headers={"Retry-After": "5"},
+        content={
+            "status": "warming up" if exc.component.status != "failed" else "unavailable",
+            "component": exc.component.name,
+            "detail": str(exc),
+        },
+    )
 
 # Request Models
 class PatientData(BaseModel):
@@ -77,63 +141,305 @@ class PatientData(BaseModel):
     Hormonal_Symptoms: str
     BS: float
 
+class SmartwatchVitals(BaseModel):
+    Age: float
+    SystolicBP: float
+    DiastolicBP: float
+    BodyTemp: float
+    HeartRate: float
+    HRV: float
+    Resp_Rate: float
+    SpO2: float
+    Sleep_Hours: float
+    Step_Count: float
+    Caloric_Burn: float
+    Cycle_Length: float
+
+class VitalsSample(BaseModel):
+    Age: Optional[float] = None
+    SystolicBP: Optional[float] = None
+    DiastolicBP: Optional[float] = None
+    BodyTemp: Optional[float] = None
+    HeartRate: Optional[float] = None
+    HRV: Optional[float] = None
+    Resp_Rate: Optional[float] = None
+    SpO2: Optional[float] = None
+    Sleep_Hours: Optional[float] = None
+    Step_Count: Optional[float] = None
+    Caloric_Burn: Optional[float] = None
+    Cycle_Length: Optional[float] = None
+    Hormonal_Symptoms: Optional[str] = None
+    BS: Optional[float] = None
+
 # --- API Endpoints ---
 
 @app.post("/extract-report")
 async def extract_report(file: UploadFile = File(...)):
     """Extract text from uploaded doctor's report"""
     try:
-        with pdfplumber.open(file.file) as pdf:
-            text = ' '.join(page.extract_text() for page in pdf.pages if page.extract_text())
-        return {"text": text}
+        text = await pdf_extractor.extract_text(await file.read())
+        return {"text": text, "vitals": _extract_vitals(text)}
     except Exception as e:
         raise HTTPException(400, detail=f"Report extraction failed: {str(e)}")
 
+@app.get("/extract-report/stats")
+async def extract_report_stats():
+    """Report extraction pool size and OCR page/cache counters"""
+    return pdf_extractor.stats()
+
 @app.post("/predict-risk")
-async def predict_risk(patient_data: PatientData):
-    """Predict pregnancy risk level"""
+async def predict_risk(patient_data: PatientData, explain: bool = False, top_k: int = Query(3, ge=1),
+                       approximate: bool = False):
+    """Predict pregnancy risk level with class probabilities (and top contributing features if explain=true)"""
     try:
-        risk_level = predict_risk_level(patient_data.dict())
-        return {"riskLevel": risk_level}
+        record = patient_data.dict()
+        result = await risk_batcher.score(record, explain=explain, top_k=top_k, approximate=approximate)
+        _shadow_score([record], [result["riskLevel"]])
+        return result
     except Exception as e:
         raise HTTPException(400, detail=f"Prediction failed: {str(e)}")
 
+@app.post("/predict-risk/batch")
+async def predict_risk_batch(patients: List[PatientData], explain: bool = False,
+                             top_k: int = Query(3, ge=1), approximate: bool = False):
+    """Predict pregnancy risk levels for many patients in one vectorized pass"""
+    if explain and len(patients) > explain_max_batch:
+        raise HTTPException(400, detail=f"explain=true allows at most {explain_max_batch} patients per batch")
+    try:
+        records = [patient.dict() for patient in patients]
+        # Off the event loop: a large batch (and its explanations) would stall every other request.
+        results = await run_in_threadpool(
+            risk_predictor.score_batch, records, explain=explain, top_k=top_k, approximate=approximate
+        )
+        risk_levels = [result["riskLevel"] for result in results]
+        _shadow_score(records, risk_levels)
+        return {"riskLevels": risk_levels, "results": results}
+    except Exception as e:
+        raise HTTPException(400, detail=f"Batch prediction failed: {str(e)}")
+
+def _detect_pregnancy(records, model):
+    if model not in DETECTION_VARIANTS:
+        raise HTTPException(400, detail=f"model must be one of {', '.join(DETECTION_VARIANTS)}")
+    if not pregnancy_detector.ready:
+        raise HTTPException(503, detail="Pregnancy detection model is not trained; run python pregnancy_detection.py")
+    try:
+        return pregnancy_detector.predict_batch(records, model)
+    except Exception as e:
+        raise HTTPException(400, detail=f"Pregnancy detection failed: {str(e)}")
+
+@app.post("/detect-pregnancy")
+async def detect_pregnancy(vitals: SmartwatchVitals, model: str = "ensemble"):
+    """Detect pregnancy status from smartwatch vitals (model: ensemble, rf or xgb)"""
+    return (await run_in_threadpool(_detect_pregnancy, [vitals.dict()], model))[0]
+
+@app.post("/detect-pregnancy/batch")
+async def detect_pregnancy_batch(vitals: List[SmartwatchVitals], model: str = "ensemble"):
+    """Detect pregnancy status for many vitals records in one vectorized pass"""
+    # Off the event loop: walking the forests for a large batch would stall every other request.
+    return {"results": await run_in_threadpool(_detect_pregnancy, [v.dict() for v in vitals], model)}
+
+@app.get("/detect-pregnancy/stats")
+async def detect_pregnancy_stats():
+    """Pregnancy detection load time and per-model latency counters"""
+    return pregnancy_detector.stats()
+
+@app.get("/vitals/stats")
+async def vitals_stats():
+    """Tracked users and how many samples triggered a rescore"""
+    return vitals_tracker.stats()
+
+@app.post("/vitals/{user_id}")
+async def update_vitals(user_id: str, sample: VitalsSample):
+    """Fold a smartwatch sample into the user's rolling state; rescores only on a material change"""
+    try:
+        # Rescored through the micro-batcher, off the event loop and alongside /predict-risk calls.
+        return await vitals_tracker.update_async(user_id, sample.dict(), risk_batcher.score)
+    except Exception as e:
+        raise HTTPException(400, detail=f"Vitals update failed: {str(e)}")
+
+@app.get("/vitals/{user_id}")
+async def get_vitals(user_id: str):
+    """Rolling window summaries and the last prediction for a user"""
+    state = vitals_tracker.get(user_id)
+    if state is None:
+        raise HTTPException(404, detail=f"No vitals tracked for user {user_id}")
+    return state
+
+@app.get("/ready")
+async def readiness():
+    """Report which components have finished loading"""
+    components = {"risk_model": {"status": "ready" if risk_predictor.load_count else "pending"}}
+    components.update({component.name: component.describe() for component in background_components})
+    return {
+        "ready": all(component["status"] == "ready" for component in components.values()),
+        "components": components,
+    }
+
+@app.get("/predict-risk/stats")
+async def predict_risk_stats():
+    """Risk model load time, prediction latency and micro-batching counters"""
+    return {**risk_predictor.stats(), "micro_batching": risk_batcher.stats()}
+
+class ModelVersionRequest(BaseModel):
+    version: Optional[str] = None
+
+@app.get("/models")
+async def list_models():
+    """Registry versions, the served/pinned version and shadow-scoring agreement"""
+    return {
+        "current": model_registry.current_version(),
+        "serving": risk_predictor.version,
+        "pinned": risk_predictor.pinned_version,
+        "versions": {
+            version: model_registry.manifest(version).get("metrics", {}) for version in model_registry.versions()
+        },
+        "shadow": shadow_scorer.stats() if shadow_scorer is not None else None,
+    }
+
+@app.post("/models/pin")
+async def pin_model(data: ModelVersionRequest):
+    """Serve a specific version in this process (null version follows CURRENT again)"""
+    try:
+        # Loading a version from disk takes a while; keep serving other requests meanwhile.
+        await run_in_threadpool(risk_predictor.pin, data.version)
+        return {"serving": risk_predictor.version, "pinned": risk_predictor.pinned_version}
+    except (ModelRegistryError, OSError) as e:
+        raise HTTPException(400, detail=str(e))
+
+@app.post("/models/activate")
+async def activate_model(data: ModelVersionRequest):
+    """Publish a version by switching the registry's CURRENT pointer"""
+    try:
+        model_registry.activate(data.version)
+        return {"current": model_registry.current_version()}
+    except ModelRegistryError as e:
+        raise HTTPException(400, detail=str(e))
+
+@app.post("/models/rollback")
+async def rollback_model():
+    """Re-publish the previously published version"""
+    try:
+        return {"current": model_registry.rollback()}
+    except ModelRegistryError as e:
+        raise HTTPException(400, detail=str(e))
+
+@app.post("/models/shadow")
+async def shadow_model(data: ModelVersionRequest):
+    """Shadow-score live traffic against a candidate version (null version stops shadowing)"""
+    try:
+        await run_in_threadpool(_set_shadow_candidate, data.version)
+        return {"shadow": shadow_scorer.stats() if shadow_scorer is not None else None}
+    except (ModelRegistryError, OSError) as e:
+        raise HTTPException(400, detail=str(e))
+
 class NutritionRequest(BaseModel):
     risk_level: str
     doctor_notes: str
 
 
+def _nutrition_plan_messages(risk_level: str, doctor_notes: str, context: str = ""):
+    query = f"""
+    Research context:
+    {context}
+
+    Generate a nutrition plan for a pregnant woman with {risk_level} risk.
+    Medical conditions: {doctor_notes}.
+    Focus on vitamins, minerals, macronutrient intake, and meal plans.
+    """
+
+    primer = """
+    You are an expert pregnancy support assistant. You provide helpful, empathetic, and medically sound advice to pregnant individuals.
+    Always base your answers on the given context.
+    """
+
+    return [
+        {"role": "system", "content": primer},
+        {"role": "user", "content": query}
+    ]
+
+
+async def _grounded_nutrition_plan_messages(risk_level: str, doctor_notes: str, retrieval: Dict[str, Any]):
+    """Prompt with the top-k research chunks for these notes, capped to the prompt token budget.
+
+    Fills retrieval with retrieval_ms, context_chunks, prompt_tokens and grounded. If the
+    research index failed to load, the plan is generated without research context
+    (grounded=False) instead of failing; while it is still loading, ComponentWarmingUp
+    propagates so an ungrounded plan is not cached for notes that could be grounded shortly.
+    """
+    budget = research_retriever.prompt_token_budget
+    doctor_notes = truncate_to_tokens(doctor_notes, budget // 2)
+    start = time.perf_counter()
+    try:
+        with stage_timer("retrieval", "research_retriever"):
+            chunks = await research_retriever.retrieve(f"{risk_level} risk pregnancy nutrition. {doctor_notes}")
+        retrieval["grounded"] = True
+    except ComponentWarmingUp as e:
+        if e.component.status != "failed":
+            raise
+        chunks = []
+        retrieval["grounded"] = False
+        retrieval["retrieval_error"] = str(e)
+    retrieval["retrieval_ms"] = (time.perf_counter() - start) * 1000
+
+    base_tokens = sum(estimate_tokens(m["content"]) for m in _nutrition_plan_messages(risk_level, doctor_notes))
+    context, retrieval["context_chunks"] = build_context(chunks, budget - base_tokens)
+    messages = _nutrition_plan_messages(risk_level, doctor_notes, context)
+    retrieval["prompt_tokens"] = sum(estimate_tokens(m["content"]) for m in messages)
+    return messages
+
+
+def _plan_response(plan: str, retrieval: Dict[str, Any]):
+    """Retrieval fields are None when the plan came from the plan cache."""
+    return {
+        "plan": plan,
+        "retrieval_ms": retrieval.get("retrieval_ms"),
+        "context_chunks": retrieval.get("context_chunks"),
+        "prompt_tokens": retrieval.get("prompt_tokens"),
+        "grounded": retrieval.get("grounded"),
+    }
+
+
+async def _request_nutrition_plan(risk_level: str, doctor_notes: str, retrieval: Dict[str, Any]):
+    messages = await _grounded_nutrition_plan_messages(risk_level, doctor_notes, retrieval)
+    with stage_timer("llm", llm_backend):
+        return await completion_client.complete(messages)
+
+
+async def _timed_stream_complete(messages: List[Dict[str, str]]):
+    """completion_client.stream_complete, recording time to the first piece and to the end as llm stages."""
+    start = time.perf_counter()
+    first = True
+    with stage_timer("llm", llm_backend):
+        async for delta in completion_client.stream_complete(messages):
+            if first:
+                STAGE_SECONDS.observe(time.perf_counter() - start, stage="llm_first_token", component=llm_backend)
+                first = False
+            yield delta
+
+
+async def _stream_nutrition_plan(risk_level: str, doctor_notes: str, retrieval: Dict[str, Any]):
+    """Yield the plan in pieces as the LLM produces it; a cached plan, or one another request is
+    already generating, comes out as one piece."""
+    async def generate():
+        messages = await _grounded_nutrition_plan_messages(risk_level, doctor_notes, retrieval)
+        async for delta in _timed_stream_complete(messages):
+            yield delta
+
+    async for piece in plan_cache.stream_or_compute(plan_cache_key(risk_level, doctor_notes), generate):
+        yield piece
+
+
 async def _generate_nutrition_plan_logic(risk_level: str, doctor_notes: str):
+    retrieval = {}
     try:
-        query = f"""
-        Generate a nutrition plan for a pregnant woman with {risk_level} risk.
-        Medical conditions: {doctor_notes}.
-        Focus on vitamins, minerals, macronutrient intake, and meal plans.
-        """
-
-        primer = """
-        You are an expert pregnancy support assistant. You provide helpful, empathetic, and medically sound advice to pregnant individuals.
-        Always base your answers on the given context.
-        """
-
-        res = requests.post(
-            url="https://openrouter.ai/api/v1/chat/completions",
-            headers={
-                "Authorization": f"Bearer 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",
-                "Content-Type": "application/json"
-            },
-            data=json.dumps({
-                "model": "gpt-3.5-turbo",
-                "messages": [
-                    {"role": "system", "content": primer},
-                    {"role": "user", "content": query}
-                ]
-            })
+        plan = await plan_cache.get_or_compute(
+            plan_cache_key(risk_level, doctor_notes),
+            lambda: _request_nutrition_plan(risk_level, doctor_notes, retrieval)
         )
+        return _plan_response(plan, retrieval)
 
-        result = res.json()
-        return {"plan": result['choices'][0]['message']['content']}
-    
+    except ComponentWarmingUp:
+        raise
     except Exception as e:
         raise HTTPException(400, detail=f"Nutrition plan generation failed: {str(e)}")
 
@@ -141,32 +447,174 @@ async def _generate_nutrition_plan_logic(risk_level: str, doctor_notes: str):
 async def generate_nutrition_plan(data: NutritionRequest = Body(...)):
     return await _generate_nutrition_plan_logic(data.risk_level, data.doctor_notes)
 
+@app.get("/generate-nutrition-plan/stats")
+async def nutrition_plan_cache_stats():
+    """Nutrition plan cache hit/miss counters, research retrieval counters and local LLM latency"""
+    return {
+        **plan_cache.stats(),
+        "retrieval": research_retriever.stats(),
+        "local_llm": completion_client.stats() if llm_backend == "local" else None,
+    }
+
+
+def _sse(event: str, data: Dict[str, Any]):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def _extract_vitals(report_text: str):
+    with stage_timer("vitals_extract", "report_vitals"):
+        return extract_vitals(report_text)
+
+
+def _has_all_patient_fields(submitted: Dict[str, Any]):
+    return all(submitted.get(field) is not None for field in PatientData.__fields__)
+
+
+def _patient_from_report(submitted: Dict[str, Any], report_text: str):
+    """PatientData from the submitted fields, with missing ones filled from vitals found in the report."""
+    record, fields = merge_patient_data(submitted, _extract_vitals(report_text))
+    return PatientData(**record), fields
+
+
+def _imputed_fields(fields: Dict[str, Dict[str, Any]]):
+    """Fields neither submitted nor found in the report, scored at their training-median defaults."""
+    return [field for field, info in fields.items() if info["source"] == "default"]
+
+
+async def _predict_report_risk(record: Dict[str, Any]):
+    """Scored on the micro-batcher's worker thread, so a PDF parse already under way keeps going."""
+    risk_level = (await risk_batcher.score(record))["riskLevel"]
+    _shadow_score([record], [risk_level])
+    return risk_level
+
+
+async def _process_report_events(submitted: Dict[str, Any], submitted_patient: Optional[PatientData],
+                                 extraction: asyncio.Task):
+    try:
+        risk_level = None
+        if submitted_patient is not None:
+            risk_level = await _predict_report_risk(submitted_patient.dict())
+            yield _sse("risk_level", {"risk_level": risk_level, "imputed": []})
+
+        report_text = await extraction
+        yield _sse("report_text", {"report_text": report_text})
+
+        patient, fields = _patient_from_report(submitted, report_text)
+        yield _sse("patient_data", {"patient_data": patient.dict(), "fields": fields})
+        if risk_level is None:
+            risk_level = await _predict_report_risk(patient.dict())
+            yield _sse("risk_level", {"risk_level": risk_level, "imputed": _imputed_fields(fields)})
+
+        pieces = []
+        retrieval = {}
+        async for delta in _stream_nutrition_plan(risk_level, report_text, retrieval):
+            pieces.append(delta)
+            yield _sse("plan_delta", {"delta": delta})
+        yield _sse("done", {"nutrition_plan": _plan_response("".join(pieces), retrieval)})
+
+    except Exception as e:
+        yield _sse("error", {"detail": str(e)})
+    finally:
+        extraction.cancel()
+
 
 @app.post("/process-report")
 async def process_report(
+    request: Request,
     file: UploadFile = File(...),
-    patient_data: str = Form(...)
+    patient_data: str = Form("{}")
 ):
+    """Extract the report, predict risk and generate a plan.
+
+    patient_data may omit fields; they are filled from vitals found in the report
+    text (then from defaults), and the response says where each field came from.
+    "imputed" lists the defaulted fields the risk level was scored with; it is empty
+    only when the risk level rests entirely on submitted and reported values.
+    If every field was submitted, risk prediction runs while the PDF is parsed in
+    the worker pool. Clients that send ``Accept: text/event-stream`` get each stage
+    as an SSE event as soon as it is ready (risk_level, report_text, patient_data,
+    plan_delta..., done) instead of one JSON body.
+    """
     try:
-        patient_dict = json.loads(patient_data)
+        submitted = json.loads(patient_data)
+        # Validated up front: a complete submission is scored before the report is parsed.
+        submitted_patient = PatientData(**submitted) if _has_all_patient_fields(submitted) else None
+        pdf_bytes = await file.read()
+    except Exception as e:
+        raise HTTPException(400, detail=str(e))
+
+    extraction = asyncio.create_task(pdf_extractor.extract_text(pdf_bytes))
+    await asyncio.sleep(0)  # let the extraction hand the PDF to the worker pool before scoring starts
+
+    if "text/event-stream" in request.headers.get("accept", ""):
+        return StreamingResponse(
+            _process_report_events(submitted, submitted_patient, extraction),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache"},
+        )
 
-        with pdfplumber.open(file.file) as pdf:
-            report_text = ' '.join(page.extract_text() for page in pdf.pages if page.extract_text())
+    try:
+        risk_level = await _predict_report_risk(submitted_patient.dict()) if submitted_patient is not None else None
 
-        risk_level = predict_risk_level(patient_dict)
+        report_text = await extraction
+        patient, fields = _patient_from_report(submitted, report_text)
+        imputed = []
+        if risk_level is None:
+            risk_level = await _predict_report_risk(patient.dict())
+            imputed = _imputed_fields(fields)
 
         nutrition_plan = await _generate_nutrition_plan_logic(risk_level, report_text)
 
         return {
             "report_text": report_text,
+            "patient_data": patient.dict(),
+            "patient_data_fields": fields,
             "risk_level": risk_level,
+            "imputed": imputed,
             "nutrition_plan": nutrition_plan
         }
 
+    except ComponentWarmingUp:
+        extraction.cancel()
+        raise
     except Exception as e:
+        extraction.cancel()
         raise HTTPException(400, detail=str(e))
 
 
+class ProfilerSettings(BaseModel):
+    enabled: Optional[bool] = None
+    slow_ms: Optional[float] = None
+
+def _record_load_times():
+    load_seconds = {"risk_model": risk_predictor.last_load_seconds,
+                    "pregnancy_detection": pregnancy_detector.last_load_seconds}
+    load_seconds.update({component.name: component.load_seconds for component in background_components})
+    for name, seconds in load_seconds.items():
+        if seconds is not None:
+            MODEL_LOAD_SECONDS.set(seconds, component=name)
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Request and stage latency histograms, in-flight requests and model load times in Prometheus text format"""
+    _record_load_times()
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+@app.get("/metrics/profiler")
+async def profiler_settings():
+    """Slow-request profiler settings and how many profiles it has written"""
+    return profiler.stats()
+
+@app.post("/metrics/profiler")
+async def configure_profiler(settings: ProfilerSettings):
+    """Turn the slow-request profiler on or off and set its threshold; slow requests dump .folded stacks"""
+    if settings.slow_ms is not None and settings.slow_ms < 0:
+        raise HTTPException(400, detail="slow_ms must be >= 0")
+    profiler.configure(settings.enabled, None if settings.slow_ms is None else settings.slow_ms / 1000)
+    return profiler.stats()
+
+
 if __name__ == "__main__":
-    import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
+    # Serve through `python -m uvicorn` rather than from this __main__ module: PdfExtractor's
+    # spawned workers re-import __main__, and importing the app there costs ~300 MB per worker.
+    os.execv(sys.executable, [sys.executable, "-m", "uvicorn", "api_service:app", "--host", "0.0.0.0", "--port", "8000"])
\ No newline at end of file
@@ -0,0 +1,78 @@
+"""Show that concurrent /generate-nutrition-plan calls overlap instead of queueing.
+
+Points the API's completion client at a local stub that takes --delay seconds
+per call, fires --requests calls at once and reports wall time and how many
+upstream calls were in flight together. Each call has its own doctor's notes,
+so the plan cache cannot coalesce them into one upstream call. Research retrieval is stubbed out to
+return no context: this measures the completion calls, and the FAISS index is
+not loaded outside the app lifespan.
+
+Run from pregnancy_support_system/:  python -m benchmarks.concurrent_nutrition_plans
+"""
+import argparse
+import asyncio
+import time
+
+import httpx
+
+import api_service
+from benchmarks.stub_completion_server import StubCompletionServer
+
+
+def max_overlap(intervals):
+    events = sorted([(start, 1) for start, _ in intervals] + [(end, -1) for _, end in intervals])
+    current = peak = 0
+    for _, delta in events:
+        current += delta
+        peak = max(peak, current)
+    return peak
+
+
+async def no_research_context(query):
+    return []
+
+
+async def run(requests, delay):
+    transport = httpx.ASGITransport(app=api_service.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://api", timeout=60) as client:
+        bodies = [{"risk_level": "mid risk", "doctor_notes": f"Mild hypertension, iron deficiency, patient {i}"}
+                  for i in range(requests)]
+        start = time.perf_counter()
+        responses = await asyncio.gather(*[client.post("/generate-nutrition-plan", json=body) for body in bodies])
+        elapsed = time.perf_counter() - start
+    failed = [r for r in responses if r.status_code != 200]
+    return elapsed, failed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--delay", type=float, default=0.5)
+    parser.add_argument("--port", type=int, default=8901)
+    args = parser.parse_args()
+
+    stub = StubCompletionServer(port=args.port, delay=args.delay).start()
+    api_service.completion_client.url = stub.url
+    api_service.completion_client.api_key = "stub-key"
+    api_service.research_retriever.retrieve = no_research_context
+    try:
+        elapsed, failed = asyncio.run(run(args.requests, args.delay))
+    finally:
+        stub.stop()
+
+    serial = args.requests * args.delay
+    print(f"Requests: {args.requests}, upstream delay {args.delay:.2f} s (serial would take {serial:.1f} s)")
+    print(f"Wall time: {elapsed:.2f} s")
+    peak = max_overlap(stub.calls)
+    print(f"Upstream calls: {len(stub.calls)}, peak in flight: {peak}")
+    if failed:
+        raise SystemExit(f"❌ {len(failed)} requests failed: {failed[0].text}")
+    if len(stub.calls) != args.requests:
+        raise SystemExit(f"❌ Expected {args.requests} upstream calls, got {len(stub.calls)}")
+    if elapsed > serial / 2 or peak < 2:
+        raise SystemExit("❌ Requests did not overlap")
+    print("✅ Requests overlapped")
+
+
+if __name__ == "__main__":
+    main()
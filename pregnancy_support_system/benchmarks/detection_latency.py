@@ -0,0 +1,84 @@
+"""Check the compiled detection scorers against the sklearn models and compare their latency.
+
+Uses the persisted artifacts from `python pregnancy_detection.py` (trains them first
+if missing). With --search it also times the Optuna search serially against
+n_jobs=-1, each in a fresh in-memory study.
+
+Run from pregnancy_support_system/:  python -m benchmarks.detection_latency [--search]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from pregnancy_detection import (DETECTION_DATASET, DETECTION_MODEL_FILE, DETECTION_VARIANTS, PregnancyDetector,
+                                 train_detection_model)
+
+
+def time_per_call(fn, inputs):
+    start = time.perf_counter()
+    for value in inputs:
+        fn(value)
+    return (time.perf_counter() - start) / len(inputs) * 1000
+
+
+def compare_search(trials):
+    timings = {}
+    for n_jobs in (1, -1):
+        with tempfile.TemporaryDirectory() as artifact_dir:
+            metrics = train_detection_model(n_trials=trials, n_jobs=n_jobs, storage=None, artifact_dir=artifact_dir)
+        timings[n_jobs] = metrics["timings"]
+    for n_jobs, timing in timings.items():
+        print(f"n_jobs={n_jobs:2d}: search {timing['search_seconds']:.1f} s  total {timing['total_seconds']:.1f} s"
+              f"  (CPUs: {os.cpu_count()})")
+
+
+def main(single_rows=200, search=False, trials=20):
+    if not os.path.exists(DETECTION_MODEL_FILE):
+        train_detection_model(n_trials=trials)
+    detector = PregnancyDetector()
+    detector.load()
+
+    frame = pd.read_csv(DETECTION_DATASET).drop(columns=["Pregnancy_Status"])
+    records = frame.to_dict("records")
+    X = detector._pipeline.transform_frame(frame)
+    rows = [X[i:i + 1] for i in range(min(single_rows, len(X)))]
+
+    failed = False
+    print(f"Rows: {len(X)}  single-row samples: {len(rows)}")
+    for variant in DETECTION_VARIANTS:
+        model, scorer = detector._models[variant], detector._scorers[variant]
+        # Small slices so the comparison exercises the compiled path, not the large-batch fallback.
+        compiled = np.vstack([scorer(X[i:i + 32]) for i in range(0, len(X), 32)])
+        reference = model.predict_proba(X)
+        max_diff = float(np.abs(compiled - reference).max())
+        mismatched = int((compiled.argmax(axis=1) != reference.argmax(axis=1)).sum())
+        failed |= mismatched > 0 or max_diff > 1e-9
+
+        sklearn_row_ms = time_per_call(model.predict_proba, rows)
+        compiled_row_ms = time_per_call(scorer, rows)
+        sklearn_batch_ms = time_per_call(model.predict_proba, [X]) / len(X)
+        compiled_batch_ms = time_per_call(scorer, [X]) / len(X)
+        endpoint_ms = time_per_call(lambda record: detector.predict(record, variant), records[:len(rows)])
+        print(f"{variant:8s} single row: sklearn {sklearn_row_ms:7.3f} ms  served {compiled_row_ms:6.3f} ms"
+              f"  (predict incl. pipeline {endpoint_ms:6.3f} ms)")
+        print(f"{'':8s} batch:      sklearn {sklearn_batch_ms:7.4f} ms/row  served  {compiled_batch_ms:.4f} ms/row"
+              f"  max |dp| {max_diff:.1e}  labels differing {mismatched}")
+
+    if search:
+        compare_search(trials)
+    if failed:
+        raise SystemExit("❌ Served scorers do not match the sklearn models")
+    print("✅ Outputs identical")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=200, help="rows timed one at a time")
+    parser.add_argument("--search", action="store_true", help="also time serial vs parallel hyperparameter search")
+    parser.add_argument("--trials", type=int, default=20)
+    args = parser.parse_args()
+    main(args.rows, args.search, args.trials)
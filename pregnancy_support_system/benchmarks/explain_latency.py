@@ -0,0 +1,54 @@
+"""Latency of label-only vs probability vs explained risk scoring, per batch size.
+
+Run from pregnancy_support_system/:  python -m benchmarks.explain_latency
+"""
+import time
+
+import numpy as np
+import pandas as pd
+
+from ml_model import RiskPredictor
+
+BATCH_SIZES = (1, 8, 32, 128)
+REPEATS = 20
+
+
+def time_batch(fn, batch):
+    timings = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        fn(batch)
+        timings.append((time.perf_counter() - start) * 1000)
+    return np.median(timings)
+
+
+def main(csv_path="Pregnancy_Risk_Prediction_Dataset.csv"):
+    records = pd.read_csv(csv_path).drop(columns=["RiskLevel"]).to_dict("records")
+    predictor = RiskPredictor()
+    predictor.load()
+
+    modes = {
+        "label only": predictor.predict_batch,
+        "probabilities": predictor.score_batch,
+        "explain (approx)": lambda batch: predictor.score_batch(batch, explain=True, approximate=True),
+        "explain (TreeSHAP)": lambda batch: predictor.score_batch(batch, explain=True),
+    }
+
+    labels = predictor.predict_batch(records)
+    scored = predictor.score_batch(records)
+    if labels != [result["riskLevel"] for result in scored]:
+        raise SystemExit("❌ score_batch labels differ from predict_batch")
+    print(f"✅ score_batch labels match predict_batch on all {len(records)} rows")
+
+    print(f"{'mode':20s}" + "".join(f"{f'batch {n}':>18s}" for n in BATCH_SIZES))
+    for name, fn in modes.items():
+        cells = []
+        for n in BATCH_SIZES:
+            ms = time_batch(fn, records[:n])
+            cells.append(f"{ms:7.2f} ms ({ms / n:5.2f})")
+        print(f"{name:20s}" + "".join(f"{cell:>18s}" for cell in cells))
+    print("(median per batch; per-row ms in parentheses)")
+
+
+if __name__ == "__main__":
+    main()
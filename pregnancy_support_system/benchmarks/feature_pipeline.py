@@ -0,0 +1,109 @@
+"""Equivalence and throughput of FeaturePipeline against the sklearn/pandas preprocessing it replaces.
+
+For the served risk artifacts and for the pregnancy-detection features, every
+FeaturePipeline path (single-row, record batch, frame, JSON round trip) must
+reproduce sklearn's scaled matrix exactly (as float32). Schema validation must
+reject mismatched inputs and models at construction/load time.
+
+Run from pregnancy_support_system/:  python -m benchmarks.feature_pipeline
+"""
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.model_selection import train_test_split
+from sklearn.preprocessing import MinMaxScaler
+
+from feature_pipeline import FeaturePipeline, FeatureSchemaError
+from ml_model import RiskPredictor
+
+
+def sklearn_reference(scaler, onehot_encoder, categorical_cols, frame):
+    """The pre-pipeline pandas/sklearn preprocessing, vectorized over a frame."""
+    frame = frame.copy()
+    if categorical_cols:
+        encoded = pd.DataFrame(onehot_encoder.transform(frame[categorical_cols]),
+                               columns=onehot_encoder.get_feature_names_out(categorical_cols), index=frame.index)
+        frame = pd.concat([frame.drop(columns=categorical_cols), encoded], axis=1)
+    for col in scaler.feature_names_in_:
+        if col not in frame.columns:
+            frame[col] = 0
+    return scaler.transform(frame[scaler.feature_names_in_]).astype(np.float32)
+
+
+def rate(fn, rows):
+    start = time.perf_counter()
+    fn()
+    return rows / (time.perf_counter() - start)
+
+
+def check_pipeline(name, pipeline, reference, frame, reference_one, reference_batch):
+    records = frame.to_dict("records")
+    restored = FeaturePipeline.from_dict(pipeline.to_dict())
+    checks = {
+        "transform_one": np.vstack([pipeline.transform_one(record) for record in records]),
+        "transform_batch": pipeline.transform_batch(records),
+        "transform_frame": pipeline.transform_frame(frame),
+        "JSON round trip": restored.transform_batch(records),
+    }
+    failed = [label for label, X in checks.items() if not np.array_equal(X, reference)]
+    print(f"{name}: {len(records)} rows, {len(pipeline.feature_names)} features")
+    for label in checks:
+        print(f"  {label:16s} {'identical' if label not in failed else 'DIFFERS'}")
+
+    sample = records[:2000]
+    one_frames = [pd.DataFrame([record]) for record in sample]
+    print(f"  single row: sklearn/pandas {rate(lambda: [reference_one(f) for f in one_frames], len(sample)):9.0f} rows/s"
+          f"   pipeline {rate(lambda: [pipeline.transform_one(r) for r in sample], len(sample)):9.0f} rows/s")
+    print(f"  batch:      sklearn/pandas {rate(lambda: reference_batch(frame), len(frame)):9.0f} rows/s"
+          f"   transform_batch {rate(lambda: pipeline.transform_batch(records), len(records)):9.0f} rows/s"
+          f"   transform_frame {rate(lambda: pipeline.transform_frame(frame), len(frame)):9.0f} rows/s")
+    return failed
+
+
+def expect_schema_error(label, fn):
+    try:
+        fn()
+    except FeatureSchemaError as e:
+        print(f"  rejected {label}: {e}")
+        return []
+    return [label]
+
+
+def main():
+    failed = []
+
+    predictor = RiskPredictor()
+    predictor.load()
+    artifacts = predictor._get_artifacts()
+    risk_frame = pd.read_csv("Pregnancy_Risk_Prediction_Dataset.csv").drop(columns=["RiskLevel"])
+    risk_args = (artifacts["scaler"], artifacts["onehot_encoder"], artifacts["categorical_cols"])
+    failed += check_pipeline(
+        "Risk model", artifacts["plan"], sklearn_reference(*risk_args, risk_frame), risk_frame,
+        lambda f: sklearn_reference(*risk_args, f), lambda f: sklearn_reference(*risk_args, f),
+    )
+
+    detection = pd.read_csv("Pregnancy_Smartwatch_Dataset - Copy.csv")
+    X = detection.drop(columns=["Pregnancy_Status"])
+    X_train, _, _, _ = train_test_split(X, detection["Pregnancy_Status"], test_size=0.2, random_state=42)
+    scaler = MinMaxScaler().fit(X_train)
+    pipeline = FeaturePipeline.fit(X_train)
+    failed += check_pipeline(
+        "Pregnancy detection", pipeline, scaler.transform(X).astype(np.float32), X,
+        lambda f: scaler.transform(f).astype(np.float32), lambda f: scaler.transform(f).astype(np.float32),
+    )
+
+    print("Schema validation:")
+    failed += expect_schema_error("inputs without BS", lambda: artifacts["plan"].check_inputs(
+        [name for name in artifacts["plan"].input_columns if name != "BS"]))
+    failed += expect_schema_error("risk model with detection pipeline", lambda: pipeline.check_model(artifacts["model"]))
+    broken = dict(pipeline.to_dict(), scale=pipeline.scale[:-1].tolist())
+    failed += expect_schema_error("truncated scaler arrays", lambda: FeaturePipeline.from_dict(broken))
+
+    if failed:
+        raise SystemExit(f"❌ Failed: {', '.join(failed)}")
+    print("✅ All pipeline paths match sklearn and schema errors are caught up front")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Check the NumPy-only lean evaluator against RiskPredictor and compare their cost.
+
+Exports the served model, then reports import time and peak RSS of each path
+(measured in fresh interpreters) and per-row / batch latency.
+
+Run from pregnancy_support_system/:  python -m benchmarks.lean_inference
+"""
+import json
+import subprocess
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+from lean_risk_model import LeanRiskModel
+from ml_model import RiskPredictor, export_lean_model
+
+LOAD_SCRIPTS = {
+    "RiskPredictor": "from ml_model import RiskPredictor\nmodel = RiskPredictor()\nmodel.load()\n",
+    "LeanRiskModel": "from lean_risk_model import LeanRiskModel\nmodel = LeanRiskModel({model_dir!r})\n",
+}
+MEASURE = """
+import json, time
+start = time.perf_counter()
+{body}
+elapsed = time.perf_counter() - start
+modules = [name for name in ("pandas", "sklearn", "xgboost") if name in __import__("sys").modules]
+# VmHWM rather than ru_maxrss, which Linux carries over from the parent across fork/exec.
+peak_kb = next(int(line.split()[1]) for line in open("/proc/self/status") if line.startswith("VmHWM"))
+print(json.dumps({{"seconds": elapsed, "max_rss_mb": peak_kb / 1024, "heavy_modules": modules}}))
+"""
+
+
+def measure_load(body):
+    output = subprocess.run([sys.executable, "-W", "ignore", "-c", MEASURE.format(body=body)],
+                            capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def time_per_row(fn, records):
+    start = time.perf_counter()
+    results = [fn(record) for record in records]
+    return results, (time.perf_counter() - start) / len(records) * 1000
+
+
+def main(csv_path="Pregnancy_Risk_Prediction_Dataset.csv"):
+    records = pd.read_csv(csv_path).drop(columns=["RiskLevel"]).to_dict("records")
+    predictor = RiskPredictor()
+    predictor.load()
+
+    with tempfile.TemporaryDirectory() as model_dir:
+        export_lean_model(model_dir, predictor)
+        lean = LeanRiskModel(model_dir)
+        loads = {name: measure_load(script.format(model_dir=model_dir)) for name, script in LOAD_SCRIPTS.items()}
+
+    reference_labels = predictor.predict_batch(records)
+    mismatched_batch = sum(a != b for a, b in zip(reference_labels, lean.predict_batch(records)))
+    lean_labels, lean_ms = time_per_row(lean.predict, records)
+    _, predictor_ms = time_per_row(predictor.predict, records)
+    mismatched_rows = sum(a != b for a, b in zip(reference_labels, lean_labels))
+
+    start = time.perf_counter()
+    predictor.predict_batch(records)
+    predictor_batch_ms = (time.perf_counter() - start) / len(records) * 1000
+    start = time.perf_counter()
+    lean.predict_batch(records)
+    lean_batch_ms = (time.perf_counter() - start) / len(records) * 1000
+
+    print(f"Rows: {len(records)}  trees: {lean.left.shape[0]}  max depth: {lean.depth}")
+    for name, load in loads.items():
+        print(f"{name:14s} import+load {load['seconds'] * 1000:7.1f} ms  peak RSS {load['max_rss_mb']:6.1f} MB"
+              f"  heavy modules: {', '.join(load['heavy_modules']) or 'none'}")
+    print(f"Single row: RiskPredictor {predictor_ms:.3f} ms  LeanRiskModel {lean_ms:.3f} ms")
+    print(f"Batch:      RiskPredictor {predictor_batch_ms:.4f} ms/row  LeanRiskModel {lean_batch_ms:.4f} ms/row")
+    print(f"Labels differing: batch {mismatched_batch}, single-row {mismatched_rows}")
+    if mismatched_batch or mismatched_rows:
+        raise SystemExit("❌ Lean evaluator does not match RiskPredictor")
+    print("✅ Outputs identical")
+
+
+if __name__ == "__main__":
+    main()
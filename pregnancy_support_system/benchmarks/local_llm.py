@@ -0,0 +1,95 @@
+"""First-token latency, tokens per second and peak RSS of local generation on CPU.
+
+Compares the previous full-precision BlenderBot text-generation pipeline (which
+returns only when generation finishes) with LocalLLM streaming of --model,
+unquantized and int8 dynamically quantized. Each variant runs in a fresh
+interpreter so its peak RSS is its own. Needs torch and transformers.
+
+Run from pregnancy_support_system/:  python -m benchmarks.local_llm [--model NAME] [--max-new-tokens 128]
+"""
+import argparse
+import json
+import subprocess
+import sys
+
+PREVIOUS_MODEL = "facebook/blenderbot-400M-distill"
+MESSAGES = [
+    {"role": "system", "content": "You are an expert pregnancy support assistant. Always base your answers on the given context."},
+    {"role": "user", "content": "Generate a nutrition plan for a pregnant woman with high risk. Medical conditions: "
+                                "mild hypertension, iron deficiency. Focus on vitamins, minerals and meal plans."},
+]
+
+PIPELINE = """
+import torch
+from transformers import pipeline, AutoTokenizer
+start = time.perf_counter()
+tokenizer = AutoTokenizer.from_pretrained(MODEL)
+llm_pipeline = pipeline("text-generation", model=MODEL, tokenizer=tokenizer, max_length=1024,
+                        max_new_tokens=MAX_NEW_TOKENS, truncation=True, device=-1)
+load_seconds = time.perf_counter() - start
+prompt = "\\n".join(f"{m['role'].capitalize()}: {m['content']}" for m in MESSAGES) + "\\nAssistant:"
+start = time.perf_counter()
+text = llm_pipeline(prompt)[0]["generated_text"][len(prompt):]
+total = time.perf_counter() - start
+first = total  # nothing is returned before generation finishes
+"""
+
+STREAM = """
+from local_llm import LocalLLM
+start = time.perf_counter()
+llm = LocalLLM(MODEL, quantize=QUANTIZE, max_new_tokens=MAX_NEW_TOKENS)
+load_seconds = time.perf_counter() - start
+tokenizer = llm.tokenizer
+prompt = llm.format_prompt(MESSAGES)
+start = time.perf_counter()
+first, pieces = None, []
+for piece in llm.stream(prompt):
+    first = first or time.perf_counter() - start
+    pieces.append(piece)
+total = time.perf_counter() - start
+text = "".join(pieces)
+"""
+
+MEASURE = """
+import json, time
+MODEL, QUANTIZE, MAX_NEW_TOKENS, MESSAGES = {model!r}, {quantize!r}, {max_new_tokens!r}, {messages!r}
+{body}
+tokens = len(tokenizer(text, add_special_tokens=False)["input_ids"])
+peak_kb = next(int(line.split()[1]) for line in open("/proc/self/status") if line.startswith("VmHWM"))
+print(json.dumps({{"load_seconds": load_seconds, "first_token_ms": first * 1000, "total_seconds": total,
+                  "tokens": tokens, "tokens_per_second": tokens / total, "max_rss_mb": peak_kb / 1024}}))
+"""
+
+VARIANTS = {
+    "pipeline fp32 (previous)": (PIPELINE, None),
+    "stream fp32": (STREAM, "none"),
+    "stream int8": (STREAM, "int8"),
+}
+
+
+def run_variant(body, quantize, model, max_new_tokens):
+    model = PREVIOUS_MODEL if body is PIPELINE else model
+    script = MEASURE.format(model=model, quantize=quantize, max_new_tokens=max_new_tokens, messages=MESSAGES,
+                            body=body)
+    output = subprocess.run([sys.executable, "-W", "ignore", "-c", script], capture_output=True, text=True,
+                            check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main(model, max_new_tokens):
+    print(f"Model: {model} (previous pipeline: {PREVIOUS_MODEL})  max_new_tokens: {max_new_tokens}")
+    for name, (body, quantize) in VARIANTS.items():
+        result = run_variant(body, quantize, model, max_new_tokens)
+        print(f"{name:26s} load {result['load_seconds']:5.1f} s  first token {result['first_token_ms']:8.0f} ms"
+              f"  {result['tokens_per_second']:6.1f} tokens/s ({result['tokens']} tokens)"
+              f"  peak RSS {result['max_rss_mb']:7.0f} MB")
+
+
+if __name__ == "__main__":
+    from local_llm import DEFAULT_LOCAL_MODEL
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model", default=DEFAULT_LOCAL_MODEL)
+    parser.add_argument("--max-new-tokens", type=int, default=128)
+    args = parser.parse_args()
+    main(args.model, args.max_new_tokens)
@@ -0,0 +1,64 @@
+"""OCR pages per second versus worker count on scanned copies of sample_doctor_report.pdf.
+
+Builds an image-only PDF (no text layer) from the synthetic text reports used by
+pdf_event_loop, then extracts it with PdfExtractor pools of increasing size. Each
+pool extracts the scan twice; the second pass is served from the page-image cache.
+Needs Tesseract (set TESSERACT_CMD if it is not on PATH).
+
+Run from pregnancy_support_system/:  python -m benchmarks.ocr_throughput [--pages 16] [--workers 1 2 4]
+"""
+import argparse
+import asyncio
+import time
+
+import fitz
+
+from benchmarks.pdf_event_loop import synthetic_report
+from pdf_extraction import PdfExtractor, load_pdf_extraction_config
+
+
+def scanned_report(pages, dpi=150):
+    """The synthetic report with every page replaced by a picture of itself."""
+    with fitz.open(stream=synthetic_report(pages), filetype="pdf") as source:
+        scan = fitz.open()
+        for page in source:
+            pixmap = page.get_pixmap(dpi=dpi, colorspace=fitz.csGRAY)
+            scan.new_page(width=page.rect.width, height=page.rect.height).insert_image(page.rect, pixmap=pixmap)
+        data = scan.tobytes()
+        scan.close()
+    return data
+
+
+async def measure(workers, pdf_bytes, pages):
+    config = load_pdf_extraction_config()
+    extractor = PdfExtractor(max_workers=workers, max_pages=pages, timeout=3600, pages_per_task=1,
+                             ocr_dpi=config["ocr_dpi"], ocr_lang=config["ocr_lang"],
+                             tesseract_cmd=config["tesseract_cmd"])
+    await extractor.extract_text(synthetic_report(workers))  # spawn and import in every worker first
+    try:
+        start = time.perf_counter()
+        text = await extractor.extract_text(pdf_bytes)
+        cold = time.perf_counter() - start
+        start = time.perf_counter()
+        await extractor.extract_text(pdf_bytes)
+        warm = time.perf_counter() - start
+    finally:
+        extractor.shutdown()
+    return cold, warm, len(text), extractor.stats()
+
+
+def main(pages=16, workers=(1, 2, 4)):
+    pdf_bytes = scanned_report(pages)
+    print(f"Scanned report: {pages} pages, {len(pdf_bytes) / 1e6:.1f} MB, no text layer")
+    for n in workers:
+        cold, warm, chars, stats = asyncio.run(measure(n, pdf_bytes, pages))
+        print(f"workers={n}: OCR {pages / cold:6.2f} pages/s ({cold:6.2f} s)  cached re-upload {warm * 1000:7.1f} ms"
+              f"  chars {chars}  ocr pages {stats['ocr_pages']}  failures {stats['ocr_failures']}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, default=16)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    args = parser.parse_args()
+    main(args.pages, args.workers)
@@ -0,0 +1,83 @@
+"""Event-loop latency while PDF reports are extracted concurrently.
+
+Compares the old inline pdfplumber call inside the async handler with the
+PdfExtractor process pool, on sample_doctor_report.pdf and synthetic reports
+of increasing length.  A ticker coroutine sleeps 5 ms in a loop; how late it
+wakes up is the latency every other request would see.
+
+Run from pregnancy_support_system/:  python -m benchmarks.pdf_event_loop
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import fitz
+
+from pdf_extraction import PdfExtractor, extract_pdf_text_sync
+
+SAMPLE_REPORT = "sample_doctor_report.pdf"
+
+
+def synthetic_report(pages):
+    """A text-layer PDF built by repeating the sample report's text over `pages` pages."""
+    with fitz.open(SAMPLE_REPORT) as sample:
+        text = "".join(page.get_text("text") for page in sample)
+    doc = fitz.open()
+    for n in range(pages):
+        page = doc.new_page()
+        page.insert_textbox(fitz.Rect(50, 50, 550, 800), f"Page {n + 1}\n{text}", fontsize=9)
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+async def ticker(lags, stop, interval=0.005):
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        lags.append(time.perf_counter() - start - interval)
+
+
+async def measure(extract, pdf_bytes, uploads):
+    lags, stop = [], asyncio.Event()
+    tick = asyncio.create_task(ticker(lags, stop))
+    start = time.perf_counter()
+    await asyncio.gather(*[extract(pdf_bytes) for _ in range(uploads)])
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await tick
+    lags = lags or [0.0]
+    return elapsed, statistics.median(lags) * 1000, max(lags) * 1000
+
+
+async def inline_extract(pdf_bytes):
+    return extract_pdf_text_sync(pdf_bytes)
+
+
+async def main(uploads, workers):
+    extractor = PdfExtractor(max_workers=workers, max_pages=200, timeout=120)
+    extractor.start()
+    await extractor.extract_text(synthetic_report(1))  # let the workers finish spawning
+
+    with open(SAMPLE_REPORT, "rb") as f:
+        documents = {"sample_doctor_report.pdf": f.read()}
+    for pages in (10, 40):
+        documents[f"synthetic {pages} pages"] = synthetic_report(pages)
+
+    print(f"{uploads} concurrent uploads, {workers} workers")
+    print(f"{'document':<26}{'mode':<8}{'wall s':>8}{'p50 lag ms':>12}{'max lag ms':>12}")
+    for name, pdf_bytes in documents.items():
+        assert extract_pdf_text_sync(pdf_bytes) == await extractor.extract_text(pdf_bytes)
+        for mode, extract in (("inline", inline_extract), ("pool", extractor.extract_text)):
+            elapsed, p50, worst = await measure(extract, pdf_bytes, uploads)
+            print(f"{name:<26}{mode:<8}{elapsed:>8.2f}{p50:>12.1f}{worst:>12.1f}")
+    extractor.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--uploads", type=int, default=8)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+    asyncio.run(main(args.uploads, args.workers))
@@ -0,0 +1,97 @@
+"""Throughput and accuracy of the rule-based vitals extractor on generated report variants.
+
+Each variant is a one-page report in the style of sample_docreport.py with random
+vitals written under different labels, units and orders, padded with the sample's
+notes. Reports per second, microseconds per page, and per-field recall / exact
+value accuracy against the generated ground truth.
+
+Run from pregnancy_support_system/:  python -m benchmarks.report_vitals [--reports 2000]
+"""
+import argparse
+import random
+import time
+
+from report_vitals import MG_DL_PER_MMOL_L, extract_vitals
+
+NOTES = """Doctor's Notes:
+- Monitor blood pressure regularly.
+- Increase iron intake (spinach, lentils, red meat).
+- Follow a healthy pregnancy diet with prenatal vitamins.
+- Maintain hydration and avoid excessive salt intake.
+
+Recommended Nutrition Plan:
+- High-iron foods: Leafy greens, lentils, red meat, fortified cereals.
+- Omega-3 fatty acids: Fish, flaxseeds, walnuts.
+- Calcium-rich foods: Dairy products, tofu, almonds.
+- Protein sources: Eggs, beans, lean meats.
+
+Next Check-up: In 2 weeks
+"""
+
+
+def vitals_lines(rng, truth):
+    age, sbp = rng.randint(18, 45), rng.randint(95, 165)
+    dbp = rng.randint(55, min(100, sbp - 20))
+    bs_mmol, hr = round(rng.uniform(4.0, 12.0), 1), rng.randint(55, 120)
+    temp_f, spo2, rr = round(rng.uniform(97.0, 101.5), 1), rng.randint(92, 100), rng.randint(12, 24)
+    truth.update(Age=age, SystolicBP=sbp, DiastolicBP=dbp, BS=bs_mmol, HeartRate=hr, BodyTemp=temp_f,
+                 SpO2=spo2, Resp_Rate=rr)
+    bs_mg = round(bs_mmol * MG_DL_PER_MMOL_L)
+    temp_c = round((temp_f - 32) * 5 / 9, 1)
+    truth["_approx"] = {"BS": (bs_mg / MG_DL_PER_MMOL_L, 0.05), "BodyTemp": (temp_c * 9 / 5 + 32, 0.1)}
+    return [
+        rng.choice([f"Age: {age}", f"{age}-year-old patient", f"Patient is a {age} y/o female"]),
+        rng.choice([f"Blood Pressure: {sbp}/{dbp} mmHg", f"BP {sbp}/{dbp}", f"B.P.: {sbp} / {dbp} mm Hg"]),
+        rng.choice([f"Blood Sugar: {bs_mg} mg/dL", f"Fasting blood glucose: {bs_mmol} mmol/L", f"FBS {bs_mg} mg/dl"]),
+        rng.choice([f"Heart Rate: {hr} bpm", f"Pulse {hr}", f"HR: {hr} beats/min"]),
+        rng.choice([f"Temperature: {temp_f} °F", f"Temp {temp_c} C", f"Body temperature {temp_f}F"]),
+        rng.choice([f"SpO2: {spo2}%", f"Oxygen saturation {spo2} %", f"O2 sat {spo2}"]),
+        rng.choice([f"Respiratory Rate: {rr} breaths/min", f"RR {rr}/min", f"Resp rate {rr}"]),
+    ]
+
+
+def make_report(rng):
+    truth = {}
+    lines = vitals_lines(rng, truth)
+    rng.shuffle(lines)
+    header = ["Doctor's Report - Pregnancy Assessment", f"Patient Name: Patient {rng.randint(1, 9999)}",
+              f"Gestational age: {rng.randint(8, 38)} weeks"]
+    return "\n".join(header + lines + ["Diagnosed Conditions: Mild Hypertension, Iron Deficiency", "", NOTES]), truth
+
+
+def correct(field, value, truth):
+    approx = truth["_approx"].get(field)
+    if approx is not None and value != truth[field]:
+        expected, tolerance = approx
+        return abs(value - expected) <= tolerance
+    return value == truth[field]
+
+
+def main(n_reports=2000, seed=0):
+    rng = random.Random(seed)
+    corpus = [make_report(rng) for _ in range(n_reports)]
+    extract_vitals(corpus[0][0])
+
+    start = time.perf_counter()
+    results = [extract_vitals(text) for text, _ in corpus]
+    elapsed = time.perf_counter() - start
+
+    fields = [field for field in corpus[0][1] if not field.startswith("_")]
+    chars = sum(len(text) for text, _ in corpus) / n_reports
+    print(f"Reports: {n_reports}  avg {chars:.0f} chars")
+    print(f"Extraction: {elapsed / n_reports * 1e6:.1f} us/page  {n_reports / elapsed:,.0f} pages/s")
+    for field in fields:
+        found = [result[field] for result in results if field in result]
+        right = sum(correct(field, result[field]["value"], truth)
+                    for result, (_, truth) in zip(results, corpus) if field in result)
+        confidence = sum(item["confidence"] for item in found) / len(found) if found else 0.0
+        print(f"  {field:11s} recall {len(found) / n_reports:6.1%}  correct {right / max(len(found), 1):6.1%}"
+              f"  avg confidence {confidence:.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--reports", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    main(args.reports, args.seed)
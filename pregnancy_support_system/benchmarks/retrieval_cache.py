@@ -0,0 +1,62 @@
+"""Cost of research retrieval one query at a time, batched, and from the query cache.
+
+Loads (or builds) the real FAISS index and embedding model, then retrieves
+--queries distinct doctor-note style queries three ways: one search per query,
+one batched search for all, and again through the warm cache. Also shows how
+long the grounded prompt gets under the token budget.
+
+Run from pregnancy_support_system/:  python -m benchmarks.retrieval_cache [--queries 64]
+"""
+import argparse
+import time
+
+from components import LazyComponent
+from research_index import load_or_build_vectorstore, make_embeddings
+from research_retrieval import ResearchRetriever, build_context, estimate_tokens
+
+CONDITIONS = ["gestational diabetes", "anemia", "preeclampsia", "hypertension", "low weight gain",
+              "nausea and vomiting", "iron deficiency", "vitamin D deficiency"]
+
+
+def make_queries(n):
+    return [f"{('High', 'Mid', 'Low')[i % 3]} risk pregnancy nutrition. Patient {i} with "
+            f"{CONDITIONS[i % len(CONDITIONS)]}, week {12 + i % 28}." for i in range(n)]
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, (time.perf_counter() - start) * 1000
+
+
+def main(n_queries=64, top_k=4, budget=1500):
+    embeddings = make_embeddings()
+    vectorstore = LazyComponent("vectorstore", lambda: load_or_build_vectorstore(embeddings))
+    vectorstore.wait()
+    queries = make_queries(n_queries)
+
+    retriever = ResearchRetriever(vectorstore, top_k=top_k)
+    retriever.search_batch(queries[:1])  # warm up the embedding model
+    _, single_ms = timed(lambda: [retriever.search_batch([query]) for query in queries])
+    _, batched_ms = timed(lambda: retriever.search_batch(queries))
+
+    retriever = ResearchRetriever(vectorstore, top_k=top_k)
+    results, cold_ms = timed(lambda: retriever.retrieve_batch(queries))
+    _, cached_ms = timed(lambda: retriever.retrieve_batch([query.upper() + "!" for query in queries]))
+
+    context, used = build_context(results[0], budget)
+    print(f"Queries: {n_queries}  top_k: {top_k}")
+    print(f"One search per query: {single_ms / n_queries:8.3f} ms/query")
+    print(f"Batched search:       {batched_ms / n_queries:8.3f} ms/query")
+    print(f"Cache (cold / warm):  {cold_ms / n_queries:8.3f} / {cached_ms / n_queries:.4f} ms/query"
+          f"  hits {retriever.hits}  misses {retriever.misses}")
+    print(f"Context under a {budget}-token budget: {used} chunks, ~{estimate_tokens(context)} tokens")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--queries", type=int, default=64)
+    parser.add_argument("--top-k", type=int, default=4)
+    parser.add_argument("--budget", type=int, default=1500, help="context token budget")
+    args = parser.parse_args()
+    main(args.queries, args.top_k, args.budget)
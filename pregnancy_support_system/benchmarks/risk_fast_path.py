@@ -0,0 +1,74 @@
+"""Compare the compiled single-row risk path against the original pandas path.
+
+Run from pregnancy_support_system/:  python -m benchmarks.risk_fast_path
+"""
+import time
+
+import numpy as np
+import pandas as pd
+
+from ml_model import RiskPredictor
+
+
+def pandas_predict(artifacts, input_data):
+    """The pre-FeaturePipeline preprocessing, kept verbatim (minus prints) as the reference."""
+    onehot_encoder = artifacts["onehot_encoder"]
+    scaler = artifacts["scaler"]
+    original_categorical_cols = artifacts["categorical_cols"]
+
+    input_df = pd.DataFrame([input_data])
+
+    missing_categorical_cols = set(original_categorical_cols) - set(input_df.columns)
+    for col in missing_categorical_cols:
+        input_df[col] = ""
+
+    if original_categorical_cols:
+        input_encoded = onehot_encoder.transform(input_df[original_categorical_cols])
+        input_encoded_df = pd.DataFrame(input_encoded, columns=onehot_encoder.get_feature_names_out(original_categorical_cols))
+        input_df = pd.concat([input_df.drop(columns=original_categorical_cols), input_encoded_df], axis=1)
+
+    for col in scaler.feature_names_in_:
+        if col not in input_df.columns:
+            input_df[col] = 0
+    input_df = input_df[scaler.feature_names_in_]
+
+    input_scaled = scaler.transform(input_df)
+    prediction = artifacts["model"].predict(input_scaled)
+    return artifacts["label_encoder"].inverse_transform(prediction)[0]
+
+
+def time_per_row(fn, records):
+    start = time.perf_counter()
+    results = [fn(record) for record in records]
+    return results, (time.perf_counter() - start) / len(records) * 1000
+
+
+def main(csv_path="Pregnancy_Risk_Prediction_Dataset.csv"):
+    records = pd.read_csv(csv_path).drop(columns=["RiskLevel"]).to_dict("records")
+    predictor = RiskPredictor()
+    predictor.load()
+    artifacts = predictor._get_artifacts()
+    plan = artifacts["plan"]
+
+    mismatched_vectors = 0
+    for record in records:
+        reference = artifacts["scaler"].transform(pd.DataFrame([record])[plan.feature_names]).astype(np.float32)
+        if not np.array_equal(reference, plan.transform_one(record)):
+            mismatched_vectors += 1
+
+    reference_labels, pandas_ms = time_per_row(lambda r: pandas_predict(artifacts, r), records)
+    fast_labels, fast_ms = time_per_row(predictor.predict, records)
+    mismatched_labels = sum(a != b for a, b in zip(reference_labels, fast_labels))
+
+    print(f"Rows: {len(records)}")
+    print(f"Pandas path:   {pandas_ms:.3f} ms/row")
+    print(f"Compiled path: {fast_ms:.3f} ms/row ({pandas_ms / fast_ms:.1f}x)")
+    print(f"Feature vectors differing: {mismatched_vectors}")
+    print(f"Labels differing: {mismatched_labels}")
+    if mismatched_vectors or mismatched_labels:
+        raise SystemExit("❌ Compiled path does not match the pandas path")
+    print("✅ Outputs identical")
+
+
+if __name__ == "__main__":
+    main()
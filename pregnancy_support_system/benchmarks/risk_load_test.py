@@ -0,0 +1,145 @@
+"""Load-test /predict-risk with and without micro-batching as client concurrency grows.
+
+First drives MicroBatcher directly from concurrent coroutines, then starts the API under uvicorn once per mode (RISK_MICRO_BATCHING=1/0), fires a
+fixed number of single-record requests at each concurrency level, and reports
+throughput, client latency and the server's batch-size/queueing-delay stats.
+
+Run from pregnancy_support_system/:  python -m benchmarks.risk_load_test [--url http://host:port]
+"""
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import time
+
+import httpx
+import numpy as np
+import pandas as pd
+
+from ml_model import RiskPredictor
+from risk_batching import MicroBatcher
+
+CONCURRENCY = (1, 8, 32, 128)
+
+
+async def wait_until_up(url, timeout=120):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(base_url=url) as client:
+        while time.monotonic() < deadline:
+            try:
+                if (await client.get("/predict-risk/stats")).json()["load_count"]:
+                    return
+            except (httpx.TransportError, KeyError, ValueError):
+                pass
+            await asyncio.sleep(0.5)
+    raise RuntimeError(f"API at {url} did not come up")
+
+
+async def run_level(url, records, concurrency, requests):
+    latencies = []
+    next_index = iter(range(requests))
+
+    async def worker(client):
+        for i in next_index:
+            start = time.perf_counter()
+            response = await client.post("/predict-risk", json=records[i % len(records)])
+            response.raise_for_status()
+            latencies.append(time.perf_counter() - start)
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=60) as client:
+        before = (await client.get("/predict-risk/stats")).json()["micro_batching"]
+        start = time.perf_counter()
+        await asyncio.gather(*[worker(client) for _ in range(concurrency)])
+        elapsed = time.perf_counter() - start
+        after = (await client.get("/predict-risk/stats")).json()["micro_batching"]
+
+    latencies = np.array(latencies) * 1000
+    batches = after["batches"] - before["batches"]
+    return {
+        "throughput": requests / elapsed,
+        "p50_ms": np.percentile(latencies, 50),
+        "p99_ms": np.percentile(latencies, 99),
+        "avg_batch": (after["requests"] - before["requests"]) / batches if batches else None,
+        "queue_p95_ms": (after["queue_delay_ms"] or {}).get("p95"),
+    }
+
+
+async def load_test(url, records, requests):
+    await wait_until_up(url)
+    await run_level(url, records, 8, 200)  # warm-up
+    for concurrency in CONCURRENCY:
+        result = await run_level(url, records, concurrency, requests)
+        avg_batch = f"{result['avg_batch']:.1f}" if result["avg_batch"] else "-"
+        queue = f"{result['queue_p95_ms']:.2f}" if result["queue_p95_ms"] is not None else "-"
+        print(f"  concurrency {concurrency:>4}: {result['throughput']:8.0f} req/s  p50 {result['p50_ms']:7.2f} ms"
+              f"  p99 {result['p99_ms']:7.2f} ms  avg batch {avg_batch:>5}  queue p95 {queue} ms")
+
+
+async def in_process(records, requests):
+    """The scheduler alone: concurrent coroutines awaiting a score, without HTTP parsing in the way."""
+    predictor = RiskPredictor()
+    predictor.load()
+    for batching in (False, True):
+        print(f"In-process, micro-batching {'on' if batching else 'off'}:")
+        for concurrency in CONCURRENCY:
+            batcher = MicroBatcher(predictor, enabled=batching)
+            latencies = []
+            next_index = iter(range(requests))
+
+            async def worker():
+                for i in next_index:
+                    start = time.perf_counter()
+                    await asyncio.sleep(0)  # waiting for the loop is part of the latency a request sees
+                    await batcher.score(records[i % len(records)])
+                    latencies.append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            await asyncio.gather(*[worker() for _ in range(concurrency)])
+            elapsed = time.perf_counter() - start
+            await batcher.stop()
+            stats = batcher.stats()
+            latencies = np.array(latencies) * 1000
+            avg_batch = f"{stats['avg_batch_size']:.1f}" if stats["avg_batch_size"] else "-"
+            print(f"  concurrency {concurrency:>4}: {requests / elapsed:8.0f} req/s  p50 {np.percentile(latencies, 50):7.2f} ms"
+                  f"  p99 {np.percentile(latencies, 99):7.2f} ms  avg batch {avg_batch:>5}")
+
+
+def start_server(port, batching):
+    env = {**os.environ, "RISK_MICRO_BATCHING": "1" if batching else "0", "PDF_WORKERS": "1"}
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "api_service:app", "--port", str(port), "--log-level", "warning"],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", help="test an already running API instead of starting one per mode")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--skip-http", action="store_true", help="only run the in-process scheduler comparison")
+    args = parser.parse_args()
+
+    records = pd.read_csv("Pregnancy_Risk_Prediction_Dataset.csv").drop(columns=["RiskLevel"]).head(1000)
+    records = records.to_dict("records")
+    asyncio.run(in_process(records, args.requests))
+    if args.skip_http:
+        return
+
+    if args.url:
+        asyncio.run(load_test(args.url, records, args.requests))
+        return
+    for batching in (False, True):
+        print(f"Micro-batching {'on' if batching else 'off'}:")
+        server = start_server(args.port, batching)
+        try:
+            asyncio.run(load_test(f"http://127.0.0.1:{args.port}", records, args.requests))
+        finally:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Local stand-in for the OpenRouter chat-completions API.
+
+Answers every request after a fixed delay, so API tests and load tests never
+leave the machine.  Run standalone with:
+
+    python -m benchmarks.stub_completion_server --port 8901 --delay 0.5
+
+or start it in-process with StubCompletionServer(...).start().
+"""
+import argparse
+import asyncio
+import threading
+import time
+
+import json
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+
+
+def create_stub_app(delay=0.5, reply="Stub nutrition plan: leafy greens, lentils, prenatal vitamins.", token_delay=0.01):
+    app = FastAPI(title="Stub completion API")
+    app.state.calls = []
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        started = time.perf_counter()
+        payload = await request.json()
+        await asyncio.sleep(delay)
+        if payload.get("stream"):
+            return StreamingResponse(stream_reply(started), media_type="text/event-stream")
+        app.state.calls.append((started, time.perf_counter()))
+        return {
+            "id": "stub",
+            "model": payload.get("model", "stub"),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": reply}, "finish_reason": "stop"}],
+        }
+
+    async def stream_reply(started):
+        for word in reply.split(" "):
+            chunk = {"choices": [{"index": 0, "delta": {"content": word + " "}}]}
+            yield f"data: {json.dumps(chunk)}\n\n"
+            await asyncio.sleep(token_delay)
+        yield "data: [DONE]\n\n"
+        app.state.calls.append((started, time.perf_counter()))
+
+    return app
+
+
+class StubCompletionServer:
+    """Runs the stub app under uvicorn in a background thread."""
+
+    def __init__(self, port=8901, delay=0.5):
+        self.port = port
+        self.app = create_stub_app(delay=delay)
+        self.server = uvicorn.Server(uvicorn.Config(self.app, host="127.0.0.1", port=port, log_level="warning"))
+        self.thread = threading.Thread(target=self.server.run, daemon=True)
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.port}/v1/chat/completions"
+
+    @property
+    def calls(self):
+        return self.app.state.calls
+
+    def start(self):
+        self.thread.start()
+        while not self.server.started:
+            time.sleep(0.01)
+        return self
+
+    def stop(self):
+        self.server.should_exit = True
+        self.thread.join()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=8901)
+    parser.add_argument("--delay", type=float, default=0.5)
+    args = parser.parse_args()
+    uvicorn.run(create_stub_app(delay=args.delay), host="127.0.0.1", port=args.port)
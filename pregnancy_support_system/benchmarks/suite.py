@@ -0,0 +1,503 @@
+"""Reproducible benchmark suite with a JSON history and a regression gate.
+
+Scenarios:
+  risk_single         predict_risk_level, one dataset row per call
+  risk_bulk           RiskPredictor.predict_batch over the whole dataset in fixed-size batches
+  pdf_extract         PdfExtractor on each bundled research paper
+  faiss_build         IndexFlatL2 construction over the research-chunk vectors
+  faiss_query         top-k search against that index, one query at a time
+  api_predict_risk    load test of POST /predict-risk on a local API server
+  api_process_report  load test of POST /process-report, nutrition plans from the stub completion API
+
+Each scenario runs in a fresh interpreter, so its peak RSS is its own; for the API
+scenarios it is the API server's (not its PDF worker processes'). The FAISS
+scenarios use the vectors of the persisted research index when there is one, and
+otherwise seeded random vectors of the same shape, so they time FAISS alone, never
+the embedding model. The API scenarios disable the plan cache, and every
+/process-report request uploads a copy of the sample report with its own
+reference line, so no two requests share a plan-cache key and none are coalesced:
+each report reaches the stub.
+
+Every run is appended to the history file with p50/p95/p99 latency, throughput and
+peak RSS (VmHWM) per scenario. A scenario regresses when its p95 latency or peak RSS
+grows, or its throughput drops, by more than --max-regression against that
+scenario's last result that neither failed nor regressed (other scenarios failing
+in that run do not matter), among runs on the same CPU count with the same
+settings for that scenario; the suite then exits with status 1, as it does when
+a scenario fails. --rebaseline records a run without comparing it, and later runs
+compare against it rather than anything older.
+
+Run from pregnancy_support_system/:  python -m benchmarks.suite [--only risk_single,pdf_extract] [--max-regression 0.2]
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+DATASET = "Pregnancy_Risk_Prediction_Dataset.csv"
+REPORT_PDF = "sample_doctor_report.pdf"
+RESEARCH_PDFS = ["1-s2.0-S0002937821027289-main.pdf", "s40748-022-00139-9.pdf", "nutrients-12-01325.pdf"]
+HISTORY_FILE = "benchmark_history.json"
+EMBEDDING_DIM = 384  # paraphrase-MiniLM-L3-v2
+CHUNK_STRIDE = 800  # research_index CHUNK_SIZE - CHUNK_OVERLAP
+
+# metric -> +1 if higher is worse, -1 if lower is worse
+REGRESSION_METRICS = {"p95_ms": 1, "throughput": -1, "peak_rss_mb": 1}
+
+
+def summarize(latencies, items, elapsed, unit):
+    latencies = np.asarray(latencies) * 1000
+    return {
+        "count": len(latencies),
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p95_ms": float(np.percentile(latencies, 95)),
+        "p99_ms": float(np.percentile(latencies, 99)),
+        "throughput": items / elapsed,
+        "throughput_unit": unit,
+    }
+
+
+def process_peak_rss_mb(pid):
+    # VmHWM rather than ru_maxrss, which Linux carries over from the parent across fork/exec.
+    with open(f"/proc/{pid}/status") as f:
+        return next(int(line.split()[1]) for line in f if line.startswith("VmHWM")) / 1024
+
+
+def dataset_records(limit=None):
+    import pandas as pd
+
+    records = pd.read_csv(DATASET).drop(columns=["RiskLevel"])
+    return records.head(limit).to_dict("records") if limit else records.to_dict("records")
+
+
+# --- In-process scenarios ---
+
+def risk_single(settings):
+    from ml_model import default_risk_predictor, predict_risk_level
+
+    records = dataset_records(settings["single_rows"])
+    default_risk_predictor.load()
+    for record in records[:50]:
+        predict_risk_level(record)
+
+    latencies = []
+    start = time.perf_counter()
+    for record in records:
+        call_start = time.perf_counter()
+        if predict_risk_level(record) is None:
+            raise RuntimeError("predict_risk_level returned None")
+        latencies.append(time.perf_counter() - call_start)
+    return summarize(latencies, len(records), time.perf_counter() - start, "rows/s")
+
+
+def risk_bulk(settings):
+    from ml_model import default_risk_predictor
+
+    records = dataset_records()
+    batch_size = settings["batch_size"]
+    default_risk_predictor.load()
+    default_risk_predictor.predict_batch(records[:batch_size])
+
+    latencies = []
+    start = time.perf_counter()
+    for _ in range(settings["repeat"]):
+        for i in range(0, len(records), batch_size):
+            call_start = time.perf_counter()
+            default_risk_predictor.predict_batch(records[i:i + batch_size])
+            latencies.append(time.perf_counter() - call_start)
+    return summarize(latencies, len(records) * settings["repeat"], time.perf_counter() - start, "rows/s")
+
+
+def pdf_extract(settings):
+    import fitz
+
+    from pdf_extraction import PdfExtractor
+
+    documents = []
+    for path in RESEARCH_PDFS:
+        with open(path, "rb") as f:
+            pdf_bytes = f.read()
+        with fitz.open(stream=pdf_bytes, filetype="pdf") as doc:
+            documents.append((pdf_bytes, doc.page_count))
+
+    async def run():
+        extractor = PdfExtractor.from_env()
+        extractor.start()
+        try:
+            await extractor.extract_text(documents[0][0])  # starts the worker processes
+            latencies, pages = [], 0
+            start = time.perf_counter()
+            for _ in range(settings["repeat"]):
+                for pdf_bytes, page_count in documents:
+                    call_start = time.perf_counter()
+                    await extractor.extract_text(pdf_bytes)
+                    latencies.append(time.perf_counter() - call_start)
+                    pages += page_count
+            return summarize(latencies, pages, time.perf_counter() - start, "pages/s")
+        finally:
+            extractor.shutdown()
+
+    return asyncio.run(run())
+
+
+def research_vectors():
+    """(vectors, source): the persisted research index's vectors, or seeded random ones of its shape."""
+    import faiss
+
+    path = os.path.join("research_index", "index.faiss")
+    if os.path.exists(path):
+        index = faiss.read_index(path)
+        return index.reconstruct_n(0, index.ntotal), "research_index"
+
+    import fitz
+
+    chars = 0
+    for path in RESEARCH_PDFS:
+        with fitz.open(path) as doc:
+            chars += sum(len(page.get_text("text")) for page in doc)
+    rng = np.random.default_rng(0)
+    return rng.standard_normal((max(1, chars // CHUNK_STRIDE), EMBEDDING_DIM), dtype=np.float32), "synthetic"
+
+
+def faiss_build(settings):
+    import faiss
+
+    vectors, source = research_vectors()
+    latencies = []
+    start = time.perf_counter()
+    for _ in range(settings["repeat"] * 10):
+        call_start = time.perf_counter()
+        index = faiss.IndexFlatL2(vectors.shape[1])
+        index.add(vectors)
+        latencies.append(time.perf_counter() - call_start)
+    result = summarize(latencies, len(vectors) * len(latencies), time.perf_counter() - start, "vectors/s")
+    return {**result, "vectors": len(vectors), "dim": int(vectors.shape[1]), "vector_source": source}
+
+
+def faiss_query(settings):
+    import faiss
+
+    vectors, source = research_vectors()
+    index = faiss.IndexFlatL2(vectors.shape[1])
+    index.add(vectors)
+    rng = np.random.default_rng(1)
+    picks = rng.integers(0, len(vectors), settings["queries"])
+    queries = vectors[picks] + rng.normal(0, 0.05, (len(picks), vectors.shape[1])).astype(np.float32)
+    top_k = int(os.environ.get("RETRIEVAL_TOP_K", "4"))
+
+    latencies = []
+    start = time.perf_counter()
+    for query in queries:
+        call_start = time.perf_counter()
+        index.search(query[None, :], top_k)
+        latencies.append(time.perf_counter() - call_start)
+    result = summarize(latencies, len(queries), time.perf_counter() - start, "queries/s")
+    return {**result, "vectors": len(vectors), "top_k": top_k, "vector_source": source}
+
+
+# --- API scenarios ---
+
+def start_api(port, stub_url):
+    env = {
+        **os.environ,
+        "LLM_BACKEND": "openrouter",
+        "OPENROUTER_URL": stub_url,
+        "OPENROUTER_API_KEY": "benchmark",
+        "PLAN_CACHE_MAX_ENTRIES": "0",
+        "PLAN_CACHE_DB": "",
+        "PROFILE_SLOW_REQUESTS": "0",
+    }
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "api_service:app", "--port", str(port), "--log-level", "warning"],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+
+
+async def wait_for_components(url, names, timeout=600):
+    import httpx
+
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(base_url=url) as client:
+        while time.monotonic() < deadline:
+            try:
+                components = (await client.get("/ready")).json()["components"]
+            except (httpx.TransportError, KeyError, ValueError):
+                components = {}
+            statuses = {name: components.get(name, {}).get("status") for name in names}
+            failed = [name for name, status in statuses.items() if status == "failed"]
+            if failed:
+                raise RuntimeError(f"API component(s) failed to load: {', '.join(failed)}")
+            if all(status == "ready" for status in statuses.values()):
+                return
+            await asyncio.sleep(0.5)
+    raise RuntimeError(f"API at {url} was not ready after {timeout} s")
+
+
+async def drive(url, send, requests, concurrency):
+    """Issue requests via send(client, i) from concurrency workers; returns latencies, errors and elapsed time."""
+    import httpx
+
+    latencies, errors = [], []
+    next_index = iter(range(requests))
+
+    async def worker(client):
+        for i in next_index:
+            start = time.perf_counter()
+            response = await send(client, i)
+            if response.status_code != 200:
+                errors.append(f"{response.status_code} {response.text[:200]}")
+                continue
+            latencies.append(time.perf_counter() - start)
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=120) as client:
+        start = time.perf_counter()
+        await asyncio.gather(*[worker(client) for _ in range(concurrency)])
+        return latencies, errors, time.perf_counter() - start
+
+
+def load_test(settings, components, send, requests):
+    from benchmarks.stub_completion_server import StubCompletionServer
+
+    stub = StubCompletionServer(port=settings["stub_port"], delay=settings["llm_delay"]).start()
+    server = start_api(settings["port"], stub.url)
+    url = f"http://127.0.0.1:{settings['port']}"
+    try:
+        asyncio.run(wait_for_components(url, components))
+        asyncio.run(drive(url, send, min(20, requests), settings["concurrency"]))  # warm-up
+        latencies, errors, elapsed = asyncio.run(drive(url, send, requests, settings["concurrency"]))
+        if errors:
+            raise RuntimeError(f"{len(errors)}/{requests} requests failed, first: {errors[0]}")
+        result = summarize(latencies, len(latencies), elapsed, "req/s")
+        return {**result, "concurrency": settings["concurrency"], "peak_rss_mb": process_peak_rss_mb(server.pid)}
+    finally:
+        server.terminate()
+        server.wait()
+        stub.stop()
+
+
+def api_predict_risk(settings):
+    records = dataset_records(1000)
+
+    async def send(client, i):
+        return await client.post("/predict-risk", json=records[i % len(records)])
+
+    return load_test(settings, ["risk_model"], send, settings["requests"])
+
+
+def report_variants(count):
+    """Copies of the sample report, each with its own reference line, so their plan-cache keys differ."""
+    import fitz
+
+    variants = []
+    for i in range(count):
+        with fitz.open(REPORT_PDF) as doc:
+            page = doc[0]
+            page.insert_text((page.rect.x0 + 36, page.rect.y1 - 36), f"Benchmark reference: {i}", fontsize=9)
+            variants.append(doc.tobytes())
+    return variants
+
+
+def api_process_report(settings):
+    # The plan cache is off, so only requests in flight together could coalesce.
+    reports = report_variants(settings["report_requests"])
+    records = dataset_records(1000)
+
+    async def send(client, i):
+        pdf_bytes = reports[i % len(reports)]
+        return await client.post("/process-report", files={"file": ("report.pdf", pdf_bytes, "application/pdf")},
+                                 data={"patient_data": json.dumps(records[i % len(records)])})
+
+    return load_test(settings, ["risk_model", "vectorstore"], send, settings["report_requests"])
+
+
+SCENARIOS = {
+    "risk_single": risk_single,
+    "risk_bulk": risk_bulk,
+    "pdf_extract": pdf_extract,
+    "faiss_build": faiss_build,
+    "faiss_query": faiss_query,
+    "api_predict_risk": api_predict_risk,
+    "api_process_report": api_process_report,
+}
+# Settings each scenario's results depend on; a baseline must have been recorded with the same values.
+SCENARIO_SETTINGS = {
+    "risk_single": ("single_rows",),
+    "risk_bulk": ("batch_size", "repeat"),
+    "pdf_extract": ("repeat",),
+    "faiss_build": ("repeat",),
+    "faiss_query": ("queries",),
+    "api_predict_risk": ("requests", "concurrency"),
+    "api_process_report": ("report_requests", "concurrency", "llm_delay"),
+}
+
+
+# --- Runner, history and regression gate ---
+
+def run_scenario(name, settings):
+    """Run one scenario in a fresh interpreter and return its result (or {"error": ...})."""
+    command = [sys.executable, "-W", "ignore", "-m", "benchmarks.suite", "--child", name,
+               "--settings", json.dumps(settings)]
+    completed = subprocess.run(command, capture_output=True, text=True)
+    lines = completed.stdout.strip().splitlines()
+    if completed.returncode != 0 or not lines:
+        detail = (completed.stderr.strip().splitlines() or lines or ["no output"])[-1]
+        return {"error": detail}
+    return json.loads(lines[-1])
+
+
+def child_main(name, settings):
+    try:
+        result = SCENARIOS[name](settings)
+        result.setdefault("peak_rss_mb", process_peak_rss_mb(os.getpid()))
+    except Exception as e:
+        result = {"error": f"{type(e).__name__}: {e}"}
+    print(json.dumps(result))
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def read_history(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return []
+
+
+def write_history(path, history):
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(history, f, indent=2)
+    os.replace(tmp, path)
+
+
+def scenario_settings(name, settings):
+    return {key: settings.get(key) for key in SCENARIO_SETTINGS[name]}
+
+
+def baseline_for(history, name, settings, cpus):
+    """The scenario's most recent result that neither failed nor regressed, if any, from runs on the
+    same CPU count with the same scenario settings, and no older than the latest such --rebaseline run."""
+    wanted = scenario_settings(name, settings)
+    for run in reversed(history):
+        result = run["results"].get(name)
+        if result is None or run.get("cpus") != cpus or scenario_settings(name, run.get("settings", {})) != wanted:
+            continue
+        if "error" not in result and not result.get("regressed"):
+            return result
+        if run.get("rebaseline"):
+            return None
+    return None
+
+
+def find_regressions(name, result, baseline, max_regression):
+    regressions = []
+    for metric, direction in REGRESSION_METRICS.items():
+        old, new = baseline.get(metric), result.get(metric)
+        if not old or new is None:
+            continue
+        change = (new - old) / old * direction
+        if change > max_regression:
+            regressions.append(f"{name} {metric}: {old:.3f} -> {new:.3f} ({change:+.0%} worse)")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the risk model, PDF extraction, FAISS and the API")
+    parser.add_argument("--only", help="comma-separated scenarios (default: all)")
+    parser.add_argument("--history", default=HISTORY_FILE)
+    parser.add_argument("--max-regression", type=float, default=0.2,
+                        help="allowed relative worsening of p95 latency, throughput or peak RSS (0.2 = 20%%)")
+    parser.add_argument("--no-record", action="store_true", help="compare against the history without appending")
+    parser.add_argument("--rebaseline", action="store_true",
+                        help="record this run as the new baseline without comparing it against the history")
+    parser.add_argument("--single-rows", type=int, default=2000)
+    parser.add_argument("--batch-size", type=int, default=1024)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--requests", type=int, default=1000, help="/predict-risk requests")
+    parser.add_argument("--report-requests", type=int, default=100, help="/process-report requests")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--llm-delay", type=float, default=0.2, help="stub completion API latency in seconds")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--stub-port", type=int, default=8902)
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    parser.add_argument("--settings", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child_main(args.child, json.loads(args.settings))
+        return
+    if args.rebaseline and args.no_record:
+        parser.error("--rebaseline records the run; it cannot be combined with --no-record")
+
+    names = args.only.split(",") if args.only else list(SCENARIOS)
+    unknown = [name for name in names if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"unknown scenario(s) {', '.join(unknown)}; choose from {', '.join(SCENARIOS)}")
+    settings = {key: value for key, value in vars(args).items()
+                if key not in ("only", "history", "max_regression", "no_record", "rebaseline", "child", "settings")}
+
+    history = read_history(args.history)
+    results, failures, regressions = {}, [], []
+    for name in names:
+        result = run_scenario(name, settings)
+        results[name] = result
+        if "error" in result:
+            failures.append(name)
+            print(f"❌ {name:20s} failed: {result['error']}")
+            continue
+        print(f"{name:20s} p50 {result['p50_ms']:9.3f} ms  p95 {result['p95_ms']:9.3f} ms  p99 {result['p99_ms']:9.3f} ms"
+              f"  {result['throughput']:10.1f} {result['throughput_unit']:9s}  peak RSS {result['peak_rss_mb']:6.0f} MB")
+        if args.rebaseline:
+            continue
+        baseline = baseline_for(history, name, settings, os.cpu_count())
+        if baseline is None:
+            print(f"⚠️ {name}: no baseline in {args.history} for these settings on {os.cpu_count()} CPUs yet")
+            continue
+        found = find_regressions(name, result, baseline, args.max_regression)
+        result["regressed"] = bool(found)
+        regressions += found
+
+    passed = not failures and not regressions
+    if not args.no_record:
+        history.append({
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "cpus": os.cpu_count(),
+            "settings": settings,
+            "max_regression": args.max_regression,
+            "rebaseline": args.rebaseline,
+            "passed": passed,
+            "regressions": regressions,
+            "results": results,
+        })
+        write_history(args.history, history)
+
+    for regression in regressions:
+        print(f"📉 {regression}")
+    if not passed:
+        print(f"❌ {len(failures)} failed, {len(regressions)} regression(s) beyond {args.max_regression:.0%}")
+        raise SystemExit(1)
+    if args.rebaseline:
+        print(f"✅ Recorded as the new baseline in {args.history}")
+        return
+    print(f"✅ No regressions beyond {args.max_regression:.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""Peak RSS of loading and training on a large risk dataset, before and after the compact data layer.
+
+Builds a synthetic CSV by resampling Pregnancy_Risk_Prediction_Dataset.csv with
+jitter, then runs each scenario in a fresh interpreter and reads its VmHWM.
+
+Run from pregnancy_support_system/:  python -m benchmarks.training_memory [--rows 1000000]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from risk_data import RISK_FEATURES, RISK_TARGET, convert_csv_to_parquet, read_risk_csv
+
+ROUNDS = 20
+SCENARIOS = ("read_default", "read_compact", "to_parquet", "train_in_memory", "train_out_of_core")
+
+
+def make_dataset(path, rows, chunk_rows=200_000):
+    source = pd.read_csv("Pregnancy_Risk_Prediction_Dataset.csv")
+    rng = np.random.default_rng(0)
+    spread = source[RISK_FEATURES].std().to_numpy() * 0.05
+    with open(path, "w") as f:
+        for start in range(0, rows, chunk_rows):
+            chunk = source.sample(min(chunk_rows, rows - start), replace=True, random_state=rng.integers(1 << 31))
+            chunk[RISK_FEATURES] = chunk[RISK_FEATURES].to_numpy() + rng.normal(0, 1, (len(chunk), len(RISK_FEATURES))) * spread
+            chunk.to_csv(f, header=start == 0, index=False)
+
+
+def peak_rss_mb():
+    with open("/proc/self/status") as f:
+        return next(int(line.split()[1]) for line in f if line.startswith("VmHWM")) / 1024
+
+
+def run_scenario(name, csv_path, parquet_path):
+    if name == "read_default":
+        data = pd.read_csv(csv_path)
+        return {"frame_mb": data.memory_usage(deep=True).sum() / 2**20}
+    if name == "read_compact":
+        data = read_risk_csv(csv_path)
+        return {"frame_mb": data.memory_usage(deep=True).sum() / 2**20}
+    if name == "to_parquet":
+        convert_csv_to_parquet(csv_path, parquet_path)
+        return {"parquet_mb": os.path.getsize(parquet_path) / 2**20}
+    if name == "train_in_memory":
+        # The train_and_save_model pipeline as it was, minus the hyperparameter search.
+        from imblearn.over_sampling import SMOTE
+        from sklearn.model_selection import train_test_split
+        from sklearn.preprocessing import LabelEncoder, MinMaxScaler
+        from xgboost import XGBClassifier
+
+        data = pd.read_csv(csv_path).drop(columns=["Hormonal_Symptoms"])
+        data[RISK_TARGET] = LabelEncoder().fit_transform(data[RISK_TARGET])
+        X, y = data.drop(columns=[RISK_TARGET]), data[RISK_TARGET]
+        X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+        scaler = MinMaxScaler()
+        X_train = pd.DataFrame(scaler.fit_transform(X_train), columns=X.columns)
+        X_train, y_train = SMOTE(random_state=42).fit_resample(X_train, y_train)
+        XGBClassifier(n_estimators=ROUNDS, tree_method="hist", random_state=42).fit(X_train, y_train)
+        return {}
+    if name == "train_out_of_core":
+        from ml_model import train_out_of_core
+        from model_registry import ModelRegistry
+
+        with tempfile.TemporaryDirectory() as registry_dir:
+            params = {"max_depth": 6, "learning_rate": 0.1, "n_estimators": ROUNDS}
+            train_out_of_core(parquet_path, params=params, registry=ModelRegistry(registry_dir))
+        return {}
+    raise ValueError(name)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--scenario", choices=SCENARIOS, help=argparse.SUPPRESS)
+    parser.add_argument("--csv", help=argparse.SUPPRESS)
+    parser.add_argument("--parquet", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.scenario:
+        start = time.perf_counter()
+        result = run_scenario(args.scenario, args.csv, args.parquet)
+        result.update(seconds=time.perf_counter() - start, peak_rss_mb=peak_rss_mb())
+        print(json.dumps(result))
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, "watch_history.csv")
+        parquet_path = os.path.join(tmp, "watch_history.parquet")
+        make_dataset(csv_path, args.rows)
+        print(f"{args.rows} rows, CSV {os.path.getsize(csv_path) / 2**20:.0f} MB, {ROUNDS} boosting rounds")
+        for name in SCENARIOS:
+            output = subprocess.run(
+                [sys.executable, "-W", "ignore", "-m", "benchmarks.training_memory",
+                 "--scenario", name, "--csv", csv_path, "--parquet", parquet_path],
+                capture_output=True, text=True, check=True,
+            ).stdout
+            result = json.loads(output.strip().splitlines()[-1])
+            extra = "  ".join(f"{key} {value:.0f}" for key, value in result.items()
+                              if key not in ("seconds", "peak_rss_mb"))
+            print(f"{name:18s} peak RSS {result['peak_rss_mb']:7.0f} MB  {result['seconds']:7.1f} s  {extra}")
+
+
+if __name__ == "__main__":
+    main()
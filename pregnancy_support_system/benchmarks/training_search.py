@@ -0,0 +1,43 @@
+"""Wall-clock and test weighted-F1 of the exhaustive grid versus the pruned Optuna search.
+
+Each mode trains into its own temporary artifact directory, so the served
+pickles are left alone.
+
+Run from pregnancy_support_system/:  python -m benchmarks.training_search [--trials 40] [--skip-grid]
+"""
+import argparse
+import json
+import os
+import tempfile
+
+from ml_model import train_and_save_model
+
+
+def run(search, trials, workdir):
+    artifact_dir = os.path.join(workdir, search)
+    storage = f"sqlite:///{os.path.join(workdir, 'search.db')}"
+    train_and_save_model(search=search, n_trials=trials, study_storage=storage, artifact_dir=artifact_dir)
+    with open(os.path.join(artifact_dir, "risk_model_metrics.json")) as f:
+        return json.load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--trials", type=int, default=40)
+    parser.add_argument("--skip-grid", action="store_true", help="the grid takes several minutes per core")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        results = {"optuna": run("optuna", args.trials, workdir)}
+        if not args.skip_grid:
+            results["grid"] = run("grid", args.trials, workdir)
+
+    print(f"\n{'search':<8}{'wall s':>10}{'weighted F1':>14}{'ROC AUC':>10}")
+    for search, metrics in results.items():
+        print(f"{search:<8}{metrics['search_seconds']:>10.1f}{metrics['weighted_f1']:>14.4f}{metrics['roc_auc']:>10.4f}")
+    if "grid" in results:
+        print(f"Speedup: {results['grid']['search_seconds'] / results['optuna']['search_seconds']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+import threading
+import time
+import traceback
+
+
+class ComponentWarmingUp(Exception):
+    """Raised when a request needs a component that is still loading (or failed to load)."""
+
+    def __init__(self, component):
+        self.component = component
+        super().__init__(f"{component.name} is {component.status}")
+
+
+class LazyComponent:
+    """A slow-to-build dependency that is loaded once, in a background thread, on first demand."""
+
+    def __init__(self, name, loader, depends_on=()):
+        self.name = name
+        self.loader = loader
+        self.depends_on = list(depends_on)
+        self.status = "pending"
+        self.error = None
+        self.load_seconds = None
+        self._value = None
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+
+    def start(self):
+        with self._lock:
+            if self.status != "pending":
+                return
+            self.status = "loading"
+        threading.Thread(target=self._load, name=f"load-{self.name}", daemon=True).start()
+
+    def _load(self):
+        start = time.perf_counter()
+        try:
+            dependencies = [dependency.wait() for dependency in self.depends_on]
+            self._value = self.loader(*dependencies)
+            self.status = "ready"
+            print(f"✅ {self.name} ready in {time.perf_counter() - start:.1f} s")
+        except Exception as e:
+            self.error = str(e)
+            self.status = "failed"
+            print(f"❌ Error loading {self.name}:", e)
+            traceback.print_exc()
+        finally:
+            self.load_seconds = time.perf_counter() - start
+            self._done.set()
+
+    def wait(self, timeout=None):
+        """Block until loaded; used by dependent components and offline scripts."""
+        self.start()
+        self._done.wait(timeout)
+        if self.status != "ready":
+            raise ComponentWarmingUp(self)
+        return self._value
+
+    def get(self):
+        """Return the component if it is ready, otherwise kick off loading and raise ComponentWarmingUp."""
+        if self.status == "ready":
+            return self._value
+        self.start()
+        raise ComponentWarmingUp(self)
+
+    @property
+    def ready(self):
+        return self.status == "ready"
+
+    def describe(self):
+        return {"status": self.status, "load_seconds": self.load_seconds, "error": self.error}
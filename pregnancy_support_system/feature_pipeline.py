@@ -0,0 +1,195 @@
+"""Fitted preprocessing shared by training and serving: one-hot encoding, column alignment and MinMax scaling.
+
+A FeaturePipeline is built from the fitted sklearn scaler/encoder (or fitted
+directly on a training frame) and then only needs NumPy: transform_one is the
+compiled single-row path, transform_batch / transform_frame the vectorized ones.
+It serializes to plain JSON, which is what the lean model export and the
+pregnancy-detection artifacts store.
+"""
+import json
+import math
+
+import numpy as np
+
+
+class FeatureSchemaError(ValueError):
+    pass
+
+
+def fit_preprocessing(frame, categorical_cols=()):
+    """Fit the OneHotEncoder and MinMaxScaler a pipeline is compiled from, on a raw training frame."""
+    import pandas as pd
+    from sklearn.preprocessing import MinMaxScaler, OneHotEncoder
+
+    categorical_cols = list(categorical_cols)
+    onehot_encoder = OneHotEncoder(handle_unknown='ignore', sparse_output=False)
+    if categorical_cols:
+        encoded = onehot_encoder.fit_transform(frame[categorical_cols])
+        encoded_df = pd.DataFrame(encoded, columns=onehot_encoder.get_feature_names_out(categorical_cols),
+                                  index=frame.index)
+        frame = pd.concat([frame.drop(columns=categorical_cols), encoded_df], axis=1)
+    return onehot_encoder, MinMaxScaler().fit(frame)
+
+
+class FeaturePipeline:
+    def __init__(self, feature_names, numeric, categorical, scale, min, clip_range=None):
+        self.feature_names = list(feature_names)
+        self.numeric = [(name, int(j)) for name, j in numeric]
+        self.categorical = [(col, {str(category): int(j) for category, j in columns.items()}) for col, columns in categorical]
+        self.scale = np.asarray(scale, dtype=np.float64)
+        self.min = np.asarray(min, dtype=np.float64)
+        self.clip_range = tuple(clip_range) if clip_range is not None else None
+        self._zeros = np.zeros(len(self.feature_names), dtype=np.float64)
+        self._validate()
+
+    def _validate(self):
+        n = len(self.feature_names)
+        if len(set(self.feature_names)) != n:
+            raise FeatureSchemaError("Duplicate feature names in pipeline")
+        if self.scale.shape != (n,) or self.min.shape != (n,):
+            raise FeatureSchemaError(f"Scaler has {self.scale.shape[0]} columns but the pipeline has {n} features")
+        indices = [j for _, j in self.numeric] + [j for _, columns in self.categorical for j in columns.values()]
+        if sorted(indices) != list(range(n)):
+            raise FeatureSchemaError("Numeric and one-hot columns do not cover every feature exactly once")
+
+    @classmethod
+    def from_fitted(cls, scaler, onehot_encoder=None, categorical_cols=()):
+        """Compile a fitted MinMaxScaler (and OneHotEncoder for categorical_cols) into a pipeline."""
+        feature_names = list(scaler.feature_names_in_)
+        column_index = {name: j for j, name in enumerate(feature_names)}
+
+        categorical = []
+        encoded_names = set()
+        if categorical_cols:
+            output_names = iter(onehot_encoder.get_feature_names_out(categorical_cols))
+            for col, categories in zip(categorical_cols, onehot_encoder.categories_):
+                columns = {}
+                for category in categories:
+                    name = next(output_names)
+                    encoded_names.add(name)
+                    if name in column_index:
+                        columns[category] = column_index[name]
+                categorical.append((col, columns))
+
+        numeric = [(name, j) for name, j in column_index.items() if name not in encoded_names]
+        # MinMaxScaler.transform is X * scale_ + min_ (optionally clipped); fold it into the pipeline.
+        clip_range = scaler.feature_range if getattr(scaler, "clip", False) else None
+        return cls(feature_names, numeric, categorical, scaler.scale_, scaler.min_, clip_range)
+
+    @classmethod
+    def fit(cls, frame, categorical_cols=()):
+        onehot_encoder, scaler = fit_preprocessing(frame, categorical_cols)
+        return cls.from_fitted(scaler, onehot_encoder, categorical_cols)
+
+    @property
+    def input_columns(self):
+        return [name for name, _ in self.numeric] + [col for col, _ in self.categorical]
+
+    def check_inputs(self, fields):
+        """Fail fast if the request schema cannot supply every column the pipeline reads."""
+        missing = [name for name in self.input_columns if name not in set(fields)]
+        if missing:
+            raise FeatureSchemaError(f"Inputs missing columns required by the feature pipeline: {missing}")
+
+    def check_model(self, model):
+        """Fail fast if a fitted model was trained on a different feature layout."""
+        n_features = getattr(model, "n_features_in_", None)
+        if n_features is not None and n_features != len(self.feature_names):
+            raise FeatureSchemaError(f"Model expects {n_features} features, pipeline produces {len(self.feature_names)}")
+        get_booster = getattr(model, "get_booster", None)
+        booster_names = get_booster().feature_names if get_booster is not None else None
+        if booster_names and list(booster_names) != self.feature_names:
+            raise FeatureSchemaError("Model feature names/order do not match the feature pipeline")
+
+    def coerce(self, record):
+        """Copy of record with the columns this pipeline reads as floats and category strings.
+
+        Raises FeatureSchemaError naming the field when a numeric input is not a finite number,
+        so a bad record is rejected before it is scored alongside others.
+        """
+        coerced = dict(record)
+        for name, _ in self.numeric:
+            value = record.get(name, 0)
+            try:
+                number = float(value)
+            except (TypeError, ValueError):
+                raise FeatureSchemaError(f"{name} must be a number, got {value!r}") from None
+            if not math.isfinite(number):
+                raise FeatureSchemaError(f"{name} must be finite, got {value!r}")
+            coerced[name] = number
+        for col, _ in self.categorical:
+            coerced[col] = str(record.get(col, ""))
+        return coerced
+
+    def transform_one(self, record):
+        values = self._zeros.copy()
+        for name, j in self.numeric:
+            values[j] = record.get(name, 0)
+        for col, columns in self.categorical:
+            j = columns.get(str(record.get(col, "")))
+            if j is not None:
+                values[j] = 1.0
+
+        values *= self.scale
+        values += self.min
+        if self.clip_range is not None:
+            np.clip(values, self.clip_range[0], self.clip_range[1], out=values)
+
+        out = np.empty((1, len(values)), dtype=np.float32)
+        out[0] = values
+        return out
+
+    def transform_batch(self, records):
+        X = np.zeros((len(records), len(self.feature_names)), dtype=np.float64)
+        for name, j in self.numeric:
+            X[:, j] = [record.get(name, 0) for record in records]
+        for col, columns in self.categorical:
+            for i, record in enumerate(records):
+                j = columns.get(str(record.get(col, "")))
+                if j is not None:
+                    X[i, j] = 1.0
+        return self._scale(X)
+
+    def transform_frame(self, frame):
+        """Vectorized path for a raw pandas frame with the input columns (training, offline scoring)."""
+        X = np.zeros((len(frame), len(self.feature_names)), dtype=np.float64)
+        for name, j in self.numeric:
+            X[:, j] = frame[name].to_numpy(np.float64) if name in frame else 0.0
+        for col, columns in self.categorical:
+            if col not in frame:
+                continue
+            values = frame[col].astype(str).to_numpy()
+            for category, j in columns.items():
+                X[:, j] = values == category
+        return self._scale(X)
+
+    def _scale(self, X):
+        X *= self.scale
+        X += self.min
+        if self.clip_range is not None:
+            np.clip(X, self.clip_range[0], self.clip_range[1], out=X)
+        return X.astype(np.float32)
+
+    def to_dict(self):
+        return {
+            "feature_names": self.feature_names,
+            "numeric": self.numeric,
+            "categorical": self.categorical,
+            "scale": self.scale.tolist(),
+            "min": self.min.tolist(),
+            "clip_range": list(self.clip_range) if self.clip_range is not None else None,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["feature_names"], data["numeric"], data["categorical"], data["scale"], data["min"],
+                   data.get("clip_range"))
+
+    def save(self, path):
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as f:
+            return cls.from_dict(json.load(f))
@@ -0,0 +1,107 @@
+"""NumPy-only evaluator for the exported risk model.
+
+Reads the directory written by ml_model.export_lean_model (XGBoost JSON model
+plus preprocess.json with the serialized FeaturePipeline and class labels)
+and scores PatientData dicts without importing pandas, scikit-learn or xgboost.
+"""
+import json
+import os
+
+import numpy as np
+
+from feature_pipeline import FeaturePipeline
+
+LEAN_MODEL_FILE = "model.json"
+LEAN_PREPROCESS_FILE = "preprocess.json"
+
+
+def _tree_depth(left, right):
+    depth, stack = 0, [(0, 0)]
+    while stack:
+        node, node_depth = stack.pop()
+        if left[node] == -1:
+            depth = max(depth, node_depth)
+        else:
+            stack.append((left[node], node_depth + 1))
+            stack.append((right[node], node_depth + 1))
+    return depth
+
+
+class LeanRiskModel:
+    def __init__(self, model_dir):
+        with open(os.path.join(model_dir, LEAN_PREPROCESS_FILE)) as f:
+            preprocess = json.load(f)
+        with open(os.path.join(model_dir, LEAN_MODEL_FILE)) as f:
+            self._load_booster(json.load(f))
+
+        self.pipeline = FeaturePipeline.from_dict(preprocess)
+        self.feature_names = self.pipeline.feature_names
+        self.class_labels = np.array(preprocess["class_labels"])
+
+    def _load_booster(self, model):
+        learner = model["learner"]
+        objective = learner["objective"]["name"]
+        if objective not in ("multi:softprob", "multi:softmax"):
+            raise ValueError(f"Unsupported objective for the lean evaluator: {objective}")
+        booster = learner["gradient_booster"]
+        if booster["name"] != "gbtree":
+            raise ValueError(f"Unsupported booster for the lean evaluator: {booster['name']}")
+
+        self.num_class = int(learner["learner_model_param"]["num_class"])
+        base_score = np.array(json.loads(learner["learner_model_param"]["base_score"]), dtype=np.float64).ravel()
+        self.base_margin = np.broadcast_to(base_score, (self.num_class,)).copy()
+
+        trees = booster["model"]["trees"]
+        if any(any(tree.get("split_type", [])) for tree in trees):
+            raise ValueError("Categorical splits are not supported by the lean evaluator")
+
+        # Pack every tree into padded (n_trees, max_nodes) arrays so all trees are walked in lockstep.
+        max_nodes = max(len(tree["left_children"]) for tree in trees)
+        n_trees = len(trees)
+        self.left = np.full((n_trees, max_nodes), -1, dtype=np.int32)
+        self.right = np.full((n_trees, max_nodes), -1, dtype=np.int32)
+        self.feature = np.zeros((n_trees, max_nodes), dtype=np.int32)
+        self.threshold = np.zeros((n_trees, max_nodes), dtype=np.float32)
+        self.default_left = np.zeros((n_trees, max_nodes), dtype=bool)
+        for t, tree in enumerate(trees):
+            n = len(tree["left_children"])
+            self.left[t, :n] = tree["left_children"]
+            self.right[t, :n] = tree["right_children"]
+            self.feature[t, :n] = tree["split_indices"]
+            self.threshold[t, :n] = tree["split_conditions"]  # leaf value on leaf nodes
+            self.default_left[t, :n] = tree["default_left"]
+        self.tree_class = np.array(booster["model"]["tree_info"], dtype=np.int32)
+        self.depth = max(_tree_depth(tree["left_children"], tree["right_children"]) for tree in trees)
+
+    def transform_batch(self, records):
+        return self.pipeline.transform_batch(records)
+
+    def predict_margin(self, X):
+        n_rows, n_trees = X.shape[0], self.left.shape[0]
+        trees = np.arange(n_trees)[None, :]
+        node = np.zeros((n_rows, n_trees), dtype=np.int32)
+        rows = np.arange(n_rows)[:, None]
+        for _ in range(self.depth):
+            feature = self.feature[trees, node]
+            value = X[rows, feature]
+            go_left = np.where(np.isnan(value), self.default_left[trees, node], value < self.threshold[trees, node])
+            child = np.where(go_left, self.left[trees, node], self.right[trees, node])
+            node = np.where(child == -1, node, child)
+        leaves = self.threshold[trees, node].astype(np.float64)
+
+        margin = np.tile(self.base_margin, (n_rows, 1))
+        for k in range(self.num_class):
+            margin[:, k] += leaves[:, self.tree_class == k].sum(axis=1)
+        return margin
+
+    def predict_proba(self, X):
+        margin = self.predict_margin(X)
+        margin -= margin.max(axis=1, keepdims=True)
+        exp = np.exp(margin)
+        return exp / exp.sum(axis=1, keepdims=True)
+
+    def predict_batch(self, records):
+        return self.class_labels[self.predict_margin(self.transform_batch(records)).argmax(axis=1)].tolist()
+
+    def predict(self, record):
+        return self.class_labels[self.predict_margin(self.transform_batch([record]))[0].argmax()]
@@ -0,0 +1,128 @@
+import asyncio
+import json
+import os
+import random
+
+import httpx
+
+DEFAULT_COMPLETION_URL = "https://openrouter.ai/api/v1/chat/completions"
+DEFAULT_COMPLETION_MODEL = "gpt-3.5-turbo"
+RETRYABLE_STATUS_CODES = {408, 409, 425, 429, 500, 502, 503, 504}
+
+
+def load_llm_config():
+    """Completion API settings, read from the environment so no key lives in the source."""
+    return {
+        "url": os.environ.get("OPENROUTER_URL", DEFAULT_COMPLETION_URL),
+        "api_key": os.environ.get("OPENROUTER_API_KEY", ""),
+        "model": os.environ.get("OPENROUTER_MODEL", DEFAULT_COMPLETION_MODEL),
+        "timeout": float(os.environ.get("LLM_TIMEOUT_SECONDS", "60")),
+        "connect_timeout": float(os.environ.get("LLM_CONNECT_TIMEOUT_SECONDS", "5")),
+        "max_retries": int(os.environ.get("LLM_MAX_RETRIES", "3")),
+        "backoff": float(os.environ.get("LLM_RETRY_BACKOFF_SECONDS", "0.5")),
+        "max_concurrency": int(os.environ.get("LLM_MAX_CONCURRENCY", "16")),
+    }
+
+
+def load_llm_backend():
+    """"openrouter" (remote completion API) or "local" (local_llm.LocalCompletionClient)."""
+    return os.environ.get("LLM_BACKEND", "openrouter")
+
+
+class CompletionError(Exception):
+    pass
+
+
+class CompletionClient:
+    """Chat-completion client sharing one pooled httpx.AsyncClient, with retries and a concurrency cap."""
+
+    def __init__(self, url=DEFAULT_COMPLETION_URL, api_key="", model=DEFAULT_COMPLETION_MODEL,
+                 timeout=60.0, connect_timeout=5.0, max_retries=3, backoff=0.5, max_concurrency=16):
+        self.url = url
+        self.api_key = api_key
+        self.model = model
+        self.timeout = httpx.Timeout(timeout, connect=connect_timeout)
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_concurrency = max_concurrency
+        self._client = None
+        self._semaphore = None
+
+    @classmethod
+    def from_env(cls):
+        return cls(**load_llm_config())
+
+    def _get_client(self):
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout,
+                limits=httpx.Limits(max_connections=self.max_concurrency, max_keepalive_connections=self.max_concurrency),
+            )
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._client
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def _headers(self):
+        if not self.api_key:
+            raise CompletionError("OPENROUTER_API_KEY is not configured")
+        return {"Authorization": f"Bearer {self.api_key}", "Content-Type": "application/json"}
+
+    async def _post(self, payload):
+        client = self._get_client()
+        headers = self._headers()
+        for attempt in range(self.max_retries + 1):
+            try:
+                async with self._semaphore:
+                    response = await client.post(self.url, headers=headers, json=payload)
+                if response.status_code not in RETRYABLE_STATUS_CODES:
+                    response.raise_for_status()
+                    return response.json()
+                error = CompletionError(f"completion API returned {response.status_code}")
+            except httpx.TransportError as e:
+                error = CompletionError(f"completion API unreachable: {e}")
+
+            if attempt < self.max_retries:
+                # Exponential backoff with jitter so retries from concurrent requests spread out.
+                await asyncio.sleep(self.backoff * (2 ** attempt) * (0.5 + random.random()))
+        raise error
+
+    async def complete(self, messages):
+        result = await self._post({"model": self.model, "messages": messages})
+        return result['choices'][0]['message']['content']
+
+    async def stream_complete(self, messages):
+        """Yield content deltas as the API streams them; retries only happen before the first byte."""
+        client = self._get_client()
+        headers = self._headers()
+        payload = {"model": self.model, "messages": messages, "stream": True}
+        streamed = False
+        for attempt in range(self.max_retries + 1):
+            try:
+                async with self._semaphore:
+                    async with client.stream("POST", self.url, headers=headers, json=payload) as response:
+                        if response.status_code not in RETRYABLE_STATUS_CODES:
+                            response.raise_for_status()
+                            async for line in response.aiter_lines():
+                                if not line.startswith("data:"):
+                                    continue
+                                data = line[len("data:"):].strip()
+                                if data == "[DONE]":
+                                    return
+                                delta = json.loads(data)["choices"][0].get("delta", {}).get("content")
+                                if delta:
+                                    streamed = True
+                                    yield delta
+                            return
+                error = CompletionError(f"completion API returned {response.status_code}")
+            except httpx.TransportError as e:
+                if streamed:
+                    raise CompletionError(f"completion stream interrupted: {e}")
+                error = CompletionError(f"completion API unreachable: {e}")
+
+            if attempt < self.max_retries:
+                await asyncio.sleep(self.backoff * (2 ** attempt) * (0.5 + random.random()))
+        raise error
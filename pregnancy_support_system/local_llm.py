@@ -0,0 +1,215 @@
+"""Local CPU text generation: int8 dynamic quantization and token streaming.
+
+LocalLLM loads a Hugging Face model for CPU inference and, by default, swaps its
+Linear layers for int8 dynamically-quantized ones (weights int8, activations
+quantized on the fly, so no calibration data is needed). Generation runs
+greedily with the KV cache in a background thread and streams decoded text
+through TextIteratorStreamer. LocalCompletionClient exposes it with the same
+complete / stream_complete interface as llm_client.CompletionClient, so
+LLM_BACKEND=local can replace the OpenRouter call.
+
+The default model has a 32k-token context, so the research-grounded nutrition
+prompt fits whole. A prompt longer than the model's context raises PromptTooLong
+rather than being silently truncated.
+"""
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+DEFAULT_LOCAL_MODEL = "Qwen/Qwen2.5-0.5B-Instruct"
+
+
+def load_local_llm_config():
+    return {
+        "model_name": os.environ.get("LOCAL_LLM_MODEL", DEFAULT_LOCAL_MODEL),
+        "quantize": os.environ.get("LOCAL_LLM_QUANTIZE", "int8"),
+        "max_new_tokens": int(os.environ.get("LOCAL_LLM_MAX_NEW_TOKENS", "256")),
+        "threads": int(os.environ.get("LOCAL_LLM_THREADS", "0")) or None,
+    }
+
+
+class PromptTooLong(ValueError):
+    pass
+
+
+class _StopWhenSet:
+    """Stopping criterion that ends generation once the consumer has gone away."""
+
+    def __init__(self, event):
+        self.event = event
+
+    def __call__(self, input_ids, scores, **kwargs):
+        return self.event.is_set()
+
+
+class LocalLLM:
+    def __init__(self, model_name=DEFAULT_LOCAL_MODEL, quantize="int8", max_new_tokens=256, threads=None):
+        import torch
+        from transformers import AutoConfig, AutoModelForCausalLM, AutoModelForSeq2SeqLM, AutoTokenizer
+
+        start = time.perf_counter()
+        if threads:
+            torch.set_num_threads(threads)
+        self.model_name = model_name
+        self.quantize = quantize
+        self.max_new_tokens = max_new_tokens
+
+        config = AutoConfig.from_pretrained(model_name)
+        self.is_encoder_decoder = bool(config.is_encoder_decoder)
+        self.tokenizer = AutoTokenizer.from_pretrained(model_name)
+        model_class = AutoModelForSeq2SeqLM if self.is_encoder_decoder else AutoModelForCausalLM
+        model = model_class.from_pretrained(model_name, torch_dtype=torch.float32).eval()
+        if quantize == "int8":
+            model = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        elif quantize not in ("none", "", None):
+            raise ValueError(f"Unsupported LOCAL_LLM_QUANTIZE value: {quantize}")
+        self.model = model
+
+        positions = getattr(config, "max_position_embeddings", None) or 2048
+        self.max_input_tokens = min(self.tokenizer.model_max_length, positions)
+        if not self.is_encoder_decoder:
+            self.max_input_tokens -= max_new_tokens
+        self.load_seconds = time.perf_counter() - start
+        print(f"✅ Local LLM {model_name} ({quantize or 'none'}) loaded in {self.load_seconds:.1f} s")
+
+    @classmethod
+    def from_env(cls):
+        return cls(**load_local_llm_config())
+
+    def format_prompt(self, messages):
+        if getattr(self.tokenizer, "chat_template", None):
+            return self.tokenizer.apply_chat_template(messages, tokenize=False, add_generation_prompt=True)
+        return "\n".join(f"{m['role'].capitalize()}: {m['content'].strip()}" for m in messages) + "\nAssistant:"
+
+    def stream(self, prompt, max_new_tokens=None, stop=None, usage=None):
+        """Yield decoded text pieces as they are generated.
+
+        Closing the iterator, or setting the stop event from another thread, stops generation.
+        If given, usage["generated_tokens"] is set to the number of token ids generated.
+        """
+        import torch
+        from transformers import StoppingCriteriaList, TextIteratorStreamer
+
+        class CountingStreamer(TextIteratorStreamer):
+            generated_tokens = 0
+
+            def put(self, value):
+                if not (self.skip_prompt and self.next_tokens_are_prompt):
+                    self.generated_tokens += value.numel()
+                super().put(value)
+
+        inputs = self.tokenizer(prompt, return_tensors="pt")
+        prompt_tokens = inputs["input_ids"].shape[-1]
+        if prompt_tokens > self.max_input_tokens:
+            raise PromptTooLong(f"Prompt has {prompt_tokens} tokens; {self.model_name} accepts "
+                                f"{self.max_input_tokens}. Use a model with a longer context (LOCAL_LLM_MODEL).")
+        streamer = CountingStreamer(self.tokenizer, skip_prompt=True, skip_special_tokens=True)
+        stop = stop or threading.Event()
+        errors = []
+
+        def generate():
+            try:
+                with torch.inference_mode():
+                    self.model.generate(
+                        **inputs,
+                        streamer=streamer,
+                        max_new_tokens=max_new_tokens or self.max_new_tokens,
+                        do_sample=False,
+                        use_cache=True,
+                        stopping_criteria=StoppingCriteriaList([_StopWhenSet(stop)]),
+                    )
+            except Exception as e:
+                errors.append(e)
+                streamer.end()
+
+        threading.Thread(target=generate, name="local-llm-generate", daemon=True).start()
+        try:
+            for piece in streamer:
+                if piece:
+                    yield piece
+        finally:
+            stop.set()
+            if usage is not None:
+                usage["generated_tokens"] = streamer.generated_tokens
+        if errors:
+            raise errors[0]
+
+    def generate(self, prompt, max_new_tokens=None):
+        return "".join(self.stream(prompt, max_new_tokens))
+
+    def as_pipeline(self):
+        """A transformers pipeline over the same (quantized) model, for LangChain's HuggingFacePipeline."""
+        from transformers import pipeline
+
+        task = "text2text-generation" if self.is_encoder_decoder else "text-generation"
+        return pipeline(task, model=self.model, tokenizer=self.tokenizer, max_new_tokens=self.max_new_tokens,
+                        truncation=True)
+
+
+class LocalCompletionClient:
+    """CompletionClient interface over a LazyComponent holding a LocalLLM.
+
+    Generations run one at a time (max_concurrency): concurrent CPU generations only
+    share the same cores and all finish later.
+    """
+
+    def __init__(self, llm, max_concurrency=1):
+        self.llm = llm
+        self.max_concurrency = max_concurrency
+        self._semaphore = None
+        self._executor = ThreadPoolExecutor(max_concurrency, thread_name_prefix="local-llm-stream")
+
+        self.generations = 0
+        self.tokens = 0
+        self.total_first_piece_seconds = 0.0
+        self.total_generate_seconds = 0.0
+
+    async def aclose(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    async def stream_complete(self, messages):
+        llm = self.llm.get()
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        async with self._semaphore:
+            start = time.perf_counter()
+            stop = threading.Event()
+            usage = {}
+            pieces = llm.stream(llm.format_prompt(messages), stop=stop, usage=usage)
+            pending = None
+            first = True
+            try:
+                while True:
+                    pending = self._executor.submit(next, pieces, None)
+                    piece = await asyncio.wrap_future(pending)
+                    if piece is None:
+                        break
+                    if first:
+                        self.total_first_piece_seconds += time.perf_counter() - start
+                        first = False
+                    yield piece
+            finally:
+                # On disconnect a next() may still be running in the executor; closing a running
+                # generator raises, so stop generation and let that call return before releasing
+                # the semaphore to the next generation.
+                stop.set()
+                if pending is not None and not pending.done():
+                    await asyncio.wait([asyncio.wrap_future(pending)])
+                pieces.close()
+                self.tokens += usage.get("generated_tokens", 0)
+                self.generations += 1
+                self.total_generate_seconds += time.perf_counter() - start
+
+    async def complete(self, messages):
+        return "".join([piece async for piece in self.stream_complete(messages)])
+
+    def stats(self):
+        return {
+            "model": self.llm.describe(),
+            "generations": self.generations,
+            "avg_first_piece_ms": self.total_first_piece_seconds / self.generations * 1000 if self.generations else None,
+            "avg_generate_ms": self.total_generate_seconds / self.generations * 1000 if self.generations else None,
+            "tokens_per_second": self.tokens / self.total_generate_seconds if self.total_generate_seconds else None,
+        }
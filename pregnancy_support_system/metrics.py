@@ -0,0 +1,324 @@
+"""Request and stage metrics in Prometheus text format, plus an opt-in slow-request profiler.
+
+Histograms, counters and gauges are plain thread-safe objects registered in
+REGISTRY and rendered by render_metrics() for the /metrics endpoint.
+MetricsMiddleware times every HTTP request by route template and tracks in-flight
+requests; stage_timer() times a named stage (pdf_extract, preprocess, predict,
+retrieval, llm, ...) of whichever component runs it.
+
+SlowRequestProfiler samples the stacks of all threads while requests are in
+flight and, for a request slower than its threshold, writes the samples taken
+during it as collapsed stacks ("frame;frame;frame count"), which flamegraph.pl
+and speedscope read directly. Samples are per process, not per request, so
+concurrent requests share each other's samples.
+"""
+import asyncio
+import os
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def load_profiler_config():
+    return {
+        "enabled": os.environ.get("PROFILE_SLOW_REQUESTS", "0") == "1",
+        "slow_seconds": float(os.environ.get("PROFILE_SLOW_REQUEST_MS", "1000")) / 1000,
+        "interval": float(os.environ.get("PROFILE_INTERVAL_MS", "5")) / 1000,
+        "output_dir": os.environ.get("PROFILE_DIR", "profiles"),
+    }
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}" if pairs else ""
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.extend(self._render_series(key, value))
+        return lines
+
+    def _render_series(self, key, value):
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                series = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][i] += 1
+                    break
+            series[1] += value
+            series[2] += 1
+
+    def _render_series(self, key, series):
+        counts, total, count = series
+        lines, cumulative = [], 0
+        for bound, bucket_count in zip(self.buckets, counts):
+            cumulative += bucket_count
+            lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, [('le', _format_value(bound))])} "
+                         f"{cumulative}")
+        lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, [('le', '+Inf')])} {count}")
+        lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(total)}")
+        lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.metrics = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self):
+        return "\n".join(line for metric in self.metrics for line in metric.render()) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+REQUEST_SECONDS = REGISTRY.register(Histogram(
+    "http_request_duration_seconds", "HTTP request latency, until the last body byte is sent.",
+    ("method", "route", "status")))
+REQUESTS_IN_FLIGHT = REGISTRY.register(Gauge(
+    "http_requests_in_flight", "HTTP requests currently being served.", ("route",)))
+STAGE_SECONDS = REGISTRY.register(Histogram(
+    "stage_duration_seconds", "Time spent in one stage of request handling.", ("stage", "component")))
+STAGE_ERRORS = REGISTRY.register(Counter(
+    "stage_errors_total", "Stages that raised an exception.", ("stage", "component")))
+MODEL_LOAD_SECONDS = REGISTRY.register(Gauge(
+    "model_load_seconds", "Duration of the last load of each model or background component.", ("component",)))
+PROFILES_WRITTEN = REGISTRY.register(Counter(
+    "slow_request_profiles_total", "Collapsed-stack profiles written for slow requests.", ("route",)))
+
+
+@contextmanager
+def stage_timer(stage, component=""):
+    """Record how long the with-block takes as one observation of stage_duration_seconds."""
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        STAGE_ERRORS.inc(stage=stage, component=component)
+        raise
+    finally:
+        STAGE_SECONDS.observe(time.perf_counter() - start, stage=stage, component=component)
+
+
+def render_metrics():
+    return REGISTRY.render()
+
+
+def _collapse(frame):
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{code.co_name} ({os.path.basename(code.co_filename)})")
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+class SlowRequestProfiler:
+    """Samples every thread's stack while requests are in flight; dumps the samples of slow requests."""
+
+    def __init__(self, enabled=False, slow_seconds=1.0, interval=0.005, output_dir="profiles", max_samples=200_000):
+        self.enabled = enabled
+        self.slow_seconds = slow_seconds
+        self.interval = interval
+        self.output_dir = output_dir
+        self._samples = deque(maxlen=max_samples)
+        self._active = 0
+        self._cond = threading.Condition()
+        self._thread = None
+        self.profiles_written = 0
+
+    @classmethod
+    def from_env(cls):
+        return cls(**load_profiler_config())
+
+    def configure(self, enabled=None, slow_seconds=None):
+        with self._cond:
+            if enabled is not None:
+                self.enabled = enabled
+            if slow_seconds is not None:
+                self.slow_seconds = slow_seconds
+            if not self.enabled:
+                self._samples.clear()
+            self._cond.notify()
+
+    def _ensure_thread(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._sample_loop, name="slow-request-profiler", daemon=True)
+            self._thread.start()
+
+    def _sample_loop(self):
+        own_id = threading.get_ident()
+        while True:
+            with self._cond:
+                # Checked under the same lock request_started takes, so a wake-up is never missed.
+                while not (self._active and self.enabled):
+                    self._cond.wait()
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            now = time.perf_counter()
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id != own_id:
+                    self._samples.append((now, f"{names.get(thread_id, thread_id)};{_collapse(frame)}"))
+            time.sleep(self.interval)
+
+    def request_started(self):
+        if not self.enabled:
+            return None
+        with self._cond:
+            self._active += 1
+            self._cond.notify()
+        self._ensure_thread()
+        return time.perf_counter()
+
+    def request_finished(self, started):
+        """The request's duration if it is slow enough to profile, otherwise None."""
+        if started is None:
+            return None
+        with self._cond:
+            self._active -= 1
+        elapsed = time.perf_counter() - started
+        return elapsed if elapsed >= self.slow_seconds else None
+
+    def write_profile(self, started, elapsed, route):
+        """Write the samples taken since started as a .folded file; blocking, so run it off the event loop."""
+        stacks = {}
+        for timestamp, stack in list(self._samples):
+            if timestamp >= started:
+                stacks[stack] = stacks.get(stack, 0) + 1
+        if not stacks:
+            return None
+        os.makedirs(self.output_dir, exist_ok=True)
+        route_name = route.strip("/").replace("/", "_").replace("{", "").replace("}", "") or "root"
+        path = os.path.join(self.output_dir, f"{time.strftime('%Y%m%d-%H%M%S')}-{route_name}-{elapsed * 1000:.0f}ms.folded")
+        with open(path, "w") as f:
+            f.writelines(f"{stack} {count}\n" for stack, count in sorted(stacks.items()))
+        with self._cond:
+            self.profiles_written += 1
+        PROFILES_WRITTEN.inc(route=route)
+        print(f"🐢 {route} took {elapsed * 1000:.0f} ms, stacks written to {path}")
+        return path
+
+    def stats(self):
+        return {
+            "enabled": self.enabled,
+            "slow_ms": self.slow_seconds * 1000,
+            "interval_ms": self.interval * 1000,
+            "output_dir": self.output_dir,
+            "buffered_samples": len(self._samples),
+            "profiles_written": self.profiles_written,
+        }
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording latency and in-flight counts per route template (not raw path)."""
+
+    def __init__(self, app, routes=None, profiler=None):
+        self.app = app
+        self.routes = routes
+        self.profiler = profiler
+
+    def _route_name(self, scope):
+        from starlette.routing import Match
+
+        for route in self.routes or ():
+            match, _ = route.matches(scope)
+            if match == Match.FULL:
+                return getattr(route, "path", scope["path"])
+        return "unmatched"
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        route = self._route_name(scope)
+        status = {"code": 500}
+        start = time.perf_counter()
+        profile_start = self.profiler.request_started() if self.profiler is not None else None
+        REQUESTS_IN_FLIGHT.inc(route=route)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            REQUESTS_IN_FLIGHT.dec(route=route)
+            REQUEST_SECONDS.observe(time.perf_counter() - start, method=scope["method"], route=route,
+                                    status=status["code"])
+            if self.profiler is not None:
+                elapsed = self.profiler.request_finished(profile_start)
+                if elapsed is not None:
+                    await asyncio.to_thread(self.profiler.write_profile, profile_start, elapsed, route)
@@ -1,24 +1,157 @@
 from imblearn.over_sampling import SMOTE
-from xgboost import XGBClassifier
+from xgboost import DMatrix, ExtMemQuantileDMatrix, XGBClassifier, train as xgb_train
+from xgboost.callback import TrainingCallback
 from sklearn.model_selection import GridSearchCV, train_test_split
-from sklearn.metrics import classification_report, confusion_matrix, roc_auc_score, roc_curve
-from sklearn.preprocessing import MinMaxScaler, LabelEncoder, OneHotEncoder
+from sklearn.metrics import classification_report, confusion_matrix, f1_score, log_loss, roc_auc_score, roc_curve
+from sklearn.preprocessing import LabelEncoder, OneHotEncoder
 import pandas as pd
 from sklearn.preprocessing import label_binarize
 import numpy as np
 import joblib
 import traceback
+import os
+import threading
+import time
+import json
+import hashlib
+import argparse
+import matplotlib
+matplotlib.use("Agg")  # training runs headless; the ROC curve is written to a file
 import matplotlib.pyplot as plt
+import shutil
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+import tempfile
+from feature_pipeline import FeaturePipeline, fit_preprocessing
+from metrics import stage_timer
+from model_registry import RISK_ARTIFACT_FILES, ModelRegistry, ModelRegistryError
+from risk_data import DEFAULT_CHUNK_ROWS, RISK_FEATURES, RiskChunkIter, iter_split_chunks, read_risk_csv, scan_risk_data
 
+RISK_STUDY_STORAGE = "sqlite:///risk_model_search.db"
+RISK_STUDY_NAME = "pregnancy_risk_xgb"
+RISK_DATASET = "Pregnancy_Risk_Prediction_Dataset.csv"
+# (kind, low, high, log) per XGBoost parameter the Optuna search tunes.
+OPTUNA_SEARCH_SPACE = {
+    "max_depth": ("int", 3, 8, False),
+    "learning_rate": ("float", 0.01, 0.3, True),
+    "subsample": ("float", 0.6, 1.0, False),
+    "colsample_bytree": ("float", 0.6, 1.0, False),
+    "min_child_weight": ("int", 1, 8, False),
+}
+DEFAULT_OUT_OF_CORE_PARAMS = {
+    "max_depth": 6, "learning_rate": 0.1, "subsample": 0.8, "colsample_bytree": 0.8, "n_estimators": 300,
+}
 
-def train_and_save_model():
+
+def _grid_search(X_train, y_train):
+    param_grid = {
+        'n_estimators': [100, 200, 300],
+        'max_depth': [3, 5, 7],
+        'learning_rate': [0.01, 0.1, 0.2],
+        'subsample': [0.8, 1.0],
+        'colsample_bytree': [0.8, 1.0],
+    }
+    xgb_model = GridSearchCV(
+        XGBClassifier(random_state=42),
+        param_grid,
+        cv=5,
+        scoring='f1_weighted',
+        n_jobs=-1
+    )
+    xgb_model.fit(X_train, y_train)
+    return xgb_model.best_estimator_, xgb_model.best_params_
+
+
+class _PruningCallback(TrainingCallback):
+    """Reports validation log-loss to the Optuna trial every round and stops hopeless trials early."""
+
+    def __init__(self, trial):
+        super().__init__()
+        self.trial = trial
+
+    def after_iteration(self, model, epoch, evals_log):
+        import optuna
+        self.trial.report(-evals_log["validation_0"]["mlogloss"][-1], epoch)
+        if self.trial.should_prune():
+            raise optuna.TrialPruned()
+        return False
+
+
+def _study_name(X_train, y_train, search_space=OPTUNA_SEARCH_SPACE):
+    """RISK_STUDY_NAME suffixed with a hash of the training data and search space.
+
+    Only a run over the same data and space resumes a checkpointed study; anything
+    else starts a fresh one instead of reusing another dataset's best parameters.
+    """
+    digest = hashlib.sha256()
+    digest.update(json.dumps(list(X_train.columns)).encode("utf-8"))
+    digest.update(np.ascontiguousarray(X_train.to_numpy(dtype=np.float64)).tobytes())
+    digest.update(np.ascontiguousarray(np.asarray(y_train, dtype=np.int64)).tobytes())
+    digest.update(json.dumps(search_space, sort_keys=True).encode("utf-8"))
+    return f"{RISK_STUDY_NAME}-{digest.hexdigest()[:16]}"
+
+
+def _optuna_search(X_train, y_train, n_trials=40, storage=RISK_STUDY_STORAGE, study_name=None):
+    import optuna
+
+    study_name = study_name or _study_name(X_train, y_train)
+    X_fit, X_val, y_fit, y_val = train_test_split(X_train, y_train, test_size=0.2, random_state=42, stratify=y_train)
+
+    def objective(trial):
+        params = {
+            name: (trial.suggest_int(name, low, high, log=log) if kind == "int"
+                   else trial.suggest_float(name, low, high, log=log))
+            for name, (kind, low, high, log) in OPTUNA_SEARCH_SPACE.items()
+        }
+        model = XGBClassifier(
+            **params,
+            n_estimators=1000,
+            tree_method='hist',
+            early_stopping_rounds=30,
+            eval_metric='mlogloss',
+            callbacks=[_PruningCallback(trial)],
+            random_state=42,
+        )
+        model.fit(X_fit, y_fit, eval_set=[(X_val, y_val)], verbose=False)
+        trial.set_user_attr('n_estimators', model.best_iteration + 1)
+        return f1_score(y_val, model.predict(X_val), average='weighted')
+
+    # Trials are checkpointed in the study storage, so an interrupted search over the same data and
+    # search space resumes where it stopped.
+    study = optuna.create_study(
+        study_name=study_name,
+        storage=storage,
+        load_if_exists=True,
+        direction='maximize',
+        sampler=optuna.samplers.TPESampler(seed=42),
+        pruner=optuna.pruners.MedianPruner(n_startup_trials=5, n_warmup_steps=20),
+    )
+    finished = [t for t in study.trials if t.state in (optuna.trial.TrialState.COMPLETE, optuna.trial.TrialState.PRUNED)]
+    if len(finished) < n_trials:
+        study.optimize(objective, n_trials=n_trials - len(finished))
+    print(f"Optuna study {study_name}: {len(study.trials)} trials, best validation weighted F1 {study.best_value:.4f}")
+
+    best_params = dict(study.best_params, n_estimators=study.best_trial.user_attrs['n_estimators'])
+    best_model = XGBClassifier(**best_params, tree_method='hist', random_state=42)
+    best_model.fit(X_train, y_train)
+    return best_model, best_params
+
+
+def train_and_save_model(search="optuna", n_trials=40, study_storage=RISK_STUDY_STORAGE, artifact_dir=None,
+                         roc_plot_path=None, registry=None, publish=True, data_path=RISK_DATASET):
+    """Train the risk model and save its artifacts.
+
+    By default the artifacts are written as a new version in the model registry and
+    published with an atomic pointer switch; pass artifact_dir to write loose pickles instead.
+    """
+    staging_dir = None
     try:
-        data = pd.read_csv('Pregnancy_Risk_Prediction_Dataset.csv')
+        data = read_risk_csv(data_path)
 
         label_encoder = LabelEncoder()
         data['RiskLevel'] = label_encoder.fit_transform(data['RiskLevel'])
 
-        categorical_cols = data.select_dtypes(include=['object']).columns.tolist()
+        categorical_cols = data.select_dtypes(include=['object', 'category']).columns.tolist()
         if 'RiskLevel' in categorical_cols:
             categorical_cols.remove('RiskLevel')
         if 'Hormonal_Symptoms' in categorical_cols:
@@ -27,20 +160,16 @@ def train_and_save_model():
         data = data.drop(columns=['Hormonal_Symptoms'], errors='ignore')
         original_categorical_cols = categorical_cols.copy()
 
-        onehot_encoder = OneHotEncoder(handle_unknown='ignore', sparse_output=False)
-        if categorical_cols:
-            encoded_features = onehot_encoder.fit_transform(data[categorical_cols])
-            encoded_df = pd.DataFrame(encoded_features, columns=onehot_encoder.get_feature_names_out(categorical_cols))
-            data = pd.concat([data.drop(columns=categorical_cols), encoded_df], axis=1)
-
         X = data.drop(columns=['RiskLevel'])
         y = data['RiskLevel']
 
         X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
 
-        scaler = MinMaxScaler()
-        X_train = pd.DataFrame(scaler.fit_transform(X_train), columns=X.columns)
-        X_test = pd.DataFrame(scaler.transform(X_test), columns=X.columns)
+        # Training goes through the same compiled pipeline RiskPredictor serves with.
+        onehot_encoder, scaler = fit_preprocessing(X_train, original_categorical_cols)
+        pipeline = FeaturePipeline.from_fitted(scaler, onehot_encoder, original_categorical_cols)
+        X_train = pd.DataFrame(pipeline.transform_frame(X_train), columns=pipeline.feature_names)
+        X_test = pd.DataFrame(pipeline.transform_frame(X_test), columns=pipeline.feature_names)
 
         smote = SMOTE(random_state=42, sampling_strategy='auto')
         X_train, y_train = smote.fit_resample(X_train, y_train)
@@ -48,36 +177,33 @@ def train_and_save_model():
         class_weights = dict(zip(np.unique(y_train), np.bincount(y_train)))
         class_weights = {k: max(class_weights.values()) / v for k, v in class_weights.items()}
 
-        param_grid = {
-            'n_estimators': [100, 200, 300],
-            'max_depth': [3, 5, 7],
-            'learning_rate': [0.01, 0.1, 0.2],
-            'subsample': [0.8, 1.0],
-            'colsample_bytree': [0.8, 1.0],
-        }
-        xgb_model = GridSearchCV(
-            XGBClassifier(random_state=42),
-            param_grid,
-            cv=5,
-            scoring='f1_weighted',
-            n_jobs=-1
-        )
-        xgb_model.fit(X_train, y_train)
+        search_start = time.perf_counter()
+        if search == "grid":
+            best_model, best_params = _grid_search(X_train, y_train)
+        elif search == "optuna":
+            best_model, best_params = _optuna_search(X_train, y_train, n_trials=n_trials, storage=study_storage)
+        else:
+            raise ValueError(f"Unknown search mode: {search}")
+        search_seconds = time.perf_counter() - search_start
 
-        joblib.dump(xgb_model.best_estimator_, "pregnancy_risk_model.pkl")
-        joblib.dump(onehot_encoder, "onehot_encoder.pkl")
-        joblib.dump(label_encoder, "label_encoder.pkl")
-        joblib.dump(scaler, "scaler.pkl")
-        joblib.dump(original_categorical_cols, "categorical_cols.pkl")
+        if artifact_dir is None:
+            registry = registry or ModelRegistry()
+            artifact_dir = staging_dir = registry.stage()
+        os.makedirs(artifact_dir, exist_ok=True)
+        joblib.dump(best_model, os.path.join(artifact_dir, "pregnancy_risk_model.pkl"))
+        joblib.dump(onehot_encoder, os.path.join(artifact_dir, "onehot_encoder.pkl"))
+        joblib.dump(label_encoder, os.path.join(artifact_dir, "label_encoder.pkl"))
+        joblib.dump(scaler, os.path.join(artifact_dir, "scaler.pkl"))
+        joblib.dump(original_categorical_cols, os.path.join(artifact_dir, "categorical_cols.pkl"))
 
         print("✅ Machine learning model trained and saved successfully.")
 
-        y_pred = xgb_model.best_estimator_.predict(X_test)
+        y_pred = best_model.predict(X_test)
         print("Classification Report:\n", classification_report(y_test, y_pred))
         print("Confusion Matrix:\n", confusion_matrix(y_test, y_pred))
 
         y_test_bin = label_binarize(y_test, classes=[0, 1, 2])
-        y_prob = xgb_model.best_estimator_.predict_proba(X_test)
+        y_prob = best_model.predict_proba(X_test)
         fpr, tpr, roc_auc = {}, {}, {}
         for i in range(y_test_bin.shape[1]):
             fpr[i], tpr[i], _ = roc_curve(y_test_bin[:, i], y_prob[:, i])
@@ -91,11 +217,30 @@ def train_and_save_model():
         plt.ylabel('True Positive Rate')
         plt.title('ROC Curve')
         plt.legend()
-        plt.show()
+        plt.savefig(roc_plot_path or os.path.join(artifact_dir, "roc_curve.png"))
+        plt.close()
 
         roc_auc_overall = roc_auc_score(y_test_bin, y_prob, multi_class='ovr', average='macro')
         print("Overall ROC AUC Score:", roc_auc_overall)
 
+        metrics = {
+            "search": search,
+            "search_seconds": search_seconds,
+            "weighted_f1": f1_score(y_test, y_pred, average='weighted'),
+            "roc_auc": roc_auc_overall,
+            # Calibration of the served probabilities, not just their ranking.
+            "log_loss": log_loss(y_test, y_prob),
+            "brier_score": float(np.mean(np.sum((y_prob - y_test_bin) ** 2, axis=1))),
+            "best_params": best_params,
+        }
+        with open(os.path.join(artifact_dir, "risk_model_metrics.json"), "w") as f:
+            json.dump(metrics, f, indent=2)
+        print(f"⏱️ {search} search took {search_seconds:.1f} s, test weighted F1 {metrics['weighted_f1']:.4f}")
+
+        if staging_dir is not None:
+            registry.commit(staging_dir, pipeline.feature_names, label_encoder.classes_, metrics, activate=publish)
+            staging_dir = None
+
         return X_test
 
     except Exception as e:
@@ -103,40 +248,444 @@ def train_and_save_model():
         traceback.print_exc()
         return None
 
-def predict_risk_level(input_data):
+    finally:
+        if staging_dir is not None:
+            shutil.rmtree(staging_dir, ignore_errors=True)
+
+def _tuned_params(registry):
+    """Hyperparameters of the published version (tuned on the small dataset), else the defaults."""
+    version = registry.current_version()
+    if version:
+        best_params = registry.manifest(version).get("metrics", {}).get("best_params")
+        if best_params:
+            return dict(best_params)
+    return dict(DEFAULT_OUT_OF_CORE_PARAMS)
+
+
+def train_out_of_core(data_path, chunk_rows=DEFAULT_CHUNK_ROWS, params=None, registry=None, publish=True,
+                      cache_dir=None):
+    """Train on a CSV/Parquet file too large for memory and publish it as a registry version.
+
+    The scaler is fitted in one streaming pass and XGBoost trains from an external-memory
+    DMatrix fed chunk by chunk. SMOTE needs the whole minority class in memory, so class
+    balance comes from per-row weights instead; every fifth row is held out for evaluation.
+    """
+    registry = registry or ModelRegistry()
+    staging_dir = None
     try:
-        rf_model = joblib.load("pregnancy_risk_model.pkl")
-        onehot_encoder = joblib.load("onehot_encoder.pkl")
-        label_encoder = joblib.load("label_encoder.pkl")
-        scaler = joblib.load("scaler.pkl")
-        original_categorical_cols = joblib.load("categorical_cols.pkl")
+        start = time.perf_counter()
+        scaler, label_counts, rows = scan_risk_data(data_path, chunk_rows)
+        pipeline = FeaturePipeline.from_fitted(scaler)
+        label_encoder = LabelEncoder().fit(sorted(label_counts))
+        classes = list(label_encoder.classes_)
+        counts = np.array([label_counts[label] for label in classes], dtype=np.float64)
+        class_weights = (counts.max() / counts).astype(np.float32)
+
+        params = dict(params or _tuned_params(registry))
+        num_boost_round = int(params.pop("n_estimators", DEFAULT_OUT_OF_CORE_PARAMS["n_estimators"]))
+        booster_params = {
+            **params,
+            "objective": "multi:softprob",
+            "num_class": len(classes),
+            "tree_method": "hist",
+            "eval_metric": "mlogloss",
+            "seed": 42,
+        }
+
+        with tempfile.TemporaryDirectory(dir=cache_dir) as cache:
+            dtrain = ExtMemQuantileDMatrix(RiskChunkIter(
+                data_path, pipeline, classes, "train", class_weights, chunk_rows, os.path.join(cache, "train")
+            ))
+            booster = xgb_train(booster_params, dtrain, num_boost_round)
+            del dtrain
+            model_path = os.path.join(cache, "model.json")
+            booster.save_model(model_path)
+            best_model = XGBClassifier()
+            best_model.load_model(model_path)
+        train_seconds = time.perf_counter() - start
+
+        # Evaluate on the held-out rows, streamed the same way.
+        test_iter = RiskChunkIter(data_path, pipeline, classes, "test", chunk_rows=chunk_rows)
+        y_test, y_prob = [], []
+        for chunk in iter_split_chunks(data_path, "test", chunk_rows):
+            X_chunk, y_chunk = test_iter.transform(chunk)
+            y_test.append(y_chunk)
+            y_prob.append(best_model.predict_proba(X_chunk))
+        y_test, y_prob = np.concatenate(y_test), np.concatenate(y_prob)
+        y_pred = y_prob.argmax(axis=1)
+        y_test_bin = label_binarize(y_test, classes=list(range(len(classes))))
+        print("Classification Report:\n", classification_report(y_test, y_pred))
+
+        metrics = {
+            "search": "out-of-core",
+            "train_rows": rows,
+            "train_seconds": train_seconds,
+            "weighted_f1": f1_score(y_test, y_pred, average='weighted'),
+            "roc_auc": roc_auc_score(y_test_bin, y_prob, multi_class='ovr', average='macro'),
+            "log_loss": log_loss(y_test, y_prob, labels=list(range(len(classes)))),
+            "brier_score": float(np.mean(np.sum((y_prob - y_test_bin) ** 2, axis=1))),
+            "best_params": dict(params, n_estimators=num_boost_round),
+        }
+
+        staging_dir = registry.stage()
+        joblib.dump(best_model, os.path.join(staging_dir, RISK_ARTIFACT_FILES["model"]))
+        joblib.dump(OneHotEncoder(handle_unknown='ignore', sparse_output=False),
+                    os.path.join(staging_dir, RISK_ARTIFACT_FILES["onehot_encoder"]))
+        joblib.dump(label_encoder, os.path.join(staging_dir, RISK_ARTIFACT_FILES["label_encoder"]))
+        joblib.dump(scaler, os.path.join(staging_dir, RISK_ARTIFACT_FILES["scaler"]))
+        joblib.dump([], os.path.join(staging_dir, RISK_ARTIFACT_FILES["categorical_cols"]))
+        with open(os.path.join(staging_dir, "risk_model_metrics.json"), "w") as f:
+            json.dump(metrics, f, indent=2)
+        version = registry.commit(staging_dir, RISK_FEATURES, classes, metrics, activate=publish)
+        staging_dir = None
+        print(f"✅ Out-of-core model {version} trained on {rows} rows in {train_seconds:.1f} s, "
+              f"held-out weighted F1 {metrics['weighted_f1']:.4f}")
+        return version
+
+    except Exception as e:
+        print("❌ Error training machine learning model out of core:", e)
+        traceback.print_exc()
+        return None
+
+    finally:
+        if staging_dir is not None:
+            shutil.rmtree(staging_dir, ignore_errors=True)
 
-        input_df = pd.DataFrame([input_data])
 
-        missing_categorical_cols = set(original_categorical_cols) - set(input_df.columns)
-        for col in missing_categorical_cols:
-            input_df[col] = ""
+class RiskPredictor:
+    """Keeps the risk-model artifacts in memory and reloads them when the served version changes on disk.
 
-        if original_categorical_cols:
-            input_encoded = onehot_encoder.transform(input_df[original_categorical_cols])
-            input_encoded_df = pd.DataFrame(input_encoded, columns=onehot_encoder.get_feature_names_out(original_categorical_cols))
-            input_df = pd.concat([input_df.drop(columns=original_categorical_cols), input_encoded_df], axis=1)
+    With a registry, the pinned version (or else the published CURRENT one) is served;
+    without one, or before anything is published, the loose pickles in artifact_dir are.
+    """
 
-        for col in scaler.feature_names_in_:
-            if col not in input_df.columns:
-                input_df[col] = 0
-        input_df = input_df[scaler.feature_names_in_]
-        print("Expected Features:", scaler.feature_names_in_)
-        print("Actual Features:", input_df.columns)
+    def __init__(self, artifact_dir=".", reload_check_interval=1.0, registry=None, version=None):
+        self.artifact_dir = artifact_dir
+        self.reload_check_interval = reload_check_interval
+        self.registry = registry
+        self.pinned_version = version
+        # Request fields the caller will always send; versions whose pipeline needs others are rejected at load.
+        self.required_inputs = None
+        self.version = None
+        self._lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._artifacts = None
+        self._source = None
+        self._last_check = 0.0
 
-        input_scaled = scaler.transform(input_df)
+        self.load_count = 0
+        self.last_load_seconds = None
+        self.loaded_at = None
+        self.prediction_count = 0
+        self.total_predict_seconds = 0.0
+        self.last_predict_seconds = None
+        self.batch_count = 0
+        self.batch_row_count = 0
+        self.total_batch_seconds = 0.0
+        self.explained_row_count = 0
+        self.total_explain_seconds = 0.0
 
-        prediction = rf_model.predict(input_scaled)
-        predicted_label = label_encoder.inverse_transform(prediction)
+    def _resolve_source(self):
+        if self.registry is not None:
+            version = self.pinned_version or self.registry.current_version()
+            if version:
+                return version, self.registry.version_dir(version)
+        return None, self.artifact_dir
 
-        return predicted_label[0]
+    def _source_signature(self):
+        version, directory = self._resolve_source()
+        mtimes = tuple(os.stat(os.path.join(directory, filename)).st_mtime_ns for filename in RISK_ARTIFACT_FILES.values())
+        return version, directory, mtimes
+
+    def _load_locked(self):
+        start = time.perf_counter()
+        source = self._source_signature()
+        version, directory, _ = source
+        artifacts = {name: joblib.load(os.path.join(directory, filename)) for name, filename in RISK_ARTIFACT_FILES.items()}
+        if version is not None:
+            manifest = self.registry.verify(version)
+            if manifest["feature_names"] != list(artifacts["scaler"].feature_names_in_):
+                raise ModelRegistryError(f"{version}: scaler features do not match the manifest")
+        plan = FeaturePipeline.from_fitted(artifacts["scaler"], artifacts["onehot_encoder"], artifacts["categorical_cols"])
+        plan.check_model(artifacts["model"])
+        if self.required_inputs is not None:
+            plan.check_inputs(self.required_inputs)
+        artifacts["plan"] = plan
+
+        self._artifacts = artifacts
+        self._source = source
+        self.version = version
+        self.load_count += 1
+        self.last_load_seconds = time.perf_counter() - start
+        self.loaded_at = time.time()
+        print(f"✅ Risk model {version or directory} loaded in {self.last_load_seconds * 1000:.1f} ms")
+
+    def load(self):
+        with self._lock:
+            self._load_locked()
+            self._last_check = time.monotonic()
+
+    def pin(self, version):
+        """Serve a specific registry version regardless of CURRENT; None goes back to following CURRENT."""
+        if version is not None and (self.registry is None or version not in self.registry.versions()):
+            raise ModelRegistryError(f"Unknown model version: {version}")
+        with self._lock:
+            previous = self.pinned_version
+            self.pinned_version = version
+            try:
+                self._load_locked()
+            except Exception:
+                self.pinned_version = previous
+                raise
+            self._last_check = time.monotonic()
+
+    def _get_artifacts(self):
+        now = time.monotonic()
+        if self._artifacts is not None and now - self._last_check < self.reload_check_interval:
+            return self._artifacts
+
+        with self._lock:
+            self._last_check = now
+            if self._artifacts is None:
+                self._load_locked()
+            else:
+                try:
+                    if self._source_signature() != self._source:
+                        print("🔄 Risk model artifacts changed on disk, reloading...")
+                        self._load_locked()
+                except Exception as e:
+                    # Loose pickles may still be mid-write from a retrain; keep serving the old ones.
+                    print("❌ Error reloading risk model artifacts, keeping previous version:", e)
+            return self._artifacts
+
+    def predict(self, input_data):
+        start = time.perf_counter()
+        artifacts = self._get_artifacts()
+        with stage_timer("preprocess", "risk_model"):
+            input_vector = artifacts["plan"].transform_one(input_data)
+
+        with stage_timer("predict", "risk_model"):
+            prediction = artifacts["model"].predict(input_vector)
+        predicted_label = artifacts["label_encoder"].classes_[prediction[0]]
+
+        elapsed = time.perf_counter() - start
+        with self._stats_lock:
+            self.prediction_count += 1
+            self.total_predict_seconds += elapsed
+            self.last_predict_seconds = elapsed
+
+        return predicted_label
+
+    def predict_batch(self, records):
+        start = time.perf_counter()
+        if not records:
+            return []
+        artifacts = self._get_artifacts()
+
+        with stage_timer("preprocess", "risk_model"):
+            X = artifacts["plan"].transform_batch(records)
+        with stage_timer("predict", "risk_model"):
+            predictions = artifacts["model"].predict(X)
+        labels = artifacts["label_encoder"].classes_[predictions].tolist()
+
+        elapsed = time.perf_counter() - start
+        with self._stats_lock:
+            self.batch_count += 1
+            self.batch_row_count += len(records)
+            self.total_batch_seconds += elapsed
+
+        return labels
+
+    def coerce_record(self, record):
+        """record with its model inputs converted to the served pipeline's types; FeatureSchemaError if it can't be."""
+        return self._get_artifacts()["plan"].coerce(record)
+
+    def score_batch(self, records, explain=False, top_k=3, approximate=False):
+        """Label and class probabilities per record, plus the top_k feature contributions to the predicted class.
+
+        Contributions are XGBoost's native pred_contribs in margin (log-odds) space: exact
+        TreeSHAP by default, or the much cheaper per-path approximation with approximate=True.
+        """
+        start = time.perf_counter()
+        if not records:
+            return []
+        artifacts = self._get_artifacts()
+        plan = artifacts["plan"]
+        class_names = [str(label) for label in artifacts["label_encoder"].classes_]
+
+        with stage_timer("preprocess", "risk_model"):
+            X = plan.transform_batch(records)
+        with stage_timer("predict", "risk_model"):
+            probabilities = artifacts["model"].predict_proba(X)
+        predicted = probabilities.argmax(axis=1)
+        results = [
+            {"riskLevel": class_names[k], "probabilities": dict(zip(class_names, row.tolist()))}
+            for k, row in zip(predicted, probabilities)
+        ]
+
+        if explain:
+            explain_start = time.perf_counter()
+            with stage_timer("explain", "risk_model"):
+                contributions = artifacts["model"].get_booster().predict(
+                    DMatrix(X, feature_names=plan.feature_names), pred_contribs=True, approx_contribs=approximate
+                )
+            # (rows, classes, features + bias); keep the predicted class and drop the bias column.
+            chosen = contributions[np.arange(len(records)), predicted, :-1]
+            top = np.argsort(-np.abs(chosen), axis=1)[:, :top_k]
+            for i, result in enumerate(results):
+                result["topFactors"] = [
+                    {
+                        "feature": plan.feature_names[j],
+                        "value": records[i].get(plan.feature_names[j]),
+                        "contribution": float(chosen[i, j]),
+                    }
+                    for j in top[i]
+                ]
+            explain_elapsed = time.perf_counter() - explain_start
+
+        elapsed = time.perf_counter() - start
+        with self._stats_lock:
+            self.batch_count += 1
+            self.batch_row_count += len(records)
+            self.total_batch_seconds += elapsed
+            if explain:
+                self.explained_row_count += len(records)
+                self.total_explain_seconds += explain_elapsed
+
+        return results
+
+    def stats(self):
+        with self._stats_lock:
+            count = self.prediction_count
+            total = self.total_predict_seconds
+            last = self.last_predict_seconds
+            batch_count = self.batch_count
+            batch_rows = self.batch_row_count
+            batch_total = self.total_batch_seconds
+            explained_rows = self.explained_row_count
+            explain_total = self.total_explain_seconds
+        return {
+            "version": self.version,
+            "pinned_version": self.pinned_version,
+            "load_count": self.load_count,
+            "last_load_ms": None if self.last_load_seconds is None else self.last_load_seconds * 1000,
+            "loaded_at": self.loaded_at,
+            "prediction_count": count,
+            "avg_predict_ms": total / count * 1000 if count else None,
+            "last_predict_ms": None if last is None else last * 1000,
+            "batch_count": batch_count,
+            "batch_row_count": batch_rows,
+            "avg_batch_row_ms": batch_total / batch_rows * 1000 if batch_rows else None,
+            "explained_row_count": explained_rows,
+            "avg_explain_row_ms": explain_total / explained_rows * 1000 if explained_rows else None,
+        }
+
+
+def export_lean_model(output_dir="lean_model", predictor=None):
+    """Write the served model as XGBoost JSON plus its serialized FeaturePipeline for lean_risk_model.LeanRiskModel."""
+    from lean_risk_model import LEAN_MODEL_FILE, LEAN_PREPROCESS_FILE
+
+    predictor = predictor or default_risk_predictor
+    artifacts = predictor._get_artifacts()
+    plan = artifacts["plan"]
+
+    os.makedirs(output_dir, exist_ok=True)
+    artifacts["model"].get_booster().save_model(os.path.join(output_dir, LEAN_MODEL_FILE))
+    preprocess = {
+        "version": predictor.version,
+        "class_labels": [str(label) for label in artifacts["label_encoder"].classes_],
+        **plan.to_dict(),
+    }
+    with open(os.path.join(output_dir, LEAN_PREPROCESS_FILE), "w") as f:
+        json.dump(preprocess, f, indent=2)
+    print(f"✅ Lean risk model exported to {output_dir}")
+    return output_dir
+
+
+class ShadowScorer:
+    """Re-scores live traffic with a candidate model on a background thread and tracks agreement with the primary."""
+
+    def __init__(self, candidate, max_pending=1000):
+        self.candidate = candidate
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="shadow-scorer")
+        self._lock = threading.Lock()
+        self._pending = 0
+        self.compared = 0
+        self.agreed = 0
+        self.dropped = 0
+        self.errors = 0
+        self.disagreements = Counter()
+
+    def submit(self, records, primary_labels):
+        """Queue a comparison and return immediately; drops work rather than grow without bound."""
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self.dropped += len(records)
+                return
+            self._pending += 1
+        self._executor.submit(self._score, records, primary_labels)
+
+    def _score(self, records, primary_labels):
+        try:
+            candidate_labels = self.candidate.predict_batch(records)
+            with self._lock:
+                for primary, candidate in zip(primary_labels, candidate_labels):
+                    self.compared += 1
+                    if primary == candidate:
+                        self.agreed += 1
+                    else:
+                        self.disagreements[f"{primary} -> {candidate}"] += 1
+        except Exception as e:
+            with self._lock:
+                self.errors += 1
+            print("❌ Shadow scoring failed:", e)
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "candidate_version": self.candidate.pinned_version,
+                "compared": self.compared,
+                "agreement_rate": self.agreed / self.compared if self.compared else None,
+                "disagreements": dict(self.disagreements),
+                "pending": self._pending,
+                "dropped": self.dropped,
+                "errors": self.errors,
+            }
+
+
+default_risk_predictor = RiskPredictor(registry=ModelRegistry(), version=os.environ.get("RISK_MODEL_VERSION") or None)
+
+
+def predict_risk_level(input_data):
+    try:
+        return default_risk_predictor.predict(input_data)
 
     except Exception as e:
         print("❌ Error predicting risk level:", e)
         traceback.print_exc()
-        return None
\ No newline at end of file
+        return None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train the pregnancy risk model")
+    parser.add_argument("--search", choices=["optuna", "grid"], default="optuna")
+    parser.add_argument("--trials", type=int, default=40, help="total Optuna trials, including resumed ones")
+    parser.add_argument("--storage", default=RISK_STUDY_STORAGE, help="Optuna storage URL used to checkpoint trials")
+    parser.add_argument("--export-lean", metavar="DIR", help="skip training and export the served model for lean_risk_model")
+    parser.add_argument("--data", default=RISK_DATASET, help="training data (CSV, or Parquet with --out-of-core)")
+    parser.add_argument("--out-of-core", action="store_true", help="stream the data instead of loading it into memory")
+    parser.add_argument("--chunk-rows", type=int, default=DEFAULT_CHUNK_ROWS)
+    args = parser.parse_args()
+    if args.export_lean:
+        export_lean_model(args.export_lean)
+    elif args.out_of_core:
+        train_out_of_core(args.data, chunk_rows=args.chunk_rows)
+    else:
+        train_and_save_model(search=args.search, n_trials=args.trials, study_storage=args.storage, data_path=args.data)
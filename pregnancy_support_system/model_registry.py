@@ -0,0 +1,193 @@
+"""Versioned risk-model artifact bundles with an atomically switched CURRENT pointer.
+
+Layout under the registry root (default ``models/``)::
+
+    versions/<version>/   the five pickles plus manifest.json (feature names,
+                          class labels, metrics and a SHA-256 per file)
+    CURRENT               name of the published version
+    HISTORY               JSON list of previously published versions, for rollback
+
+Version directories are never modified after publishing, so a reader always
+sees a consistent model/scaler/encoder set.
+
+    python model_registry.py list
+    python model_registry.py import-legacy      # bundle the pickles in the working directory
+    python model_registry.py activate <version>
+    python model_registry.py rollback
+"""
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+
+RISK_ARTIFACT_FILES = {
+    "model": "pregnancy_risk_model.pkl",
+    "onehot_encoder": "onehot_encoder.pkl",
+    "label_encoder": "label_encoder.pkl",
+    "scaler": "scaler.pkl",
+    "categorical_cols": "categorical_cols.pkl",
+}
+MODEL_REGISTRY_DIR = os.environ.get("MODEL_REGISTRY_DIR", "models")
+MANIFEST_FILE = "manifest.json"
+
+
+class ModelRegistryError(Exception):
+    pass
+
+
+def _sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _write_atomic(path, text):
+    directory = os.path.dirname(path) or "."
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+    os.chmod(tmp_path, 0o644)
+    with os.fdopen(fd, "w") as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+class ModelRegistry:
+    def __init__(self, root=MODEL_REGISTRY_DIR):
+        self.root = root
+        self.versions_dir = os.path.join(root, "versions")
+        self.current_path = os.path.join(root, "CURRENT")
+        self.history_path = os.path.join(root, "HISTORY")
+
+    def version_dir(self, version):
+        return os.path.join(self.versions_dir, version)
+
+    def versions(self):
+        if not os.path.isdir(self.versions_dir):
+            return []
+        return sorted(name for name in os.listdir(self.versions_dir) if not name.startswith("."))
+
+    def current_version(self):
+        try:
+            with open(self.current_path) as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def manifest(self, version):
+        with open(os.path.join(self.version_dir(version), MANIFEST_FILE)) as f:
+            return json.load(f)
+
+    def stage(self):
+        """Return a fresh staging directory for a training run to write its pickles into."""
+        os.makedirs(self.versions_dir, exist_ok=True)
+        staging_dir = tempfile.mkdtemp(dir=self.versions_dir, prefix=".staging-")
+        os.chmod(staging_dir, 0o755)
+        return staging_dir
+
+    def commit(self, staging_dir, feature_names, class_labels, metrics=None, activate=True):
+        """Hash and manifest a staged bundle, move it into place in one rename and optionally publish it."""
+        version = time.strftime("v%Y%m%d-%H%M%S")
+        suffix = 1
+        while os.path.exists(self.version_dir(version)):
+            suffix += 1
+            version = time.strftime("v%Y%m%d-%H%M%S") + f"-{suffix}"
+
+        manifest = {
+            "version": version,
+            "created_at": time.time(),
+            "feature_names": list(feature_names),
+            "class_labels": list(class_labels),
+            "metrics": metrics or {},
+            "files": {name: {"path": filename, "sha256": _sha256(os.path.join(staging_dir, filename))}
+                      for name, filename in RISK_ARTIFACT_FILES.items()},
+        }
+        _write_atomic(os.path.join(staging_dir, MANIFEST_FILE), json.dumps(manifest, indent=2, default=str))
+        os.rename(staging_dir, self.version_dir(version))
+
+        if activate:
+            self.activate(version)
+        return version
+
+    def activate(self, version):
+        if version not in self.versions():
+            raise ModelRegistryError(f"Unknown model version: {version}")
+        previous = self.current_version()
+        if previous == version:
+            return
+        if previous:
+            _write_atomic(self.history_path, json.dumps(self.history() + [previous]))
+        _write_atomic(self.current_path, version)
+        print(f"✅ Risk model version {version} published")
+
+    def history(self):
+        try:
+            with open(self.history_path) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return []
+
+    def rollback(self):
+        history = self.history()
+        if not history:
+            raise ModelRegistryError("No previous model version to roll back to")
+        version = history.pop()
+        _write_atomic(self.current_path, version)
+        _write_atomic(self.history_path, json.dumps(history))
+        print(f"↩️ Risk model rolled back to {version}")
+        return version
+
+    def verify(self, version):
+        """Check every artifact against the manifest hashes; returns the manifest."""
+        manifest = self.manifest(version)
+        for name, entry in manifest["files"].items():
+            if _sha256(os.path.join(self.version_dir(version), entry["path"])) != entry["sha256"]:
+                raise ModelRegistryError(f"{version}/{entry['path']} does not match its manifest hash")
+        return manifest
+
+    def import_directory(self, artifact_dir=".", metrics=None, activate=True):
+        """Bundle an existing set of loose pickles (e.g. the legacy working-directory ones) as a new version."""
+        import joblib
+
+        staging_dir = self.stage()
+        try:
+            for filename in RISK_ARTIFACT_FILES.values():
+                shutil.copy2(os.path.join(artifact_dir, filename), os.path.join(staging_dir, filename))
+            scaler = joblib.load(os.path.join(staging_dir, RISK_ARTIFACT_FILES["scaler"]))
+            label_encoder = joblib.load(os.path.join(staging_dir, RISK_ARTIFACT_FILES["label_encoder"]))
+            return self.commit(staging_dir, scaler.feature_names_in_, label_encoder.classes_, metrics, activate)
+        except Exception:
+            shutil.rmtree(staging_dir, ignore_errors=True)
+            raise
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Manage risk-model versions")
+    parser.add_argument("--root", default=MODEL_REGISTRY_DIR)
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("list")
+    import_parser = commands.add_parser("import-legacy")
+    import_parser.add_argument("--from-dir", default=".")
+    activate_parser = commands.add_parser("activate")
+    activate_parser.add_argument("version")
+    commands.add_parser("rollback")
+    args = parser.parse_args()
+
+    registry = ModelRegistry(args.root)
+    if args.command == "list":
+        current = registry.current_version()
+        for version in registry.versions():
+            metrics = registry.manifest(version).get("metrics", {})
+            marker = "*" if version == current else " "
+            print(f"{marker} {version}  weighted_f1={metrics.get('weighted_f1', 'n/a')}")
+    elif args.command == "import-legacy":
+        print(registry.import_directory(args.from_dir))
+    elif args.command == "activate":
+        registry.activate(args.version)
+    elif args.command == "rollback":
+        registry.rollback()
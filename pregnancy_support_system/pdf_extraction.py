@@ -0,0 +1,275 @@
+import asyncio
+import hashlib
+import io
+import multiprocessing
+import os
+import signal
+import tempfile
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+
+import pdfplumber
+
+from metrics import stage_timer
+
+
+def load_pdf_extraction_config():
+    return {
+        "max_workers": int(os.environ.get("PDF_WORKERS", str(min(4, os.cpu_count() or 1)))),
+        "max_pages": int(os.environ.get("PDF_MAX_PAGES", "50")),
+        "timeout": float(os.environ.get("PDF_TIMEOUT_SECONDS", "30")),
+        "pages_per_task": int(os.environ.get("PDF_PAGES_PER_TASK", "8")),
+        "ocr": os.environ.get("PDF_OCR", "1") == "1",
+        "ocr_dpi": int(os.environ.get("PDF_OCR_DPI", "300")),
+        "ocr_lang": os.environ.get("PDF_OCR_LANG", "eng"),
+        "ocr_min_chars": int(os.environ.get("PDF_OCR_MIN_CHARS", "10")),
+        "ocr_cache_size": int(os.environ.get("PDF_OCR_CACHE_SIZE", "512")),
+        "tesseract_cmd": os.environ.get("TESSERACT_CMD") or None,
+    }
+
+
+class PdfExtractionError(Exception):
+    pass
+
+
+def _warm_up():
+    return os.getpid()
+
+
+@contextmanager
+def _deadline(deadline):
+    """Abort the worker's task once deadline (a time.time() value) passes.
+
+    asyncio.wait_for in the parent only stops waiting; without this an abandoned parse
+    would keep its worker busy. Uses SIGALRM, so it applies in the worker's main thread
+    on Unix; elsewhere only tasks that start after the deadline are skipped.
+    """
+    remaining = deadline - time.time()
+    if remaining <= 0:
+        raise PdfExtractionError("PDF extraction deadline passed before the task started")
+    if not hasattr(signal, "setitimer"):
+        yield
+        return
+
+    def expire(signum, frame):
+        raise PdfExtractionError("PDF extraction deadline passed")
+
+    previous = signal.signal(signal.SIGALRM, expire)
+    signal.setitimer(signal.ITIMER_REAL, remaining)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+def _write_temp_pdf(pdf_bytes):
+    fd, path = tempfile.mkstemp(prefix="report-", suffix=".pdf")
+    with os.fdopen(fd, "wb") as f:
+        f.write(pdf_bytes)
+    return path
+
+
+def _count_pages(pdf_path, deadline):
+    with _deadline(deadline), pdfplumber.open(pdf_path) as pdf:
+        return len(pdf.pages)
+
+
+def _page_image_hashes(pdf_path, indices):
+    """Hash of what each page renders from (content stream plus embedded images), without rasterizing it."""
+    import fitz
+
+    hashes = []
+    with fitz.open(pdf_path) as doc:
+        for index in indices:
+            page = doc[index]
+            digest = hashlib.sha256(page.read_contents())
+            digest.update(repr(tuple(page.rect)).encode())
+            for image in page.get_images(full=True):
+                digest.update(doc.xref_stream_raw(image[0]) or b"")
+            hashes.append(digest.hexdigest())
+    return hashes
+
+
+def _extract_page_range(pdf_path, start, stop, deadline, ocr_min_chars=None):
+    """Text of each page; with ocr_min_chars, pages with less text come back as (None, page image hash)."""
+    pages = []
+    with _deadline(deadline):
+        with pdfplumber.open(pdf_path) as pdf:
+            for page in pdf.pages[start:stop]:
+                text = page.extract_text() or ""
+                pages.append((None, None) if ocr_min_chars is not None and len(text.strip()) < ocr_min_chars
+                             else (text, None))
+        scanned = [start + i for i, (text, _) in enumerate(pages) if text is None]
+        if scanned:
+            for index, key in zip(scanned, _page_image_hashes(pdf_path, scanned)):
+                pages[index - start] = (None, key)
+    return pages
+
+
+def _ocr_page(pdf_path, index, deadline, dpi=300, lang="eng", tesseract_cmd=None):
+    """Rasterize one page with PyMuPDF and OCR it with Tesseract."""
+    import fitz
+    import pytesseract
+    from PIL import Image
+
+    if tesseract_cmd:
+        pytesseract.pytesseract.tesseract_cmd = tesseract_cmd
+    # Parallelism comes from the process pool; keep each Tesseract to one thread.
+    os.environ["OMP_THREAD_LIMIT"] = "1"
+    with _deadline(deadline), fitz.open(pdf_path) as doc:
+        pixmap = doc[index].get_pixmap(dpi=dpi, colorspace=fitz.csGRAY)
+    image = Image.frombytes("L", (pixmap.width, pixmap.height), pixmap.samples)
+    remaining = deadline - time.time()
+    if remaining <= 0:
+        raise PdfExtractionError("PDF extraction deadline passed")
+    try:
+        # pytesseract's own timeout, not SIGALRM: it also kills the tesseract subprocess.
+        return pytesseract.image_to_string(image, lang=lang, timeout=remaining)
+    except Exception as e:
+        # pytesseract's exceptions do not survive pickling back to the parent, which breaks the pool.
+        raise PdfExtractionError(f"{type(e).__name__}: {e}") from None
+
+
+def extract_pdf_text_sync(pdf_bytes, max_pages=None):
+    """Single-process extraction, for scripts that are not running an event loop."""
+    with pdfplumber.open(io.BytesIO(pdf_bytes)) as pdf:
+        pages = pdf.pages if max_pages is None else pdf.pages[:max_pages]
+        return ' '.join(text for text in (page.extract_text() for page in pages) if text)
+
+
+class PdfExtractor:
+    """Runs pdfplumber in a bounded process pool so CPU-bound parsing never blocks the event loop.
+
+    Pages without a text layer (scans) are rendered with PyMuPDF and OCR'd with Tesseract
+    in the same pool, one page per task. OCR text is cached by a hash of the page's
+    content and images, so re-uploading a scanned report skips rendering and Tesseract.
+
+    Each upload is written once to a temp file that the tasks open by path, rather than
+    pickled to the workers once per task. Tasks enforce the timeout themselves, so a
+    pathological PDF frees its workers when it times out.
+    """
+
+    def __init__(self, max_workers=4, max_pages=50, timeout=30.0, pages_per_task=8, ocr=True, ocr_dpi=300,
+                 ocr_lang="eng", ocr_min_chars=10, ocr_cache_size=512, tesseract_cmd=None):
+        self.max_workers = max_workers
+        self.max_pages = max_pages
+        self.timeout = timeout
+        self.pages_per_task = pages_per_task
+        self.ocr = ocr
+        self.ocr_dpi = ocr_dpi
+        self.ocr_lang = ocr_lang
+        self.ocr_min_chars = ocr_min_chars
+        self.ocr_cache_size = ocr_cache_size
+        self.tesseract_cmd = tesseract_cmd
+        self._pool = None
+        self._ocr_cache = OrderedDict()
+
+        self.ocr_pages = 0
+        self.ocr_cache_hits = 0
+        self.ocr_failures = 0
+
+    @classmethod
+    def from_env(cls):
+        return cls(**load_pdf_extraction_config())
+
+    def start(self):
+        if self._pool is None:
+            # spawn, not fork: the API process has model-loading threads running. Spawned workers
+            # re-import __main__, so the app must be served as a module (python -m uvicorn), not as a script.
+            self._pool = ProcessPoolExecutor(self.max_workers, mp_context=multiprocessing.get_context("spawn"))
+            for _ in range(self.max_workers):
+                self._pool.submit(_warm_up)
+        return self._pool
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    async def _extract(self, pdf_bytes, deadline):
+        pdf_path = await asyncio.to_thread(_write_temp_pdf, pdf_bytes)
+        try:
+            return await self._extract_file(pdf_path, deadline)
+        finally:
+            os.remove(pdf_path)
+
+    async def _extract_file(self, pdf_path, deadline):
+        loop = asyncio.get_running_loop()
+        pool = self.start()
+
+        with stage_timer("pdf_extract", "pdf_extractor"):
+            page_count = await loop.run_in_executor(pool, _count_pages, pdf_path, deadline)
+            if page_count > self.max_pages:
+                print(f"⚠️ Report has {page_count} pages, extracting the first {self.max_pages}")
+                page_count = self.max_pages
+
+            # Small reports go to one worker; large ones are split into page ranges parsed in parallel.
+            ranges = [(start, min(start + self.pages_per_task, page_count))
+                      for start in range(0, page_count, self.pages_per_task)]
+            ocr_min_chars = self.ocr_min_chars if self.ocr else None
+            chunks = await asyncio.gather(*[
+                loop.run_in_executor(pool, _extract_page_range, pdf_path, start, stop, deadline, ocr_min_chars)
+                for start, stop in ranges
+            ])
+        pages = [page for chunk in chunks for page in chunk]
+        texts = [text for text, _ in pages]
+
+        misses = []
+        for i, (text, key) in enumerate(pages):
+            if text is not None:
+                continue
+            # Keyed by page content and OCR settings, so a re-uploaded scan skips rendering and Tesseract.
+            key = f"{key}:{self.ocr_dpi}:{self.ocr_lang}"
+            cached = self._ocr_cache.get(key)
+            if cached is not None:
+                self._ocr_cache.move_to_end(key)
+                self.ocr_cache_hits += 1
+                texts[i] = cached
+            else:
+                misses.append((i, key))
+
+        if not misses:
+            return ' '.join(text for text in texts if text)
+
+        # One page per task, so a scan's pages are OCR'd across all workers.
+        with stage_timer("ocr", "pdf_extractor"):
+            results = await asyncio.gather(*[
+                loop.run_in_executor(pool, _ocr_page, pdf_path, i, deadline, self.ocr_dpi, self.ocr_lang,
+                                     self.tesseract_cmd)
+                for i, _ in misses
+            ], return_exceptions=True)
+        for (i, key), text in zip(misses, results):
+            if isinstance(text, Exception):
+                self.ocr_failures += 1
+                print(f"⚠️ OCR failed for page {i + 1}:", text)
+                texts[i] = ""
+                continue
+            self.ocr_pages += 1
+            texts[i] = text.strip()
+            self._remember_ocr(key, texts[i])
+        return ' '.join(text for text in texts if text)
+
+    def _remember_ocr(self, key, text):
+        self._ocr_cache[key] = text
+        while len(self._ocr_cache) > self.ocr_cache_size:
+            self._ocr_cache.popitem(last=False)
+
+    def stats(self):
+        return {
+            "workers": self.max_workers,
+            "ocr": self.ocr,
+            "ocr_pages": self.ocr_pages,
+            "ocr_cache_hits": self.ocr_cache_hits,
+            "ocr_cache_entries": len(self._ocr_cache),
+            "ocr_failures": self.ocr_failures,
+        }
+
+    async def extract_text(self, pdf_bytes):
+        deadline = time.time() + self.timeout
+        try:
+            return await asyncio.wait_for(self._extract(pdf_bytes, deadline), self.timeout)
+        except asyncio.TimeoutError:
+            raise PdfExtractionError(f"PDF extraction exceeded {self.timeout:.0f} s")
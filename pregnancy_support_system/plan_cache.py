@@ -0,0 +1,235 @@
+import asyncio
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+_NON_WORD = re.compile(r"[^a-z0-9]+")
+
+
+def load_plan_cache_config():
+    return {
+        "max_entries": int(os.environ.get("PLAN_CACHE_MAX_ENTRIES", "512")),
+        "ttl_seconds": float(os.environ.get("PLAN_CACHE_TTL_SECONDS", str(7 * 24 * 3600))),
+        "db_path": os.environ.get("PLAN_CACHE_DB") or None,
+    }
+
+
+def normalize_notes(doctor_notes):
+    """Lower-case and collapse punctuation/whitespace so trivially different notes share an entry."""
+    return _NON_WORD.sub(" ", doctor_notes.lower()).strip()
+
+
+def plan_cache_key(risk_level, doctor_notes):
+    notes_hash = hashlib.sha256(normalize_notes(doctor_notes).encode("utf-8")).hexdigest()
+    return f"{risk_level.strip().lower()}:{notes_hash}"
+
+
+class NutritionPlanCache:
+    """LRU + TTL cache of generated plans, optionally backed by SQLite, that coalesces concurrent misses."""
+
+    def __init__(self, max_entries=512, ttl_seconds=7 * 24 * 3600, db_path=None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._inflight = {}
+        self._db = None
+        self._db_lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+
+        if db_path:
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            with self._db_lock, self._db:
+                self._db.execute(
+                    "CREATE TABLE IF NOT EXISTS nutrition_plans (key TEXT PRIMARY KEY, value TEXT, expires_at REAL)"
+                )
+                self._db.execute("DELETE FROM nutrition_plans WHERE expires_at < ?", (time.time(),))
+
+    @classmethod
+    def from_env(cls):
+        return cls(**load_plan_cache_config())
+
+    def _db_fetch(self, key):
+        with self._db_lock:
+            row = self._db.execute(
+                "SELECT value, expires_at FROM nutrition_plans WHERE key = ? AND expires_at >= ?", (key, time.time())
+            ).fetchone()
+        return (json.loads(row[0]), row[1]) if row is not None else None
+
+    def _db_get(self, key):
+        row = self._db_fetch(key)
+        if row is None:
+            return None
+        value, expires_at = row
+        self._remember(key, value, expires_at)
+        return value
+
+    def _db_put(self, key, value, expires_at):
+        with self._db_lock, self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO nutrition_plans (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, json.dumps(value), expires_at),
+            )
+
+    def _remember(self, key, value, expires_at):
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def _get_cached(self, key):
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, value = entry
+            if expires_at >= time.time():
+                self._entries.move_to_end(key)
+                return value
+            del self._entries[key]
+        return None
+
+    def get(self, key):
+        value = self._get_cached(key)
+        if value is None and self._db is not None:
+            return self._db_get(key)
+        return value
+
+    def put(self, key, value):
+        expires_at = time.time() + self.ttl_seconds
+        self._remember(key, value, expires_at)
+        if self._db is not None:
+            self._db_put(key, value, expires_at)
+
+    async def _aget(self, key):
+        """get() with the SQLite query on a worker thread, off the event loop."""
+        value = self._get_cached(key)
+        if value is None and self._db is not None:
+            row = await asyncio.to_thread(self._db_fetch, key)
+            if row is not None:
+                value, expires_at = row
+                self._remember(key, value, expires_at)
+        return value
+
+    async def _aput(self, key, value):
+        """put() with the SQLite write on a worker thread, off the event loop."""
+        expires_at = time.time() + self.ttl_seconds
+        self._remember(key, value, expires_at)
+        if self._db is not None:
+            await asyncio.to_thread(self._db_put, key, value, expires_at)
+
+    async def _await_inflight(self, key):
+        """The value another caller is computing for key, or None if nobody is computing it.
+
+        A caller cancelled while computing (its client went away) does not pass the cancellation
+        on: its waiters see no computation in flight and the first of them takes over.
+        """
+        while True:
+            inflight = self._inflight.get(key)
+            if inflight is None:
+                return None
+            try:
+                return await asyncio.shield(inflight)
+            except asyncio.CancelledError:
+                if not inflight.cancelled():
+                    raise  # this caller was cancelled, not the one computing
+
+    def lookup(self, key):
+        """get() that also counts the hit or miss, for callers that fill the entry themselves."""
+        value = self.get(key)
+        if value is not None:
+            self.hits += 1
+        else:
+            self.misses += 1
+        return value
+
+    async def get_or_compute(self, key, compute):
+        """Return the cached value for key, or await compute() once no matter how many callers miss together."""
+        value = await self._aget(key)
+        if value is not None:
+            self.hits += 1
+            return value
+
+        value = await self._await_inflight(key)
+        if value is not None:
+            self.coalesced += 1
+            return value
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            value = await compute()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # waiters re-raise it; don't warn if there were none
+            raise
+        finally:
+            del self._inflight[key]
+        future.set_result(value)
+        await self._aput(key, value)
+        return value
+
+    async def stream_or_compute(self, key, stream):
+        """Like get_or_compute for a streamed value: yield the pieces of stream() as they arrive.
+
+        A cached or coalesced value comes out as one piece. The joined pieces are cached
+        only if the stream runs to the end.
+        """
+        value = await self._aget(key)
+        if value is not None:
+            self.hits += 1
+            yield value
+            return
+
+        value = await self._await_inflight(key)
+        if value is not None:
+            self.coalesced += 1
+            yield value
+            return
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            pieces = []
+            async for piece in stream():
+                pieces.append(piece)
+                yield piece
+            value = "".join(pieces)
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()
+            raise
+        except BaseException:
+            # Cancelled, or the consumer stopped reading: waiters take over rather than fail.
+            future.cancel()
+            raise
+        finally:
+            del self._inflight[key]
+        future.set_result(value)
+        await self._aput(key, value)
+
+    def stats(self):
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "persistent": self._db is not None,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "evictions": self.evictions,
+            "hit_rate": (self.hits + self.coalesced) / lookups if lookups else None,
+        }
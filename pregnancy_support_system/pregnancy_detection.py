@@ -1,76 +1,329 @@
 import pandas as pd
 import numpy as np
-import optuna
+import hashlib
+import os
+import json
+import time
+import threading
+import argparse
+import tempfile
+import joblib
 from sklearn.model_selection import train_test_split
 from sklearn.ensemble import RandomForestClassifier, VotingClassifier
 from sklearn.linear_model import LogisticRegression
-from sklearn.preprocessing import MinMaxScaler
 from sklearn.metrics import accuracy_score, classification_report
 from imblearn.over_sampling import SMOTE
 from xgboost import XGBClassifier
 from sklearn.feature_selection import SelectKBest, f_classif
+from feature_pipeline import FeaturePipeline
+from metrics import stage_timer
 
-data = pd.read_csv('Pregnancy_Smartwatch_Dataset - Copy.csv')
+DETECTION_DATASET = "Pregnancy_Smartwatch_Dataset - Copy.csv"
+DETECTION_MODEL_FILE = "pregnancy_detection_model.pkl"
+DETECTION_PIPELINE_FILE = "pregnancy_detection_pipeline.json"
+DETECTION_METRICS_FILE = "pregnancy_detection_metrics.json"
+DETECTION_STUDY_STORAGE = "sqlite:///pregnancy_detection_search.db"
+DETECTION_STUDY_NAME = "pregnancy_detection_rf"
+# RandomForest parameters the Optuna search tunes: (low, high, step) for ints, or a list of choices.
+DETECTION_SEARCH_SPACE = {
+    "n_estimators": (100, 500, 50),
+    "max_depth": (5, 30, 5),
+    "min_samples_split": (2, 10, 2),
+    "min_samples_leaf": (1, 5, 1),
+    "max_features": ["sqrt", "log2"],
+}
+DETECTION_VARIANTS = ("ensemble", "rf", "xgb")
 
-X = data.drop('Pregnancy_Status', axis=1)
-y = data['Pregnancy_Status']
 
-selector = SelectKBest(score_func=f_classif, k='all')
-X_selected = selector.fit_transform(X, y)
-print("Feature Importance Scores:", selector.scores_)
+def _write_artifacts_atomic(writers):
+    """Write {path: write(tmp_path)} to temp files next to their targets, then rename them all into place.
 
-X_train, X_test, y_train, y_test = train_test_split(X_selected, y, test_size=0.2, random_state=42)
+    Nothing is renamed until every file is fully written, so a crash during training never
+    leaves a new pipeline next to an old model, and a serving process never reads a partial file.
+    """
+    staged = []
+    try:
+        for path, write in writers.items():
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), prefix=".tmp-")
+            os.close(fd)
+            staged.append((tmp_path, path))
+            os.chmod(tmp_path, 0o644)
+            write(tmp_path)
+    except BaseException:
+        for tmp_path, _ in staged:
+            os.remove(tmp_path)
+        raise
+    for tmp_path, path in staged:
+        os.replace(tmp_path, path)
 
-smote = SMOTE(random_state=42)
-X_train, y_train = smote.fit_resample(X_train, y_train)
 
-scaler = MinMaxScaler()
-X_train = scaler.fit_transform(X_train)
-X_test = scaler.transform(X_test)
+def _write_json(obj, path):
+    with open(path, "w") as f:
+        json.dump(obj, f, indent=2)
 
-def objective(trial):
-    n_estimators = trial.suggest_int('n_estimators', 100, 500, step=50)
-    max_depth = trial.suggest_int('max_depth', 5, 30, step=5)
-    min_samples_split = trial.suggest_int('min_samples_split', 2, 10, step=2)
-    min_samples_leaf = trial.suggest_int('min_samples_leaf', 1, 5, step=1)
-    max_features = trial.suggest_categorical('max_features', ['sqrt', 'log2'])
-    
-    rf = RandomForestClassifier(n_estimators=n_estimators, max_depth=max_depth, 
-                                min_samples_split=min_samples_split, min_samples_leaf=min_samples_leaf, 
-                                max_features=max_features, random_state=42)
-    
-    rf.fit(X_train, y_train)
-    return accuracy_score(y_test, rf.predict(X_test))
 
-study = optuna.create_study(direction='maximize')
-study.optimize(objective, n_trials=20)
+def _study_name(X_train, y_train, X_test, y_test, search_space=DETECTION_SEARCH_SPACE):
+    """DETECTION_STUDY_NAME suffixed with a hash of the train/test data and search space.
 
-best_params = study.best_params
-print("Best Parameters for Random Forest:", best_params)
+    Only a run over the same data and space resumes a checkpointed study; a retrain on
+    different data starts a fresh one instead of reusing stale trials.
+    """
+    digest = hashlib.sha256()
+    for array in (X_train, y_train, X_test, y_test):
+        digest.update(np.ascontiguousarray(np.asarray(array, dtype=np.float64)).tobytes())
+    digest.update(json.dumps(search_space, sort_keys=True).encode("utf-8"))
+    return f"{DETECTION_STUDY_NAME}-{digest.hexdigest()[:16]}"
 
-best_rf = RandomForestClassifier(**best_params, random_state=42)
-best_rf.fit(X_train, y_train)
 
-xgb_model = XGBClassifier(n_estimators=200, learning_rate=0.05, max_depth=10, random_state=42)
-xgb_model.fit(X_train, y_train)
+def train_detection_model(n_trials=20, n_jobs=-1, storage=DETECTION_STUDY_STORAGE, study_name=None,
+                          data_path=DETECTION_DATASET, artifact_dir="."):
+    """Tune the RandomForest, fit the XGBoost and soft-voting ensemble, and persist all three with the pipeline."""
+    import optuna
 
-lr = LogisticRegression()
-ensemble = VotingClassifier(estimators=[('rf', best_rf), ('xgb', xgb_model), ('lr', lr)], voting='soft')
-ensemble.fit(X_train, y_train)
+    timings = {}
+    start = time.perf_counter()
 
-y_pred_rf = best_rf.predict(X_test)
-y_pred_xgb = xgb_model.predict(X_test)
-y_pred_ensemble = ensemble.predict(X_test)
+    data = pd.read_csv(data_path)
 
-print(f'Random Forest Accuracy: {accuracy_score(y_test, y_pred_rf) * 100:.2f}%')
-print(f'XGBoost Accuracy: {accuracy_score(y_test, y_pred_xgb) * 100:.2f}%')
-print(f'Ensemble Model Accuracy: {accuracy_score(y_test, y_pred_ensemble) * 100:.2f}%')
+    X = data.drop('Pregnancy_Status', axis=1)
+    y = data['Pregnancy_Status']
 
-print("Random Forest Classification Report:")
-print(classification_report(y_test, y_pred_rf))
+    selector = SelectKBest(score_func=f_classif, k='all')
+    selector.fit(X, y)
+    print("Feature Importance Scores:", selector.scores_)
+    X_selected = X.loc[:, selector.get_support()]
 
-print("XGBoost Classification Report:")
-print(classification_report(y_test, y_pred_xgb))
+    X_train, X_test, y_train, y_test = train_test_split(X_selected, y, test_size=0.2, random_state=42)
 
-print("Ensemble Model Classification Report:")
-print(classification_report(y_test, y_pred_ensemble))
+    smote = SMOTE(random_state=42)
+    X_train, y_train = smote.fit_resample(X_train, y_train)
+
+    # Same FeaturePipeline the risk model uses; saved so serving applies the identical scaling.
+    pipeline = FeaturePipeline.fit(X_train)
+    X_train = pipeline.transform_frame(X_train)
+    X_test = pipeline.transform_frame(X_test)
+
+    study_name = study_name or _study_name(X_train, y_train, X_test, y_test)
+
+    def objective(trial):
+        params = {
+            name: (trial.suggest_categorical(name, space) if isinstance(space, list)
+                   else trial.suggest_int(name, space[0], space[1], step=space[2]))
+            for name, space in DETECTION_SEARCH_SPACE.items()
+        }
+        rf = RandomForestClassifier(**params, random_state=42)
+
+        rf.fit(X_train, y_train)
+        return accuracy_score(y_test, rf.predict(X_test))
+
+    # Trials run n_jobs at a time and are checkpointed in the study storage, so tuning over the same
+    # data and search space can be resumed.
+    search_start = time.perf_counter()
+    study = optuna.create_study(study_name=study_name, storage=storage, load_if_exists=True, direction='maximize',
+                                sampler=optuna.samplers.TPESampler(seed=42))
+    finished = [t for t in study.trials if t.state == optuna.trial.TrialState.COMPLETE]
+    if len(finished) < n_trials:
+        study.optimize(objective, n_trials=n_trials - len(finished), n_jobs=n_jobs)
+    timings["search_seconds"] = time.perf_counter() - search_start
+
+    best_params = study.best_params
+    print("Best Parameters for Random Forest:", best_params)
+
+    fit_start = time.perf_counter()
+    best_rf = RandomForestClassifier(**best_params, random_state=42)
+    best_rf.fit(X_train, y_train)
+    timings["rf_fit_seconds"] = time.perf_counter() - fit_start
+
+    fit_start = time.perf_counter()
+    xgb_model = XGBClassifier(n_estimators=200, learning_rate=0.05, max_depth=10, random_state=42)
+    xgb_model.fit(X_train, y_train)
+    timings["xgb_fit_seconds"] = time.perf_counter() - fit_start
+
+    fit_start = time.perf_counter()
+    lr = LogisticRegression()
+    ensemble = VotingClassifier(estimators=[('rf', best_rf), ('xgb', xgb_model), ('lr', lr)], voting='soft')
+    ensemble.fit(X_train, y_train)
+    timings["ensemble_fit_seconds"] = time.perf_counter() - fit_start
+    timings["total_seconds"] = time.perf_counter() - start
+
+    y_pred_rf = best_rf.predict(X_test)
+    y_pred_xgb = xgb_model.predict(X_test)
+    y_pred_ensemble = ensemble.predict(X_test)
+
+    print(f'Random Forest Accuracy: {accuracy_score(y_test, y_pred_rf) * 100:.2f}%')
+    print(f'XGBoost Accuracy: {accuracy_score(y_test, y_pred_xgb) * 100:.2f}%')
+    print(f'Ensemble Model Accuracy: {accuracy_score(y_test, y_pred_ensemble) * 100:.2f}%')
+
+    print("Random Forest Classification Report:")
+    print(classification_report(y_test, y_pred_rf))
+
+    print("XGBoost Classification Report:")
+    print(classification_report(y_test, y_pred_xgb))
+
+    print("Ensemble Model Classification Report:")
+    print(classification_report(y_test, y_pred_ensemble))
+
+    models = {"rf": best_rf, "xgb": xgb_model, "ensemble": ensemble}
+    metrics = {
+        "timings": timings,
+        "n_trials": len(study.trials),
+        "n_jobs": n_jobs,
+        "best_params": best_params,
+        "accuracy": {name: accuracy_score(y_test, model.predict(X_test)) for name, model in models.items()},
+    }
+
+    os.makedirs(artifact_dir, exist_ok=True)
+    _write_artifacts_atomic({
+        os.path.join(artifact_dir, DETECTION_METRICS_FILE): lambda path: _write_json(metrics, path),
+        os.path.join(artifact_dir, DETECTION_PIPELINE_FILE): pipeline.save,
+        os.path.join(artifact_dir, DETECTION_MODEL_FILE): lambda path: joblib.dump(models, path),
+    })
+
+    print("⏱️ Training wall time: " + ", ".join(f"{name} {seconds:.1f} s" for name, seconds in timings.items()))
+    print("✅ Pregnancy detection models saved.")
+    return metrics
+
+
+class CompiledForest:
+    """A fitted RandomForestClassifier packed into padded arrays and walked for all trees at once.
+
+    sklearn visits its (up to 500) trees one by one per predict call, which dominates
+    single-row latency; here each tree level is one NumPy gather. The gathers grow with
+    rows x trees, so batches above max_rows go back to sklearn's per-tree loop.
+    """
+
+    def __init__(self, forest, max_rows=64):
+        self.forest = forest
+        self.max_rows = max_rows
+        trees = [estimator.tree_ for estimator in forest.estimators_]
+        n_trees, max_nodes = len(trees), max(tree.node_count for tree in trees)
+        self.left = np.full((n_trees, max_nodes), -1, dtype=np.int64)
+        self.right = np.full((n_trees, max_nodes), -1, dtype=np.int64)
+        self.feature = np.zeros((n_trees, max_nodes), dtype=np.int64)
+        self.threshold = np.zeros((n_trees, max_nodes), dtype=np.float64)
+        self.value = np.zeros((n_trees, max_nodes, len(forest.classes_)), dtype=np.float64)
+        for t, tree in enumerate(trees):
+            n = tree.node_count
+            self.left[t, :n] = tree.children_left
+            self.right[t, :n] = tree.children_right
+            self.feature[t, :n] = np.maximum(tree.feature, 0)  # leaves store -2
+            self.threshold[t, :n] = tree.threshold
+            value = tree.value[:, 0, :]
+            self.value[t, :n] = value / value.sum(axis=1, keepdims=True)
+        self.depth = max(estimator.get_depth() for estimator in forest.estimators_)
+        self.classes_ = forest.classes_
+        self._trees = np.arange(n_trees)[None, :]
+
+    def predict_proba(self, X):
+        X = np.asarray(X, dtype=np.float32)
+        if X.shape[0] > self.max_rows:
+            return self.forest.predict_proba(X)
+        rows = np.arange(X.shape[0])[:, None]
+        node = np.zeros((X.shape[0], self.left.shape[0]), dtype=np.int64)
+        for _ in range(self.depth):
+            go_left = X[rows, self.feature[self._trees, node]] <= self.threshold[self._trees, node]
+            child = np.where(go_left, self.left[self._trees, node], self.right[self._trees, node])
+            node = np.where(child == -1, node, child)
+        return self.value[self._trees, node].mean(axis=1)
+
+
+class PregnancyDetector:
+    """Serves the persisted RF / XGBoost / ensemble detection models behind one FeaturePipeline."""
+
+    def __init__(self, artifact_dir="."):
+        self.artifact_dir = artifact_dir
+        # Request fields the caller will always send; checked against the pipeline at load.
+        self.required_inputs = None
+        self._lock = threading.Lock()
+        self._models = None
+        self._scorers = None
+        self._pipeline = None
+        self.loaded_at = None
+        self.last_load_seconds = None
+        self._latency = {variant: [0, 0, 0.0] for variant in DETECTION_VARIANTS}  # calls, rows, seconds
+
+    @property
+    def ready(self):
+        return self._models is not None
+
+    def load(self):
+        start = time.perf_counter()
+        pipeline = FeaturePipeline.load(os.path.join(self.artifact_dir, DETECTION_PIPELINE_FILE))
+        models = joblib.load(os.path.join(self.artifact_dir, DETECTION_MODEL_FILE))
+        for name in DETECTION_VARIANTS:
+            pipeline.check_model(models[name])
+        if self.required_inputs is not None:
+            pipeline.check_inputs(self.required_inputs)
+
+        # The forests are served compiled; the ensemble is the soft vote of its own fitted members.
+        ensemble = models["ensemble"]
+        members = [CompiledForest(estimator).predict_proba if isinstance(estimator, RandomForestClassifier)
+                   else estimator.predict_proba for estimator in ensemble.estimators_]
+        weights = ensemble.weights
+        scorers = {
+            "rf": CompiledForest(models["rf"]).predict_proba,
+            "xgb": models["xgb"].predict_proba,
+            "ensemble": lambda X: np.average([score(X) for score in members], axis=0, weights=weights),
+        }
+
+        with self._lock:
+            self._pipeline = pipeline
+            self._models = models
+            self._scorers = scorers
+            self.loaded_at = time.time()
+            self.last_load_seconds = time.perf_counter() - start
+        print(f"✅ Pregnancy detection models loaded in {self.last_load_seconds * 1000:.1f} ms")
+
+    def predict_batch(self, records, variant="ensemble"):
+        if variant not in DETECTION_VARIANTS:
+            raise ValueError(f"Unknown detection model: {variant}")
+        if self._models is None:
+            raise RuntimeError("Pregnancy detection model is not trained; run python pregnancy_detection.py")
+        if not records:
+            return []
+        start = time.perf_counter()
+        with stage_timer("preprocess", "pregnancy_detection"):
+            if len(records) == 1:
+                X = self._pipeline.transform_one(records[0])
+            else:
+                X = self._pipeline.transform_batch(records)
+        with stage_timer("predict", "pregnancy_detection"):
+            probabilities = self._scorers[variant](X)[:, 1]
+        results = [
+            {"pregnancyStatus": int(p >= 0.5), "pregnant": bool(p >= 0.5), "probability": float(p), "model": variant}
+            for p in probabilities
+        ]
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            counters = self._latency[variant]
+            counters[0] += 1
+            counters[1] += len(records)
+            counters[2] += elapsed
+        return results
+
+    def predict(self, record, variant="ensemble"):
+        return self.predict_batch([record], variant)[0]
+
+    def stats(self):
+        with self._lock:
+            latency = {
+                variant: {
+                    "calls": calls,
+                    "rows": rows,
+                    "avg_call_ms": seconds / calls * 1000 if calls else None,
+                    "avg_row_ms": seconds / rows * 1000 if rows else None,
+                }
+                for variant, (calls, rows, seconds) in self._latency.items()
+            }
+        return {"ready": self.ready, "loaded_at": self.loaded_at,
+                "last_load_ms": None if self.last_load_seconds is None else self.last_load_seconds * 1000,
+                "latency": latency}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train and persist the pregnancy detection models")
+    parser.add_argument("--trials", type=int, default=20, help="total Optuna trials, including resumed ones")
+    parser.add_argument("--jobs", type=int, default=-1, help="Optuna trials run in parallel (-1: one per CPU)")
+    parser.add_argument("--storage", default=DETECTION_STUDY_STORAGE, help="Optuna storage URL used to checkpoint trials")
+    args = parser.parse_args()
+    train_detection_model(n_trials=args.trials, n_jobs=args.jobs, storage=args.storage)
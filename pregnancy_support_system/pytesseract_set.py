@@ -1,7 +1,12 @@
 import pytesseract
 
-# Set the correct path where Tesseract is installed
-pytesseract.pytesseract.tesseract_cmd = r'C:\Program Files\Tesseract-OCR\tesseract.exe'
+from pdf_extraction import load_pdf_extraction_config
+
+# Point TESSERACT_CMD at the binary if it is not on PATH, e.g. on Windows:
+#   set TESSERACT_CMD=C:\Program Files\Tesseract-OCR\tesseract.exe
+tesseract_cmd = load_pdf_extraction_config()["tesseract_cmd"]
+if tesseract_cmd:
+    pytesseract.pytesseract.tesseract_cmd = tesseract_cmd
 
 # Verify installation
 print(pytesseract.get_tesseract_version())
@@ -0,0 +1,142 @@
+"""Rule-based extraction of PatientData fields from doctor's report text.
+
+Every rule is a regex compiled at import time: a field label (long form or
+abbreviation), a number and an optional unit. One combined pattern over all the
+labels scans the text once; only where a label is found is its rule matched. Values are converted to the units
+the risk model was trained on (blood sugar in mmol/L, temperature in °F) and
+dropped if implausible. Each field gets a confidence from how specific the label
+was and whether the unit was stated or had to be inferred from the magnitude.
+A page of text takes well under a millisecond.
+"""
+import re
+
+from vitals_state import FIELD_DEFAULTS
+
+_SEP = r"\s*(?:[:=\-]|\bis\b|\bwas\b|\bof\b)?\s*"
+_NUM = r"(\d{1,4}(?:\.\d+)?)"
+
+# Values outside these ranges (in model units) are treated as misreads and ignored.
+PLAUSIBLE_RANGES = {
+    "Age": (12, 60),
+    "SystolicBP": (60, 250),
+    "DiastolicBP": (30, 160),
+    "BodyTemp": (93.0, 110.0),
+    "HeartRate": (30, 220),
+    "HRV": (1, 300),
+    "Resp_Rate": (5, 60),
+    "SpO2": (50, 100),
+    "BS": (1.0, 40.0),
+}
+MG_DL_PER_MMOL_L = 18.0
+
+
+def _rule(labels, unit=None, value=_NUM):
+    """(label regex, full rule regex) for "<label> <separator> <value> [unit]"."""
+    unit_part = rf"(?:\s*(?P<unit>{unit}))?" if unit else ""
+    return labels, re.compile(rf"(?:{labels}){_SEP}{value}{unit_part}", re.IGNORECASE)
+
+
+def _single(field):
+    def convert(match):
+        return {field: float(match.group(1))}, bool(match.groupdict().get("unit"))
+    return convert
+
+
+def _blood_pressure(match):
+    return {"SystolicBP": float(match.group(1)), "DiastolicBP": float(match.group(2))}, bool(match.group("unit"))
+
+
+def _blood_sugar(match):
+    value, unit = float(match.group(1)), (match.group("unit") or "").lower()
+    if unit.startswith("mg") or (not unit and value > 35):
+        value /= MG_DL_PER_MMOL_L
+    return {"BS": round(value, 2)}, bool(unit)
+
+
+def _temperature(match):
+    value, unit = float(match.group(1)), (match.group("unit") or "").lower()
+    if "c" in unit or (not unit and value < 45):
+        value = value * 9 / 5 + 32
+    return {"BodyTemp": round(value, 1)}, bool(unit)
+
+
+def _age(match):
+    return {"Age": float(match.group(1))}, True
+
+
+def _symptoms(match):
+    return {"Hormonal_Symptoms": (match.group(1) or match.group(2)).capitalize()}, True
+
+
+_YEARS_OLD = r"\d{1,2}[\s-]*(?:(?:years?|yrs?)[\s-]*old|y/?o)\b"
+_SYMPTOMS = r"(?:mild|moderate|severe)\s+(?:hormonal\s+)?symptoms\b|hormonal\s+symptoms\s*[:\-]?\s*(?:mild|moderate|severe)"
+
+# ((label regex, rule regex), converter, confidence with the label and unit present). Label regexes
+# must not capture. A value whose unit had to be inferred loses 0.15; within a field, the most
+# confident match wins, then the earliest.
+VITALS_RULES = [
+    (_rule(r"(?<!gestational )age", value=r"(\d{1,2})\b(?!\s*(?:weeks?|wks?|days?|months?)\b)"), _age, 0.95),
+    ((_YEARS_OLD, re.compile(r"(\d{1,2})[\s-]*(?:(?:years?|yrs?)[\s-]*old|y/?o)\b", re.IGNORECASE)), _age, 0.85),
+    (_rule(r"blood\s+pressure|b\.?p\.?", r"mm\s*hg", r"(\d{2,3})\s*/\s*(\d{2,3})"), _blood_pressure, 0.95),
+    (_rule(r"(?:fasting\s+|random\s+)?(?:blood\s+(?:sugar|glucose)|glucose)|[fr]?bs", r"mg\s*/\s*dl|mmol\s*/\s*l"),
+     _blood_sugar, 0.95),
+    (_rule(r"heart\s+rate(?!\s+variability)|pulse(?:\s+rate)?|hr(?!v)", r"bpm|beats\s*(?:per|/)\s*min(?:ute)?"),
+     _single("HeartRate"), 0.95),
+    (_rule(r"heart\s+rate\s+variability|hrv", r"ms"), _single("HRV"), 0.9),
+    (_rule(r"(?:body\s+)?temp(?:erature)?", r"(?:°|º|deg(?:rees)?\s*)?\s*[fc](?:ahrenheit|elsius)?\b"), _temperature, 0.95),
+    (_rule(r"sp\s*o2|sp02|o2\s+sat(?:uration)?|oxygen\s+saturation", r"%"), _single("SpO2"), 0.95),
+    (_rule(r"resp(?:iratory|iration)?(?:\s+rate)?|rr", r"breaths\s*(?:per|/)\s*min(?:ute)?|/\s*min"),
+     _single("Resp_Rate"), 0.9),
+    ((_SYMPTOMS, re.compile(r"(mild|moderate|severe)\s+(?:hormonal\s+)?symptoms\b|hormonal\s+symptoms\s*[:\-]?\s*"
+                            r"(mild|moderate|severe)", re.IGNORECASE)), _symptoms, 0.8),
+]
+_LABELS = re.compile(
+    r"(?<![\w-])(?:" + "|".join(rf"(?P<rule{i}>{labels})" for i, ((labels, _), _, _) in enumerate(VITALS_RULES)) + ")",
+    re.IGNORECASE,
+)
+_RULES = {f"rule{i}": (pattern, convert, confidence) for i, ((_, pattern), convert, confidence) in enumerate(VITALS_RULES)}
+
+
+def _plausible(field, value):
+    bounds = PLAUSIBLE_RANGES.get(field)
+    return bounds is None or bounds[0] <= value <= bounds[1]
+
+
+def extract_vitals(text):
+    """PatientData fields found in text: {field: {"value", "confidence", "match"}}."""
+    found = {}
+    if not text:
+        return found
+    for label in _LABELS.finditer(text):
+        pattern, convert, confidence = _RULES[label.lastgroup]
+        match = pattern.match(text, label.start())
+        if match is None:
+            continue
+        values, unit_stated = convert(match)
+        score = confidence if unit_stated else confidence - 0.15
+        if "SystolicBP" in values and values["SystolicBP"] <= values["DiastolicBP"]:
+            continue
+        if not all(_plausible(field, value) for field, value in values.items()):
+            continue
+        for field, value in values.items():
+            if field not in found or score > found[field]["confidence"]:
+                found[field] = {"value": value, "confidence": round(score, 2), "match": match.group(0)}
+    return found
+
+
+def merge_patient_data(submitted, extracted, defaults=FIELD_DEFAULTS):
+    """Combine submitted fields, extracted vitals and defaults, in that order of precedence.
+
+    Returns the complete record plus {field: {"source", "confidence"}}, where submitted values
+    have confidence 1.0 and defaulted ones 0.0.
+    """
+    record, fields = {}, {}
+    for field, default in defaults.items():
+        if submitted.get(field) is not None:
+            record[field], fields[field] = submitted[field], {"source": "submitted", "confidence": 1.0}
+        elif field in extracted:
+            record[field] = extracted[field]["value"]
+            fields[field] = {"source": "report", "confidence": extracted[field]["confidence"]}
+        else:
+            record[field], fields[field] = default, {"source": "default", "confidence": 0.0}
+    return record, fields
@@ -0,0 +1,169 @@
+"""Offline build and fast loading of the FAISS index over the bundled research papers.
+
+Build (or refresh) the index before starting the API:
+
+    python research_index.py            # rebuild only if a PDF changed
+    python research_index.py --force    # always rebuild
+"""
+import argparse
+import hashlib
+import json
+import os
+import time
+import traceback
+
+import faiss
+import fitz
+import numpy as np
+from langchain_core.documents import Document
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+from langchain_community.docstore.in_memory import InMemoryDocstore
+from langchain_community.vectorstores import FAISS
+
+RESEARCH_PDF_FILES = [
+    "1-s2.0-S0002937821027289-main.pdf",
+    "s40748-022-00139-9.pdf",
+    "nutrients-12-01325.pdf"
+]
+INDEX_DIR = "research_index"
+EMBEDDING_MODEL_NAME = "sentence-transformers/paraphrase-MiniLM-L3-v2"
+CHUNK_SIZE = 1000
+CHUNK_OVERLAP = 200
+
+INDEX_FILE = "index.faiss"
+CHUNKS_FILE = "chunks.json"
+MANIFEST_FILE = "manifest.json"
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def build_manifest(pdf_files=RESEARCH_PDF_FILES):
+    return {
+        "embedding_model": EMBEDDING_MODEL_NAME,
+        "chunk_size": CHUNK_SIZE,
+        "chunk_overlap": CHUNK_OVERLAP,
+        "sources": {os.path.basename(path): file_sha256(path) for path in pdf_files},
+    }
+
+
+def read_manifest(index_dir=INDEX_DIR):
+    try:
+        with open(os.path.join(index_dir, MANIFEST_FILE)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def index_is_current(pdf_files=RESEARCH_PDF_FILES, index_dir=INDEX_DIR):
+    if not all(os.path.exists(os.path.join(index_dir, name)) for name in (INDEX_FILE, CHUNKS_FILE)):
+        return False
+    return read_manifest(index_dir) == build_manifest(pdf_files)
+
+
+def extract_research_text(pdf_files=RESEARCH_PDF_FILES):
+    research_text = ""
+    for file_path in pdf_files:
+        with fitz.open(file_path) as doc:
+            research_text += "".join(page.get_text("text") + "\n" for page in doc)
+    return research_text
+
+
+def make_embeddings():
+    from langchain_huggingface import HuggingFaceEmbeddings
+    return HuggingFaceEmbeddings(model_name=EMBEDDING_MODEL_NAME)
+
+
+def build_index(pdf_files=RESEARCH_PDF_FILES, index_dir=INDEX_DIR, embeddings=None):
+    """Extract, split and embed the papers, then write index, chunk texts and manifest to index_dir."""
+    start = time.perf_counter()
+    embeddings = embeddings or make_embeddings()
+
+    splitter = RecursiveCharacterTextSplitter(chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP)
+    text_chunks = splitter.split_text(extract_research_text(pdf_files))
+    vectors = np.asarray(embeddings.embed_documents(text_chunks), dtype=np.float32)
+
+    index = faiss.IndexFlatL2(vectors.shape[1])
+    index.add(vectors)
+
+    os.makedirs(index_dir, exist_ok=True)
+    paths = {name: os.path.join(index_dir, name) for name in (INDEX_FILE, CHUNKS_FILE, MANIFEST_FILE)}
+    faiss.write_index(index, paths[INDEX_FILE] + ".tmp")
+    with open(paths[CHUNKS_FILE] + ".tmp", "w") as f:
+        json.dump(text_chunks, f)
+    with open(paths[MANIFEST_FILE] + ".tmp", "w") as f:
+        json.dump(build_manifest(pdf_files), f, indent=2)
+
+    # All three are fully written before anything is renamed, and readers only ever see whole files.
+    # The old manifest goes first: a crash between the renames leaves an index that is rebuilt, not
+    # a new index next to old chunks that still looks current.
+    try:
+        os.remove(paths[MANIFEST_FILE])
+    except FileNotFoundError:
+        pass
+    for name in (INDEX_FILE, CHUNKS_FILE, MANIFEST_FILE):
+        os.replace(paths[name] + ".tmp", paths[name])
+
+    print(f"✅ Research index built: {len(text_chunks)} chunks in {time.perf_counter() - start:.1f} s")
+    return index, text_chunks
+
+
+def read_faiss_index(path, mmap=True):
+    if mmap:
+        flags = getattr(faiss, "IO_FLAG_MMAP_IFC", faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY)
+        try:
+            return faiss.read_index(path, flags)
+        except Exception as e:
+            print("⚠️ Memory-mapped index load failed, reading into memory:", e)
+    return faiss.read_index(path)
+
+
+def load_vectorstore(embeddings, index_dir=INDEX_DIR, mmap=True):
+    index = read_faiss_index(os.path.join(index_dir, INDEX_FILE), mmap=mmap)
+    with open(os.path.join(index_dir, CHUNKS_FILE)) as f:
+        text_chunks = json.load(f)
+    if index.ntotal != len(text_chunks):
+        # Read while build_index was renaming the files into place; fail rather than mismatch chunks and vectors.
+        raise ValueError(f"Research index has {index.ntotal} vectors but {len(text_chunks)} chunks")
+
+    ids = [str(i) for i in range(len(text_chunks))]
+    docstore = InMemoryDocstore({doc_id: Document(page_content=text) for doc_id, text in zip(ids, text_chunks)})
+    return FAISS(
+        embedding_function=embeddings,
+        index=index,
+        docstore=docstore,
+        index_to_docstore_id=dict(enumerate(ids)),
+    )
+
+
+def load_or_build_vectorstore(embeddings, pdf_files=RESEARCH_PDF_FILES, index_dir=INDEX_DIR):
+    """Load the persisted index, rebuilding it first only when a source PDF (or the chunking setup) changed."""
+    start = time.perf_counter()
+    if not index_is_current(pdf_files, index_dir):
+        print("🔄 Research index missing or stale, rebuilding...")
+        build_index(pdf_files, index_dir, embeddings)
+    vectorstore = load_vectorstore(embeddings, index_dir)
+    print(f"✅ Research index loaded in {(time.perf_counter() - start) * 1000:.0f} ms")
+    return vectorstore
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the FAISS index over the research papers")
+    parser.add_argument("--force", action="store_true", help="rebuild even if the manifest is current")
+    parser.add_argument("--index-dir", default=INDEX_DIR)
+    args = parser.parse_args()
+
+    try:
+        if args.force or not index_is_current(RESEARCH_PDF_FILES, args.index_dir):
+            build_index(RESEARCH_PDF_FILES, args.index_dir)
+        else:
+            print("✅ Research index is up to date.")
+    except Exception as e:
+        print("❌ Error building research index:", e)
+        traceback.print_exc()
+        raise SystemExit(1)
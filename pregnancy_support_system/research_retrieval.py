@@ -0,0 +1,225 @@
+"""Top-k retrieval from the research FAISS index, for grounding the nutrition-plan prompt.
+
+Concurrent queries are embedded and searched together (one embed_documents call and
+one index.search per batch), identical in-flight queries share one lookup, and
+results are kept in an LRU cache keyed by the normalized query. build_context packs
+the retrieved chunks into what is left of the prompt's token budget.
+"""
+import asyncio
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from plan_cache import normalize_notes
+
+# Rough average for English text with BPE tokenizers; good enough to bound prompt size
+# without loading the remote model's tokenizer.
+CHARS_PER_TOKEN = 4
+CONTEXT_SEPARATOR = "\n---\n"
+
+
+def load_retrieval_config():
+    return {
+        "top_k": int(os.environ.get("RETRIEVAL_TOP_K", "4")),
+        "cache_size": int(os.environ.get("RETRIEVAL_CACHE_SIZE", "1024")),
+        "max_batch_size": int(os.environ.get("RETRIEVAL_BATCH_MAX_SIZE", "32")),
+        "max_wait": float(os.environ.get("RETRIEVAL_BATCH_MAX_WAIT_MS", "5")) / 1000,
+        "prompt_token_budget": int(os.environ.get("NUTRITION_PROMPT_TOKEN_BUDGET", "1500")),
+    }
+
+
+def estimate_tokens(text):
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def truncate_to_tokens(text, max_tokens):
+    limit = max(max_tokens, 0) * CHARS_PER_TOKEN
+    return text if len(text) <= limit else text[:limit]
+
+
+def build_context(chunks, max_tokens):
+    """Join retrieved chunks best-first until max_tokens is used up; the last one is cut to fit."""
+    parts, remaining = [], max_tokens - estimate_tokens(CONTEXT_SEPARATOR)
+    for chunk in chunks:
+        if remaining <= 0:
+            break
+        text = truncate_to_tokens(chunk["text"].strip(), remaining)
+        parts.append(text)
+        remaining -= estimate_tokens(text) + estimate_tokens(CONTEXT_SEPARATOR)
+    return CONTEXT_SEPARATOR.join(parts), len(parts)
+
+
+class ResearchRetriever:
+    """Cached, micro-batched top-k search over the vectorstore LazyComponent.
+
+    retrieve() raises ComponentWarmingUp (via LazyComponent.get) until the index has loaded.
+    """
+
+    def __init__(self, vectorstore, top_k=4, cache_size=1024, max_batch_size=32, max_wait=0.005,
+                 prompt_token_budget=1500):
+        self.vectorstore = vectorstore
+        self.top_k = top_k
+        self.cache_size = cache_size
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.prompt_token_budget = prompt_token_budget
+        self._cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._pending = {}
+        self._queue = None
+        self._worker = None
+        self._executor = None
+
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self.batches = 0
+        self.embedded = 0
+        self.total_search_seconds = 0.0
+
+    @classmethod
+    def from_env(cls, vectorstore):
+        return cls(vectorstore, **load_retrieval_config())
+
+    def start(self):
+        if self._worker is None or self._worker.done():
+            self._queue = asyncio.Queue()
+            self._executor = self._executor or ThreadPoolExecutor(max_workers=1, thread_name_prefix="retrieval")
+            self._worker = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    def _cached(self, key):
+        with self._cache_lock:
+            chunks = self._cache.get(key)
+            if chunks is not None:
+                self._cache.move_to_end(key)
+            return chunks
+
+    def _remember(self, key, chunks):
+        with self._cache_lock:
+            self._cache[key] = chunks
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+                self.evictions += 1
+
+    def search_batch(self, queries):
+        """Embed and search many (normalized) queries in one pass; blocking and uncached."""
+        store = self.vectorstore.get()
+        start = time.perf_counter()
+        vectors = np.asarray(store.embeddings.embed_documents(list(queries)), dtype=np.float32)
+        distances, indices = store.index.search(vectors, self.top_k)
+        results = [
+            [
+                {"text": store.docstore.search(store.index_to_docstore_id[int(i)]).page_content, "distance": float(d)}
+                for d, i in zip(row_distances, row_indices) if i >= 0
+            ]
+            for row_distances, row_indices in zip(distances, indices)
+        ]
+        self.batches += 1
+        self.embedded += len(queries)
+        self.total_search_seconds += time.perf_counter() - start
+        return results
+
+    def retrieve_batch(self, queries):
+        """Synchronous retrieve for offline callers: cache lookups plus one search for all misses."""
+        keys = [normalize_notes(query) for query in queries]
+        results = {key: self._cached(key) for key in keys}
+        missing = [key for key, chunks in results.items() if chunks is None]
+        self.hits += len(keys) - len(missing)
+        self.misses += len(missing)
+        if missing:
+            for key, chunks in zip(missing, self.search_batch(missing)):
+                self._remember(key, chunks)
+                results[key] = chunks
+        return [results[key] for key in keys]
+
+    async def retrieve(self, query):
+        """Top-k chunks for query, each {"text", "distance"}, from the cache or the next search batch."""
+        self.vectorstore.get()
+        key = normalize_notes(query)
+        chunks = self._cached(key)
+        if chunks is not None:
+            self.hits += 1
+            return chunks
+
+        future = self._pending.get(key)
+        if future is not None:
+            self.coalesced += 1
+            return await asyncio.shield(future)
+
+        self.misses += 1
+        self.start()
+        future = asyncio.get_running_loop().create_future()
+        self._pending[key] = future
+        self._queue.put_nowait(key)
+        return await asyncio.shield(future)
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        last_size = 1
+        while True:
+            batch = [await self._queue.get()]
+            await asyncio.sleep(0)
+            deadline = loop.time() + (self.max_wait if last_size > 1 else 0.0)
+            while len(batch) < self.max_batch_size:
+                if not self._queue.empty():
+                    batch.append(self._queue.get_nowait())
+                    continue
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            last_size = len(batch)
+
+            try:
+                results = await loop.run_in_executor(self._executor, self.search_batch, batch)
+            except Exception as e:
+                for key in batch:
+                    future = self._pending.pop(key)
+                    if not future.done():
+                        future.set_exception(e)
+                        future.exception()  # waiters re-raise it; don't warn if there were none
+                continue
+            for key, chunks in zip(batch, results):
+                self._remember(key, chunks)
+                future = self._pending.pop(key)
+                if not future.done():
+                    future.set_result(chunks)
+
+    def stats(self):
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "ready": self.vectorstore.ready,
+            "top_k": self.top_k,
+            "prompt_token_budget": self.prompt_token_budget,
+            "entries": len(self._cache),
+            "cache_size": self.cache_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "evictions": self.evictions,
+            "hit_rate": (self.hits + self.coalesced) / lookups if lookups else None,
+            "batches": self.batches,
+            "avg_batch_size": self.embedded / self.batches if self.batches else None,
+            "avg_search_ms": self.total_search_seconds / self.batches * 1000 if self.batches else None,
+        }
@@ -0,0 +1,172 @@
+import asyncio
+import os
+import time
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+
+def load_micro_batch_config():
+    return {
+        "enabled": os.environ.get("RISK_MICRO_BATCHING", "1") == "1",
+        "max_batch_size": int(os.environ.get("RISK_BATCH_MAX_SIZE", "64")),
+        "max_wait": float(os.environ.get("RISK_BATCH_MAX_WAIT_MS", "2")) / 1000,
+    }
+
+
+class MicroBatcher:
+    """Collects concurrent single-record score requests into one vectorized score_batch call.
+
+    A batch closes when it reaches max_batch_size or max_wait after its first request. The wait
+    only applies once the previous batch held more than one request, so an idle service adds
+    no queueing delay. Scoring runs on a worker thread, so the next batch fills while the
+    current one is scored; groups that ask for explanations (TreeSHAP, ~3 ms a row) go to a
+    second worker, so label-only batches never wait behind them.
+    """
+
+    def __init__(self, predictor, enabled=True, max_batch_size=64, max_wait=0.002, delay_samples=2048):
+        self.predictor = predictor
+        self.enabled = enabled
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self._queue = None
+        self._worker = None
+        self._executor = None
+        self._explain_executor = None
+        self._explaining = set()
+
+        self.requests = 0
+        self.batches = 0
+        self.batch_sizes = Counter()
+        self._delays = deque(maxlen=delay_samples)
+
+    @classmethod
+    def from_env(cls, predictor):
+        return cls(predictor, **load_micro_batch_config())
+
+    def start(self):
+        if self._worker is None or self._worker.done():
+            self._queue = asyncio.Queue()
+            self._executor = self._executor or ThreadPoolExecutor(max_workers=1, thread_name_prefix="risk-batch")
+            self._explain_executor = self._explain_executor or ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix="risk-explain")
+            self._worker = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+        for task in list(self._explaining):
+            task.cancel()
+        await asyncio.gather(*self._explaining, return_exceptions=True)
+        for executor in (self._executor, self._explain_executor):
+            if executor is not None:
+                executor.shutdown(wait=False)
+        self._executor = self._explain_executor = None
+
+    async def score(self, record, explain=False, top_k=3, approximate=False):
+        # Rejected here, before it can share a score_batch call with other callers' records.
+        record = self.predictor.coerce_record(record)
+        if not self.enabled:
+            return self.predictor.score_batch([record], explain=explain, top_k=top_k, approximate=approximate)[0]
+        self.start()
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((record, (explain, top_k, approximate), time.perf_counter(), future))
+        return await future
+
+    def _score_group(self, records, explain, top_k, approximate):
+        """score_batch over the group; if that raises, each record alone, so only a bad record's caller fails.
+
+        Returns one result or exception per record.
+        """
+        try:
+            return self.predictor.score_batch(records, explain=explain, top_k=top_k, approximate=approximate)
+        except Exception as e:
+            if len(records) == 1:
+                return [e]
+        results = []
+        for record in records:
+            try:
+                results.append(self.predictor.score_batch([record], explain=explain, top_k=top_k,
+                                                          approximate=approximate)[0])
+            except Exception as e:
+                results.append(e)
+        return results
+
+    async def _score_items(self, executor, items, options):
+        records = [record for record, _, _, _ in items]
+        results = await asyncio.get_running_loop().run_in_executor(executor, self._score_group, records, *options)
+        for (_, _, _, future), result in zip(items, results):
+            if future.done():
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        last_size = 1
+        while True:
+            batch = [await self._queue.get()]
+            await asyncio.sleep(0)  # let requests that are already runnable enqueue
+            deadline = loop.time() + (self.max_wait if last_size > 1 else 0.0)
+            while len(batch) < self.max_batch_size:
+                if not self._queue.empty():
+                    batch.append(self._queue.get_nowait())
+                    continue
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            last_size = len(batch)
+            started = time.perf_counter()
+            self.requests += len(batch)
+            self.batches += 1
+            self.batch_sizes[len(batch)] += 1
+            self._delays.extend(started - enqueued for _, _, enqueued, _ in batch)
+
+            # Requests asking for different explanation options are scored as separate groups.
+            groups = {}
+            for item in batch:
+                groups.setdefault(item[1], []).append(item)
+            for options, items in groups.items():
+                if options[0]:
+                    # Not awaited: the next batch is collected while the explain worker runs this one.
+                    task = loop.create_task(self._score_items(self._explain_executor, items, options))
+                    self._explaining.add(task)
+                    task.add_done_callback(self._explaining.discard)
+                else:
+                    await self._score_items(self._executor, items, options)
+
+    def stats(self):
+        delays = np.array(self._delays) * 1000
+        histogram = Counter()
+        for size, count in self.batch_sizes.items():
+            # Power-of-two buckets: "1", "2", "3-4", "5-8", ...
+            upper = 1 << (size - 1).bit_length()
+            histogram[str(upper) if upper <= 2 else f"{upper // 2 + 1}-{upper}"] += count
+        return {
+            "enabled": self.enabled,
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000,
+            "requests": self.requests,
+            "batches": self.batches,
+            "avg_batch_size": self.requests / self.batches if self.batches else None,
+            "batch_size_histogram": dict(sorted(histogram.items(), key=lambda item: int(item[0].split("-")[-1]))),
+            "queue_delay_ms": {
+                "avg": float(delays.mean()),
+                "p50": float(np.percentile(delays, 50)),
+                "p95": float(np.percentile(delays, 95)),
+                "max": float(delays.max()),
+            } if len(delays) else None,
+        }
@@ -0,0 +1,141 @@
+"""Compact, chunked loading of the risk-model training data.
+
+The CSVs are read with an explicit schema (float32 numerics, categorical strings)
+instead of pandas' float64/object defaults, either whole or in fixed-size chunks.
+Large exports can be converted once to Parquet and then streamed back from a
+memory-mapped file. RiskChunkIter feeds those chunks to XGBoost's external-memory
+DMatrix so training never holds the full dataset in RAM.
+
+    python risk_data.py to-parquet watch_history.csv   # writes watch_history.parquet
+"""
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+
+RISK_TARGET = "RiskLevel"
+RISK_FEATURES = [
+    "Age", "SystolicBP", "DiastolicBP", "BodyTemp", "HeartRate", "HRV", "Resp_Rate",
+    "SpO2", "Sleep_Hours", "Step_Count", "Caloric_Burn", "Cycle_Length", "BS",
+]
+RISK_DTYPES = {
+    **{name: "float32" for name in RISK_FEATURES},
+    "Hormonal_Symptoms": "category",
+    RISK_TARGET: "category",
+}
+DEFAULT_CHUNK_ROWS = 200_000
+# Every HOLDOUT_EVERY-th row (by position in the file) is held out for evaluation.
+HOLDOUT_EVERY = 5
+
+
+def read_risk_csv(path, columns=None):
+    return pd.read_csv(path, dtype=RISK_DTYPES, usecols=columns)
+
+
+def convert_csv_to_parquet(csv_path, parquet_path=None, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """Stream a CSV into Parquet chunk by chunk; memory stays bounded by chunk_rows."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    parquet_path = parquet_path or os.path.splitext(csv_path)[0] + ".parquet"
+    writer = None
+    try:
+        for chunk in pd.read_csv(csv_path, dtype=RISK_DTYPES, chunksize=chunk_rows):
+            # Categories differ per chunk; Parquet dictionary-encodes the strings itself.
+            table = pa.Table.from_pandas(chunk.astype({col: str for col in chunk.select_dtypes("category")}),
+                                         preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(parquet_path, table.schema)
+            writer.write_table(table, row_group_size=chunk_rows)
+    finally:
+        if writer is not None:
+            writer.close()
+    return parquet_path
+
+
+def iter_risk_chunks(path, chunk_rows=DEFAULT_CHUNK_ROWS, columns=None):
+    """Yield DataFrames of at most chunk_rows rows, with RISK_DTYPES, from a CSV or Parquet file."""
+    if path.endswith(".parquet"):
+        import pyarrow.parquet as pq
+
+        parquet = pq.ParquetFile(path, memory_map=True)
+        for batch in parquet.iter_batches(batch_size=chunk_rows, columns=columns):
+            chunk = batch.to_pandas()
+            yield chunk.astype({col: RISK_DTYPES[col] for col in chunk.columns if col in RISK_DTYPES})
+    else:
+        yield from pd.read_csv(path, dtype=RISK_DTYPES, usecols=columns, chunksize=chunk_rows)
+
+
+def iter_split_chunks(path, split, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """iter_risk_chunks restricted to the "train" or held-out "test" rows."""
+    offset = 0
+    for chunk in iter_risk_chunks(path, chunk_rows, columns=RISK_FEATURES + [RISK_TARGET]):
+        holdout = (np.arange(offset, offset + len(chunk)) % HOLDOUT_EVERY) == 0
+        offset += len(chunk)
+        part = chunk[holdout if split == "test" else ~holdout]
+        if len(part):
+            yield part
+
+
+def scan_risk_data(path, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """One streaming pass: fit the MinMax scaler on the training rows and count rows and labels."""
+    from sklearn.preprocessing import MinMaxScaler
+
+    scaler = MinMaxScaler()
+    label_counts = {}
+    rows = 0
+    for chunk in iter_split_chunks(path, "train", chunk_rows):
+        scaler.partial_fit(chunk[RISK_FEATURES])
+        rows += len(chunk)
+        for label, count in chunk[RISK_TARGET].value_counts().items():
+            label_counts[label] = label_counts.get(label, 0) + int(count)
+    return scaler, label_counts, rows
+
+
+class RiskChunkIter(xgb.DataIter):
+    """Feeds scaled, label-encoded chunks of one split ("train" or "test") to an XGBoost DMatrix."""
+
+    def __init__(self, path, pipeline, classes, split="train", class_weights=None,
+                 chunk_rows=DEFAULT_CHUNK_ROWS, cache_prefix=None):
+        self.path = path
+        self.pipeline = pipeline
+        self.class_index = {label: i for i, label in enumerate(classes)}
+        self.split = split
+        self.class_weights = class_weights
+        self.chunk_rows = chunk_rows
+        self._chunks = None
+        super().__init__(cache_prefix=cache_prefix)
+
+    def reset(self):
+        self._chunks = None
+
+    def next(self, input_data):
+        if self._chunks is None:
+            self._chunks = iter_split_chunks(self.path, self.split, self.chunk_rows)
+        chunk = next(self._chunks, None)
+        if chunk is None:
+            return False
+        X, y = self.transform(chunk)
+        weight = self.class_weights[y] if self.class_weights is not None else None
+        input_data(data=X, label=y, weight=weight, feature_names=RISK_FEATURES)
+        return True
+
+    def transform(self, chunk):
+        X = self.pipeline.transform_frame(chunk)
+        y = chunk[RISK_TARGET].astype(str).map(self.class_index).to_numpy(np.int32)
+        return X, y
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Risk-model data utilities")
+    commands = parser.add_subparsers(dest="command", required=True)
+    convert_parser = commands.add_parser("to-parquet")
+    convert_parser.add_argument("csv_path")
+    convert_parser.add_argument("--output")
+    convert_parser.add_argument("--chunk-rows", type=int, default=DEFAULT_CHUNK_ROWS)
+    args = parser.parse_args()
+
+    if args.command == "to-parquet":
+        print(f"✅ Wrote {convert_csv_to_parquet(args.csv_path, args.output, args.chunk_rows)}")
@@ -1,86 +1,61 @@
 import pdfplumber
-import fitz
-import pandas as pd
-from transformers import pipeline,AutoTokenizer
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_community.vectorstores import FAISS
-from langchain_huggingface import HuggingFaceEmbeddings
-from langchain_huggingface import HuggingFacePipeline
-from langchain.chains import ConversationalRetrievalChain
-from ml_model import train_and_save_model, predict_risk_level
-import faiss
 import traceback
 import os
-import torch
+from ml_model import train_and_save_model, predict_risk_level
 os.environ["KMP_DUPLICATE_LIB_OK"] = "TRUE"
 
 
-# 📌 Step 1: Extract Text from Research Papers
-def extract_text_from_pdfs(pdf_files):
-    text_data = ""
+# Importing this module does no work: training, index loading and the demo only run as a script,
+# so benchmarks and the API can use the helpers below without paying for them.
+
+# 📌 Step 1-2: Load the persisted FAISS index of the research papers (rebuilt only when a PDF changes)
+def load_research_vectorstore():
+    from langchain_huggingface import HuggingFaceEmbeddings
+    from research_index import EMBEDDING_MODEL_NAME, load_or_build_vectorstore
+
     try:
-        for file_path in pdf_files:
-            with fitz.open(file_path) as doc:
-                for page in doc:
-                    text_data += page.get_text("text") + "\n"
-        print("✅ Research papers extracted successfully.")
+        embeddings = HuggingFaceEmbeddings(model_name=EMBEDDING_MODEL_NAME)
+        vectorstore = load_or_build_vectorstore(embeddings)
+        print("✅ Research papers loaded from FAISS database.")
+        return vectorstore
     except Exception as e:
-        print("❌ Error extracting research papers:", e)
+        print("❌ Error loading FAISS database:", e)
         traceback.print_exc()
-    return text_data
-
-pdf_files = [
-    "1-s2.0-S0002937821027289-main.pdf",
-    "s40748-022-00139-9.pdf",
-    "nutrients-12-01325.pdf"
-]
-research_text = extract_text_from_pdfs(pdf_files)
-
-# 📌 Step 2: Convert Research Papers into a Searchable Database
-try:
-    splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200)
-    text_chunks = splitter.split_text(research_text)
-    embeddings = HuggingFaceEmbeddings(model_name="sentence-transformers/paraphrase-MiniLM-L3-v2")
-    vectorstore = FAISS.from_texts(texts=text_chunks, embedding=embeddings)
-    print("✅ Research papers processed into FAISS database.")
-except Exception as e:
-    print("❌ Error creating FAISS database:", e)
-    traceback.print_exc()
+        return None
 
 # 📌 Step 3: Use Open-Source LLM (Hugging Face) for Recommendation Generation
-try:
-    print("🔍 Debug: Starting LLM pipeline initialization...")
-    tokenizer = AutoTokenizer.from_pretrained("facebook/blenderbot-400M-distill")
-    
-    llm_pipeline = pipeline(
-        "text-generation",
-        model="facebook/blenderbot-400M-distill",
-        tokenizer=tokenizer,
-        max_length=1024,  # Total length (input + output)
-        max_new_tokens=500,  # Maximum tokens to generate
-        truncation=True,  # Explicitly enable truncation
-        device=0 if torch.cuda.is_available() else -1  # Use GPU if available
-    )
-    
-    llm = HuggingFacePipeline(pipeline=llm_pipeline)
-    
-    qa_chain = ConversationalRetrievalChain.from_llm(
-        llm=llm,
-        retriever=vectorstore.as_retriever(),
-        max_tokens_limit=500  # Limit the number of tokens for the QA chain
-    )
-    
-    print("✅ LLM and QA pipeline initialized successfully.")
-
-except Exception as e:
-    print("❌ Error initializing LLM:", e)
-    traceback.print_exc()
+def load_qa_chain(vectorstore):
+    from langchain_huggingface import HuggingFacePipeline
+    from langchain.chains import ConversationalRetrievalChain
+    from local_llm import LocalLLM
+
+    try:
+        print("🔍 Debug: Starting LLM pipeline initialization...")
+        # Int8-quantized CPU model; LOCAL_LLM_MODEL / LOCAL_LLM_QUANTIZE / LOCAL_LLM_MAX_NEW_TOKENS configure it.
+        local_llm = LocalLLM.from_env()
+        llm_pipeline = local_llm.as_pipeline()
+
+        llm = HuggingFacePipeline(pipeline=llm_pipeline)
+
+        qa_chain = ConversationalRetrievalChain.from_llm(
+            llm=llm,
+            retriever=vectorstore.as_retriever(),
+            max_tokens_limit=500  # Limit the number of tokens for the QA chain
+        )
+
+        print("✅ LLM and QA pipeline initialized successfully.")
+        return qa_chain
+
+    except Exception as e:
+        print("❌ Error initializing LLM:", e)
+        traceback.print_exc()
+        return None
 
 # 📌 Step 4: Extract Text from Doctor's Report (PDF)
 def extract_text_from_report(file_path):
     try:
         with pdfplumber.open(file_path) as pdf:
-            text = ' '.join([page.extract_text() for page in pdf.pages if page.extract_text()])
+            text = ' '.join(text for text in (page.extract_text() for page in pdf.pages) if text)
         print("✅ Doctor's report extracted successfully.")
         return text
     except Exception as e:
@@ -92,6 +67,7 @@ def extract_text_from_report(file_path):
 # 📌 Step 5: Generate Nutrition Recommendations Using Research Papers
 import requests
 import json
+from llm_client import load_llm_config
 
 def get_nutrition_recommendations(risk_level, doctor_notes):
     try:
@@ -107,14 +83,16 @@ def get_nutrition_recommendations(risk_level, doctor_notes):
         Always base your answers on the given context.
         """
 
-        # Send the request to OpenRouter.ai
+        # Send the request to OpenRouter.ai (key and model come from OPENROUTER_* env vars)
+        llm_config = load_llm_config()
         res = requests.post(
-            url="https://openrouter.ai/api/v1/chat/completions",
+            url=llm_config["url"],
             headers={
-                "Authorization": f"Bearer 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",  # Replace with your OpenRouter API key
+                "Authorization": f"Bearer {llm_config['api_key']}",
             },
+            timeout=llm_config["timeout"],
             data=json.dumps({
-                "model": "gpt-3.5-turbo",  # Specify the model
+                "model": llm_config["model"],
                 "messages": [
                     {"role": "system", "content": primer},
                     {"role": "user", "content": query}
@@ -142,18 +120,20 @@ def process_patient_report(file_path, patient_data):
         print("📌 **Predicted Pregnancy Risk Level:**", predicted_risk)
         print("📌 **Advanced Nutrition Plan:**", nutrition_plan)
 
-        embedding_dim = 128
-        index = faiss.IndexFlatL2(embedding_dim)
-        print(index) 
     except Exception as e:
         print("❌ Error in execution:", e)
         traceback.print_exc()
-try:
-    X_test = train_and_save_model()
 
-    sample_patient_data = X_test.iloc[1].to_dict()  # Use the second row of X_test
-    process_patient_report("sample_doctor_report.pdf", sample_patient_data)
 
-except Exception as e:
-    print("❌ Error in execution:", e)
-    traceback.print_exc()
\ No newline at end of file
+if __name__ == "__main__":
+    vectorstore = load_research_vectorstore()
+    qa_chain = load_qa_chain(vectorstore) if vectorstore is not None else None
+    try:
+        X_test = train_and_save_model()
+
+        sample_patient_data = X_test.iloc[1].to_dict()  # Use the second row of X_test
+        process_patient_report("sample_doctor_report.pdf", sample_patient_data)
+
+    except Exception as e:
+        print("❌ Error in execution:", e)
+        traceback.print_exc()
@@ -1,7 +1,16 @@
-from transformers import pipeline
+import time
 
+from local_llm import LocalLLM
+
+# Set LOCAL_LLM_MODEL to try another checkpoint (e.g. a local OPT-1.3B directory).
 print("Loading model...")
-llm_pipeline = pipeline("text-generation", model="C:/models/opt-1.3b", device="cpu")
+llm = LocalLLM.from_env()
 print("Model loaded successfully!")
-response = llm_pipeline("Hello, how are you?", max_length=50)
-print("Generated Response:", response)
+
+start = time.perf_counter()
+first = None
+print("Generated Response: ", end="", flush=True)
+for piece in llm.stream("Hello, how are you?", max_new_tokens=50):
+    first = first or time.perf_counter() - start
+    print(piece, end="", flush=True)
+print(f"\nFirst token after {first * 1000:.0f} ms, done after {(time.perf_counter() - start) * 1000:.0f} ms")
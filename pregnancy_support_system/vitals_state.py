@@ -0,0 +1,251 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+# Vitals the watch streams. The model scores the latest reading; a rolling window of each is
+# kept alongside as trend context (mean/std), since smoothing would hide an acute change.
+WINDOWED_FIELDS = ("HeartRate", "HRV", "Resp_Rate", "SpO2", "BodyTemp", "SystolicBP", "DiastolicBP")
+# Used only until a user has reported the field once. Numeric defaults are the medians of
+# Pregnancy_Risk_Prediction_Dataset.csv (for Age and blood pressure also the values matchAndPredict
+# used to hard-code), so a missing reading never puts the model outside its training range;
+# Hormonal_Symptoms keeps matchAndPredict's "Moderate".
+FIELD_DEFAULTS = {
+    "Age": 25.0,
+    "SystolicBP": 120.0,
+    "DiastolicBP": 80.0,
+    "BodyTemp": 98.0,
+    "HeartRate": 76.0,
+    "HRV": 51.1,
+    "Resp_Rate": 15.1,
+    "SpO2": 97.0,
+    "Sleep_Hours": 7.0,
+    "Step_Count": 8514.0,
+    "Caloric_Burn": 2052.7,
+    "Cycle_Length": 29.9,
+    "Hormonal_Symptoms": "Moderate",
+    "BS": 7.5,
+}
+# Smallest change in a model input that is worth a new prediction.
+RESCORE_THRESHOLDS = {
+    "Age": 1.0,
+    "SystolicBP": 3.0,
+    "DiastolicBP": 3.0,
+    "BodyTemp": 0.3,
+    "HeartRate": 3.0,
+    "HRV": 5.0,
+    "Resp_Rate": 1.0,
+    "SpO2": 1.0,
+    "Sleep_Hours": 0.5,
+    "Step_Count": 1000.0,
+    "Caloric_Burn": 100.0,
+    "Cycle_Length": 1.0,
+    "BS": 0.3,
+}
+
+
+def load_vitals_state_config():
+    return {
+        "window_size": int(os.environ.get("VITALS_WINDOW_SIZE", "30")),
+        "max_users": int(os.environ.get("VITALS_MAX_USERS", "10000")),
+        "rescore_interval": float(os.environ.get("VITALS_RESCORE_INTERVAL_SECONDS", "900")),
+        "rescore_margin": float(os.environ.get("VITALS_RESCORE_MARGIN", "0.4")),
+    }
+
+
+class RollingWindow:
+    """Fixed-size ring buffer of one vital with running sums, so mean/std are O(1) per sample."""
+
+    def __init__(self, size):
+        self.values = np.zeros(size, dtype=np.float64)
+        self.count = 0
+        self.position = 0
+        self.total = 0.0
+        self.total_squares = 0.0
+
+    def push(self, value):
+        if self.count == len(self.values):
+            old = self.values[self.position]
+            self.total -= old
+            self.total_squares -= old * old
+        else:
+            self.count += 1
+        self.values[self.position] = value
+        self.position = (self.position + 1) % len(self.values)
+        self.total += value
+        self.total_squares += value * value
+
+    @property
+    def last(self):
+        return float(self.values[self.position - 1]) if self.count else None
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else None
+
+    @property
+    def std(self):
+        if not self.count:
+            return None
+        mean = self.total / self.count
+        return max(self.total_squares / self.count - mean * mean, 0.0) ** 0.5
+
+    def describe(self):
+        return {"last": self.last, "mean": self.mean, "std": self.std, "count": self.count}
+
+
+class UserVitalsState:
+    def __init__(self, window_size):
+        self.latest = {}
+        self.windows = {field: RollingWindow(window_size) for field in WINDOWED_FIELDS}
+        self.samples = 0
+        self.scored_input = None
+        self.result = None
+        self.scored_at = None
+
+    def update(self, sample):
+        self.samples += 1
+        for field, value in sample.items():
+            if value is None or field not in FIELD_DEFAULTS:
+                continue
+            self.latest[field] = value
+            if field in self.windows:
+                self.windows[field].push(float(value))
+
+    def model_input(self):
+        """Latest known value per field, with defaults for never-seen ones."""
+        record, imputed = {}, []
+        for field, default in FIELD_DEFAULTS.items():
+            if field in self.latest:
+                record[field] = self.latest[field]
+            else:
+                record[field] = default
+                imputed.append(field)
+        return record, imputed
+
+    def trends(self):
+        """Rolling mean/std of each streamed vital reported so far."""
+        return {field: {"mean": window.mean, "std": window.std}
+                for field, window in self.windows.items() if window.count}
+
+    def near_boundary(self, margin):
+        """Whether the last prediction's top two class probabilities are within margin of each other."""
+        if self.result is None:
+            return True
+        top, second = sorted(self.result["probabilities"].values())[-2:][::-1]
+        return top - second < margin
+
+    def changed_materially(self, record):
+        if self.scored_input is None:
+            return True
+        for field, value in record.items():
+            previous = self.scored_input[field]
+            threshold = RESCORE_THRESHOLDS.get(field)
+            if threshold is None:
+                if value != previous:
+                    return True
+            elif abs(value - previous) >= threshold:
+                return True
+        return False
+
+    def describe(self):
+        return {
+            "samples": self.samples,
+            "windows": {field: window.describe() for field, window in self.windows.items()},
+            "scored_input": self.scored_input,
+            "result": self.result,
+            "scored_at": self.scored_at,
+        }
+
+
+class VitalsTracker:
+    """Per-user rolling vitals that only re-run the risk model when its inputs move past RESCORE_THRESHOLDS.
+
+    A user whose last prediction was within rescore_margin of another class is rescored on
+    every sample instead: near a class boundary, changes below the thresholds flip the label.
+    """
+
+    def __init__(self, predictor, window_size=30, max_users=10000, rescore_interval=900.0, rescore_margin=0.4):
+        self.predictor = predictor
+        self.window_size = window_size
+        self.max_users = max_users
+        self.rescore_interval = rescore_interval
+        self.rescore_margin = rescore_margin
+        self._users = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.samples = 0
+        self.rescored = 0
+        self.evictions = 0
+
+    @classmethod
+    def from_env(cls, predictor):
+        return cls(predictor, **load_vitals_state_config())
+
+    def _user(self, user_id):
+        state = self._users.get(user_id)
+        if state is None:
+            state = self._users[user_id] = UserVitalsState(self.window_size)
+            while len(self._users) > self.max_users:
+                self._users.popitem(last=False)
+                self.evictions += 1
+        self._users.move_to_end(user_id)
+        return state
+
+    def _fold(self, user_id, sample):
+        with self._lock:
+            state = self._user(user_id)
+            state.update(sample)
+            record, imputed = state.model_input()
+            stale = state.scored_at is None or time.time() - state.scored_at >= self.rescore_interval
+            rescore = stale or state.near_boundary(self.rescore_margin) or state.changed_materially(record)
+            self.samples += 1
+            return state, record, imputed, state.trends(), rescore
+
+    def _scored(self, state, record, result):
+        with self._lock:
+            state.scored_input = record
+            state.result = result
+            state.scored_at = time.time()
+            self.rescored += 1
+
+    def update(self, user_id, sample):
+        """Fold one watch sample (any subset of PatientData fields) into the user's state; rescore if needed."""
+        state, record, imputed, trends, rescore = self._fold(user_id, sample)
+        if rescore:
+            result = self.predictor.score_batch([record])[0]
+            self._scored(state, record, result)
+        else:
+            result = state.result
+        return {"rescored": rescore, **result, "input": record, "imputed": imputed, "trends": trends}
+
+    async def update_async(self, user_id, sample, score):
+        """update() for the event loop: a needed rescore is awaited from score(record), e.g. MicroBatcher.score."""
+        state, record, imputed, trends, rescore = self._fold(user_id, sample)
+        if rescore:
+            result = await score(record)
+            self._scored(state, record, result)
+        else:
+            result = state.result
+        return {"rescored": rescore, **result, "input": record, "imputed": imputed, "trends": trends}
+
+    def get(self, user_id):
+        with self._lock:
+            state = self._users.get(user_id)
+            return state.describe() if state is not None else None
+
+    def stats(self):
+        with self._lock:
+            return {
+                "users": len(self._users),
+                "max_users": self.max_users,
+                "window_size": self.window_size,
+                "rescore_margin": self.rescore_margin,
+                "samples": self.samples,
+                "rescored": self.rescored,
+                "skipped": self.samples - self.rescored,
+                "rescore_rate": self.rescored / self.samples if self.samples else None,
+                "evictions": self.evictions,
+            }
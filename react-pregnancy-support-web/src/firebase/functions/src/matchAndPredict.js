@@ -12,8 +12,11 @@ exports.matchAndPredict = functions.firestore
       .doc(`users/${watchData.userId}`)
       .get();
 
-    // Transform data - replace defaults with user profile where available
-    const mlInput = {
+    const profile = userDoc.data() || {};
+
+    // Send only what we actually know; the API keeps each user's latest values and
+    // rolling vitals windows and fills the gaps from them instead of hard-coded defaults.
+    const sample = {
       // Direct mappings from watch
       HeartRate: watchData.heartRate,
       HRV: watchData.hrv,
@@ -23,31 +26,40 @@ exports.matchAndPredict = functions.firestore
       Step_Count: watchData.stepCount,
       Caloric_Burn: watchData.caloricBurn,
       BodyTemp: watchData.bodyTemp,
-      
-      // From user profile (replace defaults if available)
-      Age: userDoc.data()?.age || 25,
-      SystolicBP: watchData.bloodPressure?.systolic || 120,
-      DiastolicBP: watchData.bloodPressure?.diastolic || 80,
-      Cycle_Length: userDoc.data()?.cycleLength || 28,
-      Hormonal_Symptoms: userDoc.data()?.hormonalSymptoms || 'Moderate',
-      BS: userDoc.data()?.bloodSugar || 5.0
+      SystolicBP: watchData.bloodPressure?.systolic,
+      DiastolicBP: watchData.bloodPressure?.diastolic,
+
+      // From user profile
+      Age: profile.age,
+      Cycle_Length: profile.cycleLength,
+      Hormonal_Symptoms: profile.hormonalSymptoms,
+      BS: profile.bloodSugar
     };
+    const mlInput = Object.fromEntries(
+      Object.entries(sample).filter(([, value]) => value !== undefined && value !== null)
+    );
 
     try {
       // Call your ML API (using localhost during development)
       const mlResponse = await axios.post(
-        'http://127.0.0.1:8000/predict-risk', // Your local FastAPI endpoint
+        `http://127.0.0.1:8000/vitals/${encodeURIComponent(watchData.userId)}`, // Your local FastAPI endpoint
         mlInput,
         { headers: { 'Content-Type': 'application/json' } }
       );
 
+      // Inputs didn't move enough to change the prediction; nothing new to store.
+      if (!mlResponse.data.rescored) {
+        return;
+      }
+
       // Store prediction
+      const { rescored, input, ...prediction } = mlResponse.data;
       await admin.firestore()
         .collection(`users/${watchData.userId}/predictions`)
         .add({
-          ...mlResponse.data,
+          ...prediction,
           timestamp: admin.firestore.FieldValue.serverTimestamp(),
-          inputFeatures: mlInput
+          inputFeatures: input
         });
         
     } catch (error) {